@@ -9,6 +9,114 @@ class Settings(BaseSettings):
   DB_URL_SQLITE:str
   ENVIRONMENT: str = "DEVELOPMENT"
   
+  # Pool de conexiones
+  DB_POOL_SIZE: int = 5
+  DB_MAX_OVERFLOW: int = 10
+  DB_POOL_TIMEOUT: int = 30  # segundos esperando una conexión libre
+  DB_POOL_RECYCLE: int = 1800  # segundos antes de renovar una conexión
+  DB_POOL_PRE_PING: bool = True
+  # Perfil para el pooler de Supabase en modo transacción (pgbouncer):
+  # sin pool propio (NullPool) y sin sentencias preparadas del lado del servidor
+  DB_PGBOUNCER: bool = False
+  # Tamaño de la cache de sentencias preparadas del driver (0 = desactivada)
+  DB_STATEMENT_CACHE_SIZE: int | None = None
+
+  # Réplica de solo lectura (opcional): las dependencias de lectura van a la réplica,
+  # salvo para quien escribió hace menos de DB_READ_YOUR_WRITES_SECONDS
+  DB_URL_REPLICA: str | None = None
+  DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+  # Aplicar las migraciones al arrancar en lugar de solo verificar la versión
+  # (útil para instalaciones de un solo nodo; con varios workers migrar en el deploy)
+  DB_MIGRATE_ON_STARTUP: bool = False
+
+  # Perfil SQLite para instalaciones de un solo nodo: WAL, pragmas y un único
+  # escritor (una conexión con BEGIN IMMEDIATE) para las peticiones que escriben;
+  # las lecturas (GET, sync y async) usan un pool aparte
+  SQLITE_PRODUCTION_PROFILE: bool = True
+  SQLITE_BUSY_TIMEOUT_MS: int = 5000
+  SQLITE_SYNCHRONOUS: str = "NORMAL"
+  SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+  SQLITE_CACHE_SIZE: int = -64000  # negativo = KiB (64 MB)
+
+  # Instrumentación SQL por petición (header Server-Timing y logs en "app.sql").
+  # Una sentencia repetida más de SQL_REPEAT_LIMIT veces en una petición es un posible N+1:
+  # SQL_REPEAT_MODE "warn" lo registra, "raise" hace fallar la petición (tests), "off" lo ignora
+  SQL_INSTRUMENTATION: bool = True
+  SQL_LOG_REQUESTS: bool = False
+  SQL_REPEAT_LIMIT: int = 10
+  SQL_REPEAT_MODE: str = "warn"
+
+  # Consultas lentas: umbral en ms (None desactiva), tamaño del buffer y EXPLAIN en segundo plano.
+  # Se registran aunque SQL_INSTRUMENTATION esté desactivado (sin la ruta de la petición).
+  # EXPLAIN ANALYZE ejecuta la sentencia, por eso está desactivado por defecto
+  SLOW_QUERY_MS: float | None = 500
+  SLOW_QUERY_BUFFER_SIZE: int = 200
+  SLOW_QUERY_EXPLAIN: bool = True
+  SLOW_QUERY_EXPLAIN_ANALYZE: bool = False
+
+  # Métricas Prometheus (GET /metrics): cada worker guarda su foto en METRICS_DIR
+  # (por defecto <tmp>/otb-metrics) cada METRICS_FLUSH_SECONDS; con METRICS_TOKEN
+  # el endpoint exige "Authorization: Bearer <token>"
+  METRICS_ENABLED: bool = True
+  METRICS_DIR: str | None = None
+  METRICS_FLUSH_SECONDS: float = 5.0
+  METRICS_TOKEN: str | None = None
+
+  # Perfilado a pedido con ?profile=1 (solo administradores); se guardan los últimos N perfiles
+  PROFILING_ENABLED: bool = True
+  PROFILE_BUFFER_SIZE: int = 20
+
+  # Compresión de respuestas: gzip, o brotli si el paquete "brotli" está instalado
+  # y el cliente lo acepta. Solo respuestas completas de al menos COMPRESSION_MIN_SIZE bytes
+  COMPRESSION_ENABLED: bool = True
+  COMPRESSION_MIN_SIZE: int = 1024
+  COMPRESSION_GZIP_LEVEL: int = 6
+  COMPRESSION_BROTLI_QUALITY: int = 4
+
+  # Cache de respuestas de los GET marcados con @cached: en memoria de cada worker
+  # (RESPONSE_CACHE_SIZE entradas) o, con RESPONSE_CACHE_URL (ej: redis://localhost:6379/0)
+  # y el paquete "redis", compartida entre workers. El TTL acota lo que una entrada
+  # puede quedar vieja ante escrituras que no pasan por la sesión (u otro worker en memoria)
+  RESPONSE_CACHE_ENABLED: bool = True
+  RESPONSE_CACHE_SIZE: int = 512
+  RESPONSE_CACHE_TTL_SECONDS: float = 60.0
+  RESPONSE_CACHE_URL: str | None = None
+
+  # Reportes financieros por periodo (YYYY-MM): el de un periodo cerrado se guarda
+  # sin vencimiento; el de un periodo abierto dura REPORT_OPEN_PERIOD_TTL_SECONDS
+  REPORT_OPEN_PERIOD_TTL_SECONDS: float = 60.0
+  REPORT_MAX_PERIODS: int = 60
+
+  # Sincronización incremental de las apps de campo (GET /sync/changes): filas por
+  # página y segundos recientes que todavía no se entregan, para no saltar filas de
+  # transacciones que confirman después de que el cliente ya avanzó su cursor
+  SYNC_PAGE_SIZE: int = 500
+  SYNC_MAX_PAGE_SIZE: int = 5000
+  SYNC_SAFETY_LAG_SECONDS: float = 5.0
+
+  # Login: hilos dedicados a bcrypt, máximo de verificaciones en curso/en cola
+  BCRYPT_MAX_WORKERS: int = 2
+  BCRYPT_MAX_PENDING: int = 32
+  # Login: intentos fallidos permitidos por ventana de tiempo
+  LOGIN_THROTTLE_WINDOW_SECONDS: int = 300
+  LOGIN_MAX_ATTEMPTS_PER_USERNAME: int = 5
+  # Por ip del cliente (0 desactiva): detrás de un proxy requiere que uvicorn confíe en
+  # sus cabeceras (FORWARDED_ALLOW_IPS), si no todos comparten la ip del proxy
+  LOGIN_MAX_ATTEMPTS_PER_IP: int = 20
+
+  # Cache de usuarios autenticados y de tokens ya verificados
+  USER_CACHE_TTL_SECONDS: int = 60
+  USER_CACHE_MAX_SIZE: int = 1024
+  TOKEN_CACHE_MAX_SIZE: int = 4096
+
+  # Multas por inasistencia a reuniones obligatorias (en bolivianos), por meet_type
+  ABSENCE_FINE_DEFAULT: int = 20
+  ABSENCE_FINES: dict[str, int] = {}
+
+  # Cada cuántos segundos se guardan en la BD los contadores en vivo de una reunión
+  LIVE_MEET_FLUSH_SECONDS: float = 2.0
+
   PORT:int
   CLIENT_URL_PROD:str
   CLIENT_URL_DEV:str
@@ -23,6 +131,9 @@ class Settings(BaseSettings):
     # así que la cookie es first-party y SameSite=Lax funciona.
     # SameSite=Lax evita que Safari iOS bloquee la cookie (ITP).
     return "lax"
+
+  def absence_fine(self, meet_type: str) -> int:
+    return self.ABSENCE_FINES.get(meet_type, self.ABSENCE_FINE_DEFAULT)
   
   model_config = {"env_file": ".env"}
   
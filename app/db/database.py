@@ -1,23 +1,298 @@
-from sqlalchemy import create_engine
+import math
+import time
+from hashlib import sha256
+from itertools import chain
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.dml import UpdateBase
 
 from app.core.settings import settings
+from app.services.cache import LRUCache, bump_tables
+from app.services.cookie import reads_primary
 
 DATABASE_URL = settings.DB_URL_SUPABASE if settings.ENVIRONMENT == "PRODUCTION" else settings.DB_URL_SQLITE 
+REPLICA_URL = settings.DB_URL_REPLICA
+
+
+def engine_options(url: str, single_connection: bool = False) -> dict:
+  """
+  Opciones del engine según la configuración del pool y el driver.
+  Con single_connection el pool tiene una sola conexión (un único escritor).
+  """
+  url = make_url(url)
+  driver = url.get_driver_name()
+  in_memory = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+  statement_cache_size = settings.DB_STATEMENT_CACHE_SIZE
+  if statement_cache_size is None and settings.DB_PGBOUNCER:
+    statement_cache_size = 0
+
+  options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+  if settings.DB_PGBOUNCER:
+    # pgbouncer ya mantiene el pool, aquí se abre y cierra por checkout
+    options["poolclass"] = NullPool
+  elif not in_memory:
+    options.update(
+      pool_size=1 if single_connection else settings.DB_POOL_SIZE,
+      max_overflow=0 if single_connection else settings.DB_MAX_OVERFLOW,
+      pool_timeout=settings.DB_POOL_TIMEOUT,
+      pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+
+  connect_args = {}
+  if statement_cache_size is not None:
+    if driver == "asyncpg":
+      connect_args["statement_cache_size"] = statement_cache_size
+    elif driver == "psycopg" and statement_cache_size == 0:
+      connect_args["prepare_threshold"] = None
+    # psycopg2 no usa sentencias preparadas del lado del servidor
+  if connect_args:
+    options["connect_args"] = connect_args
+
+  return options
+
+
+def async_url(url: str) -> str:
+  """
+  URL equivalente con driver async: asyncpg para PostgreSQL y aiosqlite para SQLite
+  """
+  url = make_url(url)
+  backend = url.get_backend_name()
+  if backend == "sqlite":
+    return url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+
+  if backend == "postgresql":
+    query = dict(url.query)
+    # asyncpg usa "ssl" en lugar de "sslmode"
+    if "sslmode" in query:
+      query["ssl"] = query.pop("sslmode")
+    statement_cache_size = settings.DB_STATEMENT_CACHE_SIZE
+    if statement_cache_size is None and settings.DB_PGBOUNCER:
+      statement_cache_size = 0
+    if statement_cache_size is not None:
+      query["prepared_statement_cache_size"] = str(statement_cache_size)
+    return url.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+  return url.render_as_string(hide_password=False)
+
+
+def configure_sqlite(engine, serialize_writes: bool = False) -> None:
+  """
+  Aplica los pragmas del perfil SQLite en cada conexión nueva.
+  Con serialize_writes las transacciones empiezan con BEGIN IMMEDIATE, así el
+  bloqueo de escritura se toma al inicio y se espera (busy_timeout) en lugar de
+  fallar con "database is locked" al pasar de lectura a escritura.
+  """
+  @event.listens_for(engine, "connect")
+  def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+    if serialize_writes:
+      # El driver no abre transacciones por su cuenta, lo hace el evento "begin"
+      dbapi_connection.isolation_level = None
+
+  if serialize_writes:
+    @event.listens_for(engine, "begin")
+    def begin_immediate(connection):
+      connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def sqlite_profile(url: str | None) -> bool:
+  return url is not None and make_url(url).get_backend_name() == "sqlite" and settings.SQLITE_PRODUCTION_PROFILE
+
+
+SQLITE_PROFILE = sqlite_profile(DATABASE_URL)
 
 engine = create_engine(
   DATABASE_URL,  
   # connect_args={"check_same_thread": True} # only for sqlite
+  **engine_options(DATABASE_URL, single_connection=SQLITE_PROFILE)
 )
+if SQLITE_PROFILE:
+  configure_sqlite(engine, serialize_writes=True)
+
+replica_engine = create_engine(REPLICA_URL, **engine_options(REPLICA_URL)) if REPLICA_URL else None
+if sqlite_profile(REPLICA_URL):
+  configure_sqlite(replica_engine)
+
+# Perfil SQLite: las lecturas van por su propio pool, sin BEGIN IMMEDIATE. En WAL
+# los lectores no bloquean al escritor ni esperan por él, y ven lo ya confirmado
+sqlite_read_engine = None
+if SQLITE_PROFILE:
+  sqlite_read_engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+  configure_sqlite(sqlite_read_engine)
+
+
+class RoutingSession(Session):
+  """
+  Sesión que elige el engine por sentencia. En una sesión de lectura
+  (info["read_only"]) las consultas van a la réplica; el flush y los
+  INSERT/UPDATE/DELETE siempre van al primario y marcan la sesión como escrita.
+  Con el perfil SQLite las consultas van al pool de lectura (info["local_reads"]),
+  salvo en una sesión de escritura (info["writer"]) o después de escribir en la
+  transacción, que leen del escritor.
+  """
+
+  def get_bind(self, mapper=None, clause=None, **kw):
+    if self._flushing or isinstance(clause, UpdateBase):
+      self.info["wrote"] = True
+      return self.info["primary"]
+    if self.info.get("writer") or self.info.get("wrote"):
+      return self.info["primary"]
+    if self.info.get("read_only") and self.info.get("replica") is not None:
+      return self.info["replica"]
+    if self.info.get("local_reads") is not None:
+      return self.info["local_reads"]
+    return self.info["primary"]
+
+
+# Clientes que escribieron hace poco: leen del primario hasta que venza la ventana.
+# La cache es de este worker; la cookie read_primary_until (firmada, la agrega
+# ReadYourWritesMiddleware) lleva la misma ventana a los demás workers
+recent_writers = LRUCache(maxsize=4096, ttl=settings.DB_READ_YOUR_WRITES_SECONDS, name="recent_writers")
+
+
+def client_key(request: Request) -> str:
+  """
+  Identifica al cliente por su token de sesión (o por IP si no tiene)
+  """
+  token = request.cookies.get("access_token")
+  if token:
+    return sha256(token.encode("utf-8")).hexdigest()
+  return request.client.host if request.client else "anonymous"
+
+
+def reads_from_replica(request: Request) -> bool:
+  return (
+    replica_engine is not None
+    and recent_writers.get(client_key(request)) is None
+    and not reads_primary(request.cookies)
+  )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(RoutingSession, "after_commit")
+def remember_writer(session):
+  if not session.info.pop("wrote", False):
+    return
+  if session.info.get("client_key"):
+    recent_writers.set(session.info["client_key"], True)
+  if session.info.get("request_state") is not None:
+    # Redondeado hacia arriba: la cookie guarda segundos enteros
+    session.info["request_state"]["read_primary_until"] = math.ceil(time.time() + settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+# Tablas escritas en la transacción: al confirmarla se incrementan sus versiones
+# (cache.bump_tables), así las caches que dependen de ellas dejan de usarse
+@event.listens_for(Session, "after_flush")
+def track_flushed_tables(session, flush_context):
+  written = session.info.setdefault("written_tables", set())
+  for instance in chain(session.new, session.deleted, session.dirty):
+    if instance in session.dirty and not session.is_modified(instance):
+      continue
+    written.add(instance.__table__.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def track_executed_tables(orm_execute_state):
+  # INSERT/UPDATE/DELETE masivos con session.execute(), que no pasan por el flush
+  if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+    table = orm_execute_state.statement.table
+    orm_execute_state.session.info.setdefault("written_tables", set()).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def bump_written_tables(session):
+  written = session.info.pop("written_tables", None)
+  if written:
+    bump_tables(*sorted(written))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def forget_written_tables(session, previous_transaction):
+  # Solo al deshacer la transacción completa (no un SAVEPOINT)
+  if previous_transaction.parent is None:
+    session.info.pop("written_tables", None)
+    session.info.pop("wrote", None)
+
+
+SessionLocal = sessionmaker(
+  class_=RoutingSession, autocommit=False, autoflush=False, bind=engine,
+  info={"primary": engine, "replica": replica_engine, "local_reads": sqlite_read_engine}
+)
 
 Base = declarative_base()
 
-def get_db():
+# Métodos que no escriben: su sesión no toma el escritor único del perfil SQLite
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def get_db(request: Request):
+  """
+  Sesión sobre el primario, para endpoints que escriben. En los POST/PUT/DELETE
+  toda la transacción usa el escritor (con el perfil SQLite, serializada)
+  """
   db = SessionLocal()
+  db.info["client_key"] = client_key(request)
+  db.info["request_state"] = request.scope.setdefault("state", {})
+  db.info["writer"] = request.method not in READ_METHODS
   try:
       yield db
   finally:
       db.close()
+
+
+def get_read_db(request: Request):
+  """
+  Sesión de solo lectura: usa la réplica si hay una configurada, salvo que el
+  cliente haya escrito hace poco (lee sus propias escrituras desde el primario)
+  """
+  db = SessionLocal()
+  db.info["client_key"] = client_key(request)
+  db.info["request_state"] = request.scope.setdefault("state", {})
+  db.info["read_only"] = reads_from_replica(request)
+  try:
+      yield db
+  finally:
+      db.close()
+
+
+ASYNC_DATABASE_URL = async_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+if SQLITE_PROFILE:
+  configure_sqlite(async_engine.sync_engine)
+
+async_replica_engine = None
+if REPLICA_URL:
+  async_replica_engine = create_async_engine(async_url(REPLICA_URL), **engine_options(async_url(REPLICA_URL)))
+  if sqlite_profile(REPLICA_URL):
+    configure_sqlite(async_replica_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+  async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+  info={
+    "primary": async_engine.sync_engine,
+    "replica": async_replica_engine.sync_engine if async_replica_engine else None
+  }
+)
+
+async def get_async_db(request: Request):
+  """
+  Sesión async para los endpoints de lectura, con el mismo ruteo que get_read_db
+  """
+  async with AsyncSessionLocal() as db:
+    db.info["client_key"] = client_key(request)
+    db.info["request_state"] = request.scope.setdefault("state", {})
+    db.info["read_only"] = reads_from_replica(request)
+    yield db
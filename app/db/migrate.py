@@ -0,0 +1,196 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada migración es un módulo en app/db/migrations llamado NNNN_descripcion.py con
+una función upgrade(connection). Las versiones aplicadas se guardan en la tabla
+schema_migrations. Se ejecutan una vez por deploy, no en cada worker:
+
+  $ python -m app.db.migrate upgrade     # aplica las pendientes
+  $ python -m app.db.migrate status      # versión actual y pendientes
+  $ python -m app.db.migrate stamp 3     # marca como aplicadas hasta la 3 sin ejecutarlas
+
+Al arrancar, la app solo compara la versión de la base con la última migración
+(check_schema_version), salvo que DB_MIGRATE_ON_STARTUP esté activo.
+"""
+import argparse
+import importlib
+import pkgutil
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cache
+from types import ModuleType
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db import migrations
+from app.db.database import engine
+
+# Clave del advisory lock de PostgreSQL para que dos deploys no migren a la vez
+MIGRATION_LOCK_KEY = 7240319
+
+_metadata = MetaData()
+schema_migrations = Table(
+  "schema_migrations", _metadata,
+  Column("version", Integer, primary_key=True),
+  Column("name", String(100), nullable=False),
+  Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+class SchemaOutOfDate(RuntimeError):
+  pass
+
+
+@dataclass(frozen=True)
+class Migration:
+  version: int
+  name: str
+  module: ModuleType
+
+  def upgrade(self, connection: Connection) -> None:
+    self.module.upgrade(connection)
+
+
+@cache
+def discover() -> tuple[Migration, ...]:
+  """
+  Migraciones disponibles, ordenadas por versión
+  """
+  found = []
+  for info in pkgutil.iter_modules(migrations.__path__):
+    prefix, _, name = info.name.partition("_")
+    if not prefix.isdigit():
+      continue
+    module = importlib.import_module(f"{migrations.__name__}.{info.name}")
+    found.append(Migration(int(prefix), name, module))
+
+  found.sort(key=lambda migration: migration.version)
+  versions = [migration.version for migration in found]
+  if len(versions) != len(set(versions)):
+    raise RuntimeError(f"Versiones de migración repetidas: {versions}")
+  return tuple(found)
+
+
+def head_version() -> int:
+  available = discover()
+  return available[-1].version if available else 0
+
+
+def current_version(connection: Connection) -> int:
+  """
+  Última versión aplicada (0 si la base nunca se migró)
+  """
+  if not inspect(connection).has_table(schema_migrations.name):
+    return 0
+  return connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def pending(connection: Connection) -> list[Migration]:
+  version = current_version(connection)
+  return [migration for migration in discover() if migration.version > version]
+
+
+def _lock(connection: Connection) -> None:
+  if connection.dialect.name == "postgresql":
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def _record(connection: Connection, migration: Migration) -> None:
+  connection.execute(insert(schema_migrations).values(
+    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+  ))
+
+
+def upgrade(bind: Engine = engine, target: int | None = None) -> list[Migration]:
+  """
+  Aplica las migraciones pendientes hasta target (por defecto la última),
+  cada una en su propia transacción
+  """
+  with bind.begin() as connection:
+    _metadata.create_all(connection)
+
+  applied = []
+  for migration in discover():
+    if target is not None and migration.version > target:
+      break
+    with bind.begin() as connection:
+      _lock(connection)
+      # Otro proceso pudo aplicarla mientras esperábamos el lock
+      if migration.version <= current_version(connection):
+        continue
+      migration.upgrade(connection)
+      _record(connection, migration)
+    applied.append(migration)
+  return applied
+
+
+def stamp(bind: Engine = engine, target: int | None = None) -> list[Migration]:
+  """
+  Registra las migraciones hasta target como aplicadas sin ejecutarlas
+  (para bases cuyo esquema ya está al día)
+  """
+  stamped = []
+  with bind.begin() as connection:
+    _metadata.create_all(connection)
+    _lock(connection)
+    version = current_version(connection)
+    for migration in discover():
+      if version < migration.version and (target is None or migration.version <= target):
+        _record(connection, migration)
+        stamped.append(migration)
+  return stamped
+
+
+def check_schema_version(bind: Engine = engine) -> int:
+  """
+  Verificación de arranque: una sola consulta a schema_migrations.
+  Lanza SchemaOutOfDate si faltan migraciones por aplicar.
+  """
+  with bind.connect() as connection:
+    try:
+      version = connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+    except Exception:
+      version = 0
+
+  head = head_version()
+  if version < head:
+    raise SchemaOutOfDate(
+      f"La base está en la versión {version} y la última migración es la {head}. "
+      "Ejecutar: python -m app.db.migrate upgrade"
+    )
+  return version
+
+
+def main(argv: list[str] | None = None) -> int:
+  parser = argparse.ArgumentParser(prog="python -m app.db.migrate", description="Migraciones del esquema")
+  commands = parser.add_subparsers(dest="command", required=True)
+  upgrade_parser = commands.add_parser("upgrade", help="aplica las migraciones pendientes")
+  upgrade_parser.add_argument("target", type=int, nargs="?", default=None)
+  commands.add_parser("status", help="muestra la versión actual y las pendientes")
+  stamp_parser = commands.add_parser("stamp", help="marca migraciones como aplicadas sin ejecutarlas")
+  stamp_parser.add_argument("target", type=int, nargs="?", default=None)
+  args = parser.parse_args(argv)
+
+  if args.command == "upgrade":
+    applied = upgrade(engine, args.target)
+    for migration in applied:
+      print(f"applied {migration.version:04d} {migration.name}")
+    if not applied:
+      print("nothing to apply")
+  elif args.command == "stamp":
+    for migration in stamp(engine, args.target):
+      print(f"stamped {migration.version:04d} {migration.name}")
+  else:
+    with engine.connect() as connection:
+      version = current_version(connection)
+      waiting = pending(connection)
+    print(f"current: {version}  head: {head_version()}")
+    for migration in waiting:
+      print(f"pending {migration.version:04d} {migration.name}")
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+Esquema base: crea las tablas de los modelos que todavía no existen.
+
+En una base nueva esta migración ya crea el esquema con los modelos actuales,
+así que las migraciones siguientes deben comprobar el estado antes de cambiarlo.
+"""
+from app import models  # noqa: F401  (registra las tablas en Base.metadata)
+from app.db.database import Base
+
+
+def upgrade(connection):
+  Base.metadata.create_all(connection)
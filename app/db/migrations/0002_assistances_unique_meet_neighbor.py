@@ -0,0 +1,50 @@
+"""
+Una sola asistencia por vecino y reunión (uq_assistances_meet_neighbor),
+necesaria para el upsert de la lista de asistencia.
+
+Antes de crear la restricción se eliminan las asistencias repetidas, dejando la
+de menor id; las multas que apuntaban a una repetida pasan a la que queda.
+Si se eliminó alguna, recalcular las estadísticas con
+POST /meets/recalculate-all-statistics.
+"""
+from sqlalchemy import inspect, text
+
+CONSTRAINT = "uq_assistances_meet_neighbor"
+COLUMNS = ["meet_id", "neighbor_id"]
+
+
+def _exists(connection) -> bool:
+  inspector = inspect(connection)
+  for constraint in inspector.get_unique_constraints("assistances"):
+    if constraint["name"] == CONSTRAINT or constraint["column_names"] == COLUMNS:
+      return True
+  for index in inspector.get_indexes("assistances"):
+    if index["unique"] and index["column_names"] == COLUMNS:
+      return True
+  return False
+
+
+def upgrade(connection):
+  if _exists(connection):
+    return
+
+  connection.execute(text("""
+    UPDATE debt_items SET assistance_id = (
+      SELECT MIN(kept.id) FROM assistances AS dup
+      JOIN assistances AS kept ON kept.meet_id = dup.meet_id AND kept.neighbor_id = dup.neighbor_id
+      WHERE dup.id = debt_items.assistance_id
+    )
+    WHERE assistance_id IS NOT NULL
+  """))
+  removed = connection.execute(text("""
+    DELETE FROM assistances
+    WHERE id NOT IN (SELECT MIN(id) FROM assistances GROUP BY meet_id, neighbor_id)
+  """)).rowcount
+  if removed:
+    print(f"  {removed} asistencias repetidas eliminadas, recalcular las estadísticas de reuniones")
+
+  if connection.dialect.name == "sqlite":
+    # SQLite no permite agregar restricciones a una tabla existente
+    connection.execute(text(f"CREATE UNIQUE INDEX {CONSTRAINT} ON assistances (meet_id, neighbor_id)"))
+  else:
+    connection.execute(text(f"ALTER TABLE assistances ADD CONSTRAINT {CONSTRAINT} UNIQUE (meet_id, neighbor_id)"))
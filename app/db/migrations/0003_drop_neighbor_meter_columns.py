@@ -0,0 +1,15 @@
+"""
+Quita de neighbor_meters las columnas que ya no están en el modelo NeighborMeter
+(label, installation_date, last_maintenance_date, notes).
+"""
+from sqlalchemy import inspect, text
+
+REMOVED_COLUMNS = ["label", "installation_date", "last_maintenance_date", "notes"]
+
+
+def upgrade(connection):
+  existing = {column["name"] for column in inspect(connection).get_columns("neighbor_meters")}
+  for column in REMOVED_COLUMNS:
+    if column in existing:
+      # SQLite >= 3.35 soporta DROP COLUMN
+      connection.execute(text(f"ALTER TABLE neighbor_meters DROP COLUMN {column}"))
@@ -0,0 +1,10 @@
+"""
+Cierre de periodos: period_closes (periodos cerrados) y period_snapshots
+(totales congelados por sección y tipo de deuda de cada periodo cerrado).
+"""
+from app.models import PeriodClose, PeriodSnapshot
+
+
+def upgrade(connection):
+  # create_all solo crea las tablas que faltan (en una base nueva ya las creó la 0001)
+  PeriodClose.metadata.create_all(connection, tables=[PeriodClose.__table__, PeriodSnapshot.__table__])
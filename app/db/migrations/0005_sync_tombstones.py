@@ -0,0 +1,28 @@
+"""
+Sincronización incremental: tabla sync_tombstones (filas eliminadas) e índices
+sobre updated_at de las entidades sincronizadas. Las filas sin updated_at toman
+su created_at para que entren en la primera sincronización.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, inspect, update
+
+from app.models import DebtItem, Measure, Neighbor, NeighborMeter, SyncTombstone
+
+SYNCED_TABLES = [Neighbor.__table__, NeighborMeter.__table__, DebtItem.__table__, Measure.__table__]
+
+
+def upgrade(connection):
+  # create_all solo crea las tablas que faltan (en una base nueva ya las creó la 0001)
+  SyncTombstone.metadata.create_all(connection, tables=[SyncTombstone.__table__])
+
+  inspector = inspect(connection)
+  now = datetime.utcnow()
+  for table in SYNCED_TABLES:
+    connection.execute(
+      update(table).where(table.c.updated_at.is_(None)).values(updated_at=func.coalesce(table.c.created_at, now))
+    )
+    existing = {index["name"] for index in inspector.get_indexes(table.name)}
+    index = next(index for index in table.indexes if index.name == f"ix_{table.name}_updated_at")
+    if index.name not in existing:
+      index.create(connection)
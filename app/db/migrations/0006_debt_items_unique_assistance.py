@@ -0,0 +1,39 @@
+"""
+Una sola multa por asistencia: índice único parcial uq_debt_items_assistance_id
+sobre debt_items.assistance_id (WHERE assistance_id IS NOT NULL), necesario para
+el ON CONFLICT de la generación de multas.
+
+Antes de crearlo, de cada grupo de multas repetidas se deja la de menor id. Las
+demás se desvinculan de la asistencia; las que no tienen pagos se anulan.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, func, inspect, select, update
+
+from app.models import DebtItem, PaymentDetail
+
+INDEX = "uq_debt_items_assistance_id"
+
+
+def upgrade(connection):
+  if any(index["name"] == INDEX for index in inspect(connection).get_indexes("debt_items")):
+    return
+
+  debts = DebtItem.__table__
+  now = datetime.utcnow()
+  kept = select(func.min(debts.c.id)).where(debts.c.assistance_id.isnot(None)).group_by(debts.c.assistance_id)
+  duplicates = and_(debts.c.assistance_id.isnot(None), debts.c.id.notin_(kept))
+  paid = select(PaymentDetail.debt_item_id).where(PaymentDetail.debt_item_id.isnot(None))
+
+  cancelled = connection.execute(
+    update(debts).where(duplicates, debts.c.id.notin_(paid))
+    .values(status="cancelled", balance=0, notes="Multa repetida anulada", updated_at=now)
+  ).rowcount
+  detached = connection.execute(
+    update(debts).where(duplicates).values(assistance_id=None, updated_at=now)
+  ).rowcount
+  if detached:
+    print(f"  {detached} multas repetidas desvinculadas ({cancelled} anuladas, las demás tienen pagos)")
+
+  # En una base nueva ya lo creó la 0001 (create_all con el índice del modelo)
+  next(index for index in debts.indexes if index.name == INDEX).create(connection)
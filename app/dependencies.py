@@ -1,12 +1,16 @@
-from fastapi import Cookie, Depends, HTTPException, status
+from fastapi import Cookie, Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.enums import UserType
 from app.models.user import User
-from app.db.database import get_db
+from app.db.database import get_async_db, get_db
 
-from app.services.jwt import decode_token
-from app.services.auth import get_user_by_id
+from app.services.jwt import decode_token_cached
+from app.services.auth import get_cached_user_by_id
+from app.services.etag import compute_etag, etag_matches
 
 def get_current_user(
   access_token:str | None = Cookie(default=None),
@@ -19,18 +23,77 @@ def get_current_user(
       detail="not authorized"
     )
   
-  payload = decode_token(token=access_token)
+  payload = decode_token_cached(token=access_token)
   if not payload:
     raise HTTPException(
       status_code=status.HTTP_401_UNAUTHORIZED,
       detail="Invalid token or expired token"
     )
   
-  user = get_user_by_id(db, user_id=payload["sub"])
+  user = get_cached_user_by_id(db, user_id=payload["sub"])
   if not user:
     # or not user.is_active
     raise HTTPException(
       status_code= status.HTTP_401_UNAUTHORIZED,
       detail="User not found"
     )
-  return user
\ No newline at end of file
+  return user
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+  if current_user.role != UserType.ADMIN:
+    raise HTTPException(
+      status_code=status.HTTP_403_FORBIDDEN,
+      detail="Admin only"
+    )
+  return current_user
+
+
+def conditional_get(*models):
+  """
+  Dependencia para GET condicional: calcula el ETag con los marcadores de cambio
+  de las tablas indicadas y responde 304 sin cargar filas si el cliente ya lo tiene
+  """
+  async def dependency(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+  ) -> str:
+    key = f"{request.url.path}?{request.url.query}"
+    etag = await compute_etag(db, models, key=key)
+
+    if etag_matches(etag, request.headers.get("if-none-match")):
+      raise HTTPException(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+      )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return etag
+
+  return dependency
+
+
+def select_fields(model: type[BaseModel]):
+  """
+  Dependencia para ?fields=id,title,...: valida los campos pedidos contra el schema
+  de respuesta y los devuelve en el orden del schema (None si no se pidió ninguno)
+  """
+  allowed = tuple(model.model_fields)
+
+  async def dependency(
+    fields: str | None = Query(None, description=f"Campos a incluir, separados por coma: {','.join(allowed)}")
+  ) -> tuple[str, ...] | None:
+    if not fields:
+      return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+      raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+      )
+    return tuple(name for name in allowed if name in requested) or None
+
+  return dependency
@@ -1,23 +1,41 @@
-from fastapi import Depends, FastAPI, HTTPException, Response, status, Cookie
-from sqlalchemy.orm import Session
-
-from .services import crud
-from . import models
-from .schemas import schema as schemas
-from .db.database import SessionLocal, engine, Base, get_db
+from fastapi import FastAPI, HTTPException, Cookie, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from .db import migrate
+from .db.database import engine, async_engine, replica_engine
+
 from app.routers import auth
 from app.core.settings import settings
-from .schemas.schema import LoginRequest
-from datetime import datetime, timedelta
-from jose import jwt, JWTError
+from app.middleware import CompressionMiddleware, MetricsMiddleware, ProfilingMiddleware, ReadYourWritesMiddleware, SQLTimingMiddleware
+from app.responses import FastJSONResponse
+from contextlib import asynccontextmanager
+
+from app.routers import neighbors, meets, measures, collect_debts, debts, reports, sync, health, admin, metrics as metrics_router
+from app.services.jwt import decode_token_cached
+from app.services import metrics, sql_instrumentation
+from app.services.live_meets import live_meets
+from app.services.reports import ClosedPeriodError
 
-from app.routers import neighbors, meets, measures, collect_debts, debts
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  # El esquema se migra una vez por deploy (python -m app.db.migrate upgrade),
+  # aquí solo se verifica que la base esté en la última versión
+  if settings.DB_MIGRATE_ON_STARTUP:
+    migrate.upgrade(engine)
+  else:
+    migrate.check_schema_version(engine)
+  if settings.METRICS_ENABLED:
+    metrics.start()
+  yield
+  if settings.METRICS_ENABLED:
+    metrics.stop()
+  # Guardar los contadores en vivo pendientes de las reuniones
+  await live_meets.flush_all()
+  await async_engine.dispose()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 # config for CORS
 origins = [
   settings.CLIENT_URL_DEV,
@@ -32,53 +50,55 @@ app.add_middleware(
   allow_headers=["*"],
 )
 
+# Lleva la ventana de lectura desde el primario a los demás workers
+if replica_engine is not None:
+  app.add_middleware(ReadYourWritesMiddleware)
+
+if settings.COMPRESSION_ENABLED:
+  app.add_middleware(CompressionMiddleware)
+
+# Va por dentro de SQLTimingMiddleware para adjuntar el desglose SQL al perfil
+if settings.PROFILING_ENABLED:
+  app.add_middleware(ProfilingMiddleware)
+
+# Los eventos SQL también alimentan el registro de consultas lentas, que funciona
+# aunque la instrumentación por petición esté desactivada
+if settings.SQL_INSTRUMENTATION or settings.SLOW_QUERY_MS is not None:
+  sql_instrumentation.install()
+if settings.SQL_INSTRUMENTATION:
+  app.add_middleware(SQLTimingMiddleware)
+
+if settings.METRICS_ENABLED:
+  app.add_middleware(MetricsMiddleware)
+
+# Deudas de un periodo cerrado, desde cualquier ruta de escritura (ver services/reports.py)
+@app.exception_handler(ClosedPeriodError)
+async def closed_period_handler(request: Request, exc: ClosedPeriodError):
+  return FastJSONResponse(status_code=409, content={"detail": "Period is closed", "periods": exc.periods})
+
+
 app.include_router(auth.router)
 app.include_router(neighbors.router)
 app.include_router(meets.router)
 app.include_router(measures.router) 
 app.include_router(collect_debts.router)
 app.include_router(debts.router)
+app.include_router(reports.router)
+app.include_router(sync.router)
+app.include_router(health.router)
+app.include_router(admin.router)
+if settings.METRICS_ENABLED:
+  app.include_router(metrics_router.router)
 
 @app.get("/")
 async def root():
   return {"message": "Hello World"}
 
-def create_access_token(data: dict):
-  to_encode = data.copy()
-  expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-  to_encode.update({"exp": expire})
-  return jwt.encode(to_encode, settings.ALGORITHM, algorithm=settings.ALGORITHM)
-
-  
-# @app.post("/login")
-# def login(data:LoginRequest, response: Response, db: Session= Depends(get_db)):
-#   user = crud.get_user_by_username(db=db, username=data.username)
-#   if user is not None:
-#     if user.verify_password(data.password):
-#       response.status_code = status.HTTP_202_ACCEPTED
-      
-#       token = create_access_token({"sub": data.username})
-      
-#       response.set_cookie(
-#         key="access_token",
-#         value=token,
-#         httponly=True,
-#         secure=settings.prod,  # True in production (HTTPS)
-#         samesite="lax",
-#       )
-#       return {"message": "Login successful"}
-#   return {
-#     'success':False
-#   }
-  
 @app.get("/me")
 def get_me(access_token: str = Cookie(None)):
   if not access_token:
     raise HTTPException(status_code=401, detail="Not authenticated")
-  try:
-    payload = jwt.decode(access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    username = payload.get("sub")
-    return {"username": username}
-  except JWTError:
+  payload = decode_token_cached(token=access_token)
+  if not payload:
     raise HTTPException(status_code=401, detail="Invalid token")
-  
+  return {"username": payload.get("sub")}
@@ -0,0 +1,291 @@
+import gzip
+import json
+import logging
+import time
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from app.core.settings import settings
+from app.db.database import SessionLocal
+from app.dependencies import get_current_user, require_admin
+from app.services import metrics, profiler, sql_instrumentation
+from app.services.cookie import read_primary_cookie
+
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+sql_logger = logging.getLogger("app.sql")
+
+
+class SQLTimingMiddleware:
+  """
+  Cuenta las consultas SQL de cada petición HTTP. Agrega el header Server-Timing
+  (tiempo en la base y total), escribe una línea de log JSON y avisa cuando una
+  misma sentencia se repite más de SQL_REPEAT_LIMIT veces (posible N+1).
+  """
+
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http":
+      return await self.app(scope, receive, send)
+
+    stats, token = sql_instrumentation.start_request(scope)
+    start = time.perf_counter()
+    status_code = 500
+
+    async def send_with_timing(message):
+      nonlocal status_code
+      if message["type"] == "http.response.start":
+        status_code = message["status"]
+        total_ms = (time.perf_counter() - start) * 1000
+        headers = MutableHeaders(scope=message)
+        headers.append(
+          "Server-Timing",
+          f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+        )
+      await send(message)
+
+    try:
+      await self.app(scope, receive, send_with_timing)
+    finally:
+      sql_instrumentation.end_request(token)
+      self.log(scope, stats, status_code, (time.perf_counter() - start) * 1000)
+
+  def log(self, scope, stats, status_code, total_ms):
+    repeated = stats.repeated()
+    if not repeated and not settings.SQL_LOG_REQUESTS:
+      return
+    entry = {
+      "event": "sql.request",
+      "method": scope["method"],
+      "status": status_code,
+      "total_ms": round(total_ms, 2),
+      **stats.summary(),
+    }
+    if repeated and settings.SQL_REPEAT_MODE != "off":
+      sql_logger.warning(json.dumps(entry, ensure_ascii=False))
+    elif settings.SQL_LOG_REQUESTS:
+      sql_logger.info(json.dumps(entry, ensure_ascii=False))
+
+
+class MetricsMiddleware:
+  """
+  Registra cantidad, errores y latencia de las peticiones HTTP por ruta
+  (la plantilla de la ruta, ej: /meets/{meet_id}, para acotar las etiquetas)
+  """
+
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http":
+      return await self.app(scope, receive, send)
+
+    start = time.perf_counter()
+    status_code = 500
+
+    async def send_with_status(message):
+      nonlocal status_code
+      if message["type"] == "http.response.start":
+        status_code = message["status"]
+      await send(message)
+
+    try:
+      await self.app(scope, receive, send_with_status)
+    except Exception:
+      status_code = 500
+      raise
+    finally:
+      route = getattr(scope.get("route"), "path", None) or "unmatched"
+      metrics.observe_request(scope["method"], route, status_code, time.perf_counter() - start)
+
+
+def _check_admin(access_token: str | None) -> None:
+  """
+  Misma verificación que las rutas de /admin: get_current_user + rol ADMIN
+  """
+  db = SessionLocal()
+  try:
+    require_admin(get_current_user(access_token=access_token, db=db))
+  finally:
+    db.close()
+
+
+class ProfilingMiddleware:
+  """
+  Con ?profile=1 (solo administradores) perfila la petición y guarda el reporte,
+  con el desglose SQL, para verlo en /admin/profiles/{id}. La respuesta lleva el
+  header X-Profile-Id. Sin el parámetro solo se revisa el query string.
+  """
+
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http" or b"profile=" not in scope["query_string"]:
+      return await self.app(scope, receive, send)
+    if parse_qs(scope["query_string"].decode("latin-1")).get("profile") != ["1"]:
+      return await self.app(scope, receive, send)
+
+    try:
+      await run_in_threadpool(_check_admin, Request(scope).cookies.get("access_token"))
+    except HTTPException as exc:
+      response = JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+      return await response(scope, receive, send)
+
+    request_profiler = profiler.RequestProfiler()
+    try:
+      token = request_profiler.start()
+    except profiler.ProfilerBusy as exc:
+      response = JSONResponse({"detail": str(exc)}, status_code=409)
+      return await response(scope, receive, send)
+
+    start = time.perf_counter()
+    status_code = 500
+
+    async def send_with_profile_id(message):
+      nonlocal status_code
+      if message["type"] == "http.response.start":
+        status_code = message["status"]
+        MutableHeaders(scope=message).append("X-Profile-Id", str(request_profiler.id))
+      await send(message)
+
+    try:
+      await self.app(scope, receive, send_with_profile_id)
+    finally:
+      request_profiler.stop(token)
+      stats = sql_instrumentation.current_stats()
+      sql = {**stats.summary(), "statements": stats.breakdown()} if stats is not None else None
+      profiler.store_report(request_profiler, scope, status_code, (time.perf_counter() - start) * 1000, sql)
+
+
+# Tipos que vale la pena comprimir (las imágenes o los zip ya vienen comprimidos)
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+# Por encima de este tamaño se comprime en el threadpool (zlib y brotli liberan el GIL)
+_OFFLOAD_SIZE = 64 * 1024
+
+
+def accepted_encoding(accept_encoding: str) -> str | None:
+  """
+  Elige br o gzip según Accept-Encoding (respeta q=0); None si no acepta ninguno
+  """
+  weights = {}
+  for item in accept_encoding.lower().split(","):
+    name, _, params = item.strip().partition(";")
+    weight = 1.0
+    params = params.strip()
+    if params.startswith("q="):
+      try:
+        weight = float(params[2:])
+      except ValueError:
+        weight = 0.0
+    weights[name.strip()] = weight
+  wildcard = weights.get("*", 0.0)
+  if brotli is not None and weights.get("br", wildcard) > 0:
+    return "br"
+  if weights.get("gzip", wildcard) > 0:
+    return "gzip"
+  return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+  if encoding == "br":
+    return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+  return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class ReadYourWritesMiddleware:
+  """
+  Si la petición confirmó una escritura, agrega la cookie firmada read_primary_until:
+  con ella el cliente lee del primario en cualquier worker hasta que venza la
+  ventana DB_READ_YOUR_WRITES_SECONDS. Solo se usa con una réplica configurada.
+  """
+
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http":
+      return await self.app(scope, receive, send)
+
+    async def send_with_cookie(message):
+      if message["type"] == "http.response.start":
+        # La sesión guarda el vencimiento en el estado de la petición al confirmar
+        until = scope.get("state", {}).get("read_primary_until")
+        if until is not None:
+          MutableHeaders(scope=message).append("Set-Cookie", read_primary_cookie(until))
+      await send(message)
+
+    await self.app(scope, receive, send_with_cookie)
+
+
+class CompressionMiddleware:
+  """
+  Comprime con gzip (o brotli) las respuestas JSON/texto de al menos
+  COMPRESSION_MIN_SIZE bytes. Las respuestas en streaming (más de un mensaje de
+  body) y las que ya traen Content-Encoding pasan sin cambios.
+  """
+
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http":
+      return await self.app(scope, receive, send)
+    accept = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+    encoding = accepted_encoding(accept) if accept else None
+    if encoding is None:
+      return await self.app(scope, receive, send)
+
+    start_message = None
+    passthrough = False
+
+    async def send_compressed(message):
+      nonlocal start_message, passthrough
+      if passthrough:
+        return await send(message)
+
+      if message["type"] == "http.response.start":
+        headers = MutableHeaders(scope=message)
+        content_type = headers.get("content-type", "")
+        if "content-encoding" in headers or not content_type.startswith(_COMPRESSIBLE_TYPES):
+          passthrough = True
+          return await send(message)
+        start_message = message
+        return
+
+      if message["type"] != "http.response.body":
+        return await send(message)
+
+      body = message.get("body", b"")
+      passthrough = True
+      if message.get("more_body", False) or len(body) < settings.COMPRESSION_MIN_SIZE:
+        # Streaming o respuesta chica: se envía tal cual
+        await send(start_message)
+        return await send(message)
+
+      if len(body) >= _OFFLOAD_SIZE:
+        compressed = await run_in_threadpool(compress, body, encoding)
+      else:
+        compressed = compress(body, encoding)
+      headers = MutableHeaders(scope=start_message)
+      headers["Content-Encoding"] = encoding
+      headers["Content-Length"] = str(len(compressed))
+      headers.add_vary_header("Accept-Encoding")
+      etag = headers.get("etag")
+      if etag and not etag.startswith("W/"):
+        # La representación comprimida no es idéntica byte a byte
+        headers["ETag"] = f"W/{etag}"
+      await send(start_message)
+      await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    await self.app(scope, receive, send_compressed)
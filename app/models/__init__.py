@@ -18,5 +18,8 @@ from .neighbor_meter import NeighborMeter
 from .neighbor import Neighbor
 from .payment_detail import PaymentDetail
 from .payment import Payment
+from .period_close import PeriodClose
+from .period_snapshot import PeriodSnapshot
+from .sync_tombstone import SyncTombstone
 
 from .user import User
\ No newline at end of file
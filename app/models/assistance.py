@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Date, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Date, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -8,6 +8,9 @@ from app.db.database import Base
 class Assistance(Base):
   """Registro de asistencia de vecinos a reuniones"""
   __tablename__ = "assistances"
+  __table_args__ = (
+    UniqueConstraint("meet_id", "neighbor_id", name="uq_assistances_meet_neighbor"),  # Un registro por vecino y reunión
+  )
 
   id = Column(Integer, primary_key=True, index=True)
   meet_id = Column(Integer, ForeignKey("meets.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Date, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Date, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -39,11 +39,19 @@ class DebtItem(Base):
   notes = Column(String(200))  # Notas adicionales
 
   created_at = Column(DateTime, default=datetime.utcnow)
-  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
   # Relaciones
   neighbor = relationship("Neighbor", back_populates="debts")
   debt_type = relationship("DebtType", back_populates="debt_items")
   meter_reading = relationship("MeterReading", back_populates="debt_item")
   assistance = relationship("Assistance", back_populates="debt_item")
-  payment_details = relationship("PaymentDetail", back_populates="debt_item", cascade="all, delete-orphan")
\ No newline at end of file
+  payment_details = relationship("PaymentDetail", back_populates="debt_item", cascade="all, delete-orphan")
+
+  __table_args__ = (
+    # Una sola multa por asistencia (las deudas que no son multas tienen assistance_id NULL)
+    Index(
+      "uq_debt_items_assistance_id", assistance_id, unique=True,
+      postgresql_where=assistance_id.isnot(None), sqlite_where=assistance_id.isnot(None)
+    ),
+  )
\ No newline at end of file
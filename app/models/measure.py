@@ -22,7 +22,7 @@ class Measure(Base):
 
   notes = Column(String(200))  # Observaciones generales de la jornada
   created_at = Column(DateTime, default=datetime.utcnow)
-  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
   # Relaciones
   meter_readings = relationship("MeterReading", back_populates="measure", cascade="all, delete-orphan")
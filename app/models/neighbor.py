@@ -21,7 +21,7 @@ class Neighbor(Base):
 
   is_active = Column(Boolean, default=True)  # Si el vecino está activo
   created_at = Column(DateTime, default=datetime.utcnow)
-  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
   
   # Relaciones
   meters = relationship("NeighborMeter", back_populates="neighbor", cascade="all, delete-orphan")
@@ -21,7 +21,7 @@ class NeighborMeter(Base):
 
   # notes = Column(String(200))  # Notas adicionales sobre el medidor
   created_at = Column(DateTime, default=datetime.utcnow)
-  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
   # Relaciones
   neighbor = relationship("Neighbor", back_populates="meters")
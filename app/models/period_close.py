@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.db.database import Base
+
+class PeriodClose(Base):
+  """Periodos cerrados: sus deudas no se modifican y sus reportes salen de period_snapshots"""
+  __tablename__ = "period_closes"
+
+  id = Column(Integer, primary_key=True, index=True)
+
+  period = Column(String(20), nullable=False, unique=True)  # Periodo "YYYY-MM"
+  closed_by = Column(String(64))  # Usuario que cerró el periodo
+
+  created_at = Column(DateTime, default=datetime.utcnow)  # Fecha de cierre
+
+  # Relaciones
+  snapshots = relationship("PeriodSnapshot", back_populates="period_close", cascade="all, delete-orphan")
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.db.database import Base
+
+class PeriodSnapshot(Base):
+  """Totales congelados de un periodo cerrado, por sección y tipo de deuda"""
+  __tablename__ = "period_snapshots"
+
+  id = Column(Integer, primary_key=True, index=True)
+  period_close_id = Column(Integer, ForeignKey("period_closes.id"), nullable=False, index=True)
+
+  period = Column(String(20), nullable=False)  # Periodo "YYYY-MM"
+  section = Column(String(20), nullable=False)  # water, fines, other
+  debt_type_id = Column(Integer, ForeignKey("debt_types.id"))
+  debt_type_name = Column(String(50))  # Nombre del tipo de deuda al momento del cierre
+
+  # Montos al cierre del mes
+  billed = Column(Integer, nullable=False, default=0)  # Emitido en el periodo
+  collected = Column(Integer, nullable=False, default=0)  # Cobrado en el periodo
+  outstanding = Column(Integer, nullable=False, default=0)  # Saldo pendiente acumulado
+
+  created_at = Column(DateTime, default=datetime.utcnow)
+
+  # Relaciones
+  period_close = relationship("PeriodClose", back_populates="snapshots")
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+
+from app.db.database import Base
+
+class SyncTombstone(Base):
+  """Filas eliminadas de las entidades sincronizadas, para que las apps de campo las quiten"""
+  __tablename__ = "sync_tombstones"
+
+  id = Column(Integer, primary_key=True, index=True)
+
+  entity = Column(String(30), nullable=False)  # neighbors, meters, debts, measures
+  row_id = Column(Integer, nullable=False)  # id de la fila eliminada
+
+  deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
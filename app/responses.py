@@ -0,0 +1,49 @@
+"""
+Respuesta JSON por defecto de la app, serializada con pydantic_core (Rust) en
+lugar de json.dumps. Con response_model FastAPI ya entrega el contenido listo
+para JSON, así que todo el camino de serialización queda fuera de Python.
+"""
+from functools import lru_cache
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+  def render(self, content) -> bytes:
+    return to_json(content)
+
+
+@lru_cache(maxsize=128)
+def _partial_list(model: type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+  """
+  Lista del schema reducido a los campos pedidos (mismos tipos y serializadores)
+  """
+  partial = create_model(
+    f"{model.__name__}Fields",
+    __config__=ConfigDict(from_attributes=True),
+    **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+  )
+  return TypeAdapter(list[partial])
+
+
+def partial_response(model: type[BaseModel], rows, fields: tuple[str, ...] | None, response: Response):
+  """
+  Con ?fields= serializa solo esos campos; sin él devuelve las filas tal cual para
+  que FastAPI aplique el response_model completo. Al devolver una Response propia
+  FastAPI no copia los headers de las dependencias (ej: ETag), se copian aquí.
+  """
+  if not fields:
+    return rows
+  adapter = _partial_list(model, fields)
+  partial = Response(
+    adapter.dump_json(adapter.validate_python(rows, from_attributes=True)),
+    media_type="application/json"
+  )
+  # raw_headers y no un dict, que juntaría los headers repetidos (ej: varios Set-Cookie)
+  partial.raw_headers.extend(
+    (name, value) for name, value in response.raw_headers if name not in (b"content-length", b"content-type")
+  )
+  return partial
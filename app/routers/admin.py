@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+from app.dependencies import require_admin
+from app.services import profiler, slow_queries
+
+router = APIRouter(
+  prefix="/admin",
+  tags=['Admin'],
+  dependencies=[Depends(require_admin)]
+)
+
+
+@router.get("/slow-queries")
+def read_slow_queries(limit: int = 50):
+  """
+  Últimas consultas lentas (parámetros sin valores) con su ruta y su EXPLAIN
+  """
+  return slow_queries.entries(limit)
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries():
+  """
+  Vacía el registro de consultas lentas
+  """
+  slow_queries.clear()
+  return {"message": "Slow query log cleared"}
+
+
+@router.get("/profiles")
+def read_profiles():
+  """
+  Perfiles guardados con ?profile=1 (sin el detalle)
+  """
+  return profiler.reports()
+
+
+@router.get("/profiles/{profile_id}")
+def read_profile(profile_id: int, format: str = "json"):
+  """
+  Un perfil: json, html o collapsed (pilas colapsadas para flamegraph.pl / speedscope)
+  """
+  report = profiler.get_report(profile_id)
+  if report is None:
+    raise HTTPException(status_code=404, detail="Profile not found")
+  if format == "html":
+    return HTMLResponse(profiler.render_html(report))
+  if format == "collapsed":
+    return PlainTextResponse(report["collapsed"])
+  return report
@@ -1,9 +1,9 @@
 
-from fastapi import APIRouter, Response, HTTPException, Depends
+from fastapi import APIRouter, Request, Response, HTTPException, Depends
 from sqlalchemy.orm import Session
 
-from app.services.auth import verify_credentials
-from app.services.jwt import create_access_token
+from app.services.auth import AuthBusyError, ip_throttle, username_throttle, verify_credentials, user_cache
+from app.services.jwt import create_access_token, token_cache
 from app.services.cookie import set_auth_cookie, delete_auth_cookie
 from app.dependencies import get_current_user
 
@@ -13,10 +13,30 @@ from app.db.database import get_db
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/login")
-def login(credentials: LoginSchema, response: Response, db: Session = Depends(get_db)):
-  user = verify_credentials(credentials.username, credentials.password, db)
+async def login(credentials: LoginSchema, request: Request, response: Response, db: Session = Depends(get_db)):
+  # La ip real del cliente: uvicorn la toma de X-Forwarded-For solo si el proxy es de confianza
+  ip_key = f"ip:{request.client.host if request.client else 'unknown'}"
+  username_key = f"user:{credentials.username.lower()}"
+
+  retry_after = max(ip_throttle.retry_after(ip_key), username_throttle.retry_after(username_key))
+  if retry_after:
+    raise HTTPException(
+      status_code=429,
+      detail="Too many login attempts",
+      headers={"Retry-After": str(retry_after)}
+    )
+
+  try:
+    user = await verify_credentials(credentials.username, credentials.password, db)
+  except AuthBusyError:
+    raise HTTPException(status_code=503, detail="Login busy, try again", headers={"Retry-After": "1"})
+
   if not user:
+    ip_throttle.register_failure(ip_key)
+    username_throttle.register_failure(username_key)
     raise HTTPException(status_code=401, detail="Invalid Credentials")
+
+  username_throttle.reset(username_key)
   
   token = create_access_token({"sub":str(user.id)})
   set_auth_cookie(response=response, token=token)
@@ -26,6 +46,13 @@ def login(credentials: LoginSchema, response: Response, db: Session = Depends(ge
 def me(current_user=Depends(get_current_user)):
   return current_user
 
+@router.get('/cache-stats')
+def cache_stats(current_user=Depends(get_current_user)):
+  return {
+    "users": user_cache.stats(),
+    "tokens": token_cache.stats()
+  }
+
 @router.post('/logout')
 def logout(response: Response):
   delete_auth_cookie(response=response)
@@ -1,44 +1,34 @@
 # ========== ENDPOINTS DE RECAUDACIONES ==========
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from .. import models
 from ..schemas import schema as schemas
-from ..services import crud
-from ..db.database import get_db
+from ..services import async_crud, crud
+from ..db.database import get_async_db, get_db, get_read_db
+from ..dependencies import conditional_get, select_fields
+from ..responses import partial_response
+from ..services.response_cache import CachedRoute, cached
 
 router = APIRouter(
   prefix="/collect-debts", 
   tags=['Collect Debts'], 
-  responses={404: {"description": "Not found"}}
+  responses={404: {"description": "Not found"}},
+  route_class=CachedRoute
 )
 
-@router.get("")
-def read_collect_debts(db: Session = Depends(get_db)):
+@router.get("", response_model=list[schemas.CollectDebt], dependencies=[Depends(conditional_get(models.CollectDebt))])
+@cached("collect_debts")
+async def read_collect_debts(
+  response: Response,
+  fields: tuple[str, ...] | None = Depends(select_fields(schemas.CollectDebt)),
+  db: AsyncSession = Depends(get_async_db)
+):
   """
   Obtiene todas las recaudaciones ordenadas por fecha de creación descendente
   """
-  collect_debts = crud.get_collect_debts(db)
-
-  collect_debts_data = []
-  for cd in collect_debts:
-    collect_debts_data.append({
-      "id": cd.id,
-      "collect_date": str(cd.collect_date),
-      "period": cd.period,
-      "collector_name": cd.collector_name,
-      "location": cd.location,
-      "status": cd.status,
-      "total_payments": cd.total_payments,
-      "total_collected": cd.total_collected,
-      "total_neighbors_paid": cd.total_neighbors_paid,
-      "start_time": str(cd.start_time) if cd.start_time else None,
-      "end_time": str(cd.end_time) if cd.end_time else None,
-      "notes": cd.notes,
-      "created_at": str(cd.created_at),
-      "updated_at": str(cd.updated_at)
-    })
-
-  return collect_debts_data
+  collect_debts = await async_crud.get_collect_debts(db, fields=fields)
+  return partial_response(schemas.CollectDebt, collect_debts, fields, response)
 
 
 @router.post("", response_model=schemas.CollectDebt)
@@ -48,22 +38,7 @@ def create_collect_debt(collect_debt: schemas.CollectDebtCreate, db: Session = D
   """
   db_collect_debt = crud.create_collect_debt(db=db, collect_debt=collect_debt)
 
-  return {
-    "id": db_collect_debt.id,
-    "collect_date": str(db_collect_debt.collect_date),
-    "period": db_collect_debt.period,
-    "collector_name": db_collect_debt.collector_name,
-    "location": db_collect_debt.location,
-    "status": db_collect_debt.status,
-    "total_payments": db_collect_debt.total_payments,
-    "total_collected": db_collect_debt.total_collected,
-    "total_neighbors_paid": db_collect_debt.total_neighbors_paid,
-    "start_time": str(db_collect_debt.start_time) if db_collect_debt.start_time else None,
-    "end_time": str(db_collect_debt.end_time) if db_collect_debt.end_time else None,
-    "notes": db_collect_debt.notes,
-    "created_at": str(db_collect_debt.created_at),
-    "updated_at": str(db_collect_debt.updated_at)
-  }
+  return db_collect_debt
 
 
 @router.put("/{collect_debt_id}", response_model=schemas.CollectDebt)
@@ -75,22 +50,7 @@ def update_collect_debt(collect_debt_id: int, collect_debt: schemas.CollectDebtU
   if db_collect_debt is None:
     raise HTTPException(status_code=404, detail="CollectDebt not found")
 
-  return {
-    "id": db_collect_debt.id,
-    "collect_date": str(db_collect_debt.collect_date),
-    "period": db_collect_debt.period,
-    "collector_name": db_collect_debt.collector_name,
-    "location": db_collect_debt.location,
-    "status": db_collect_debt.status,
-    "total_payments": db_collect_debt.total_payments,
-    "total_collected": db_collect_debt.total_collected,
-    "total_neighbors_paid": db_collect_debt.total_neighbors_paid,
-    "start_time": str(db_collect_debt.start_time) if db_collect_debt.start_time else None,
-    "end_time": str(db_collect_debt.end_time) if db_collect_debt.end_time else None,
-    "notes": db_collect_debt.notes,
-    "created_at": str(db_collect_debt.created_at),
-    "updated_at": str(db_collect_debt.updated_at)
-  }
+  return db_collect_debt
 
 
 @router.delete("/{collect_debt_id}")
@@ -105,7 +65,7 @@ def delete_collect_debt(collect_debt_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{collect_debt_id}/payments")
-def get_collect_debt_payments(collect_debt_id: int, db: Session = Depends(get_db)):
+def get_collect_debt_payments(collect_debt_id: int, db: Session = Depends(get_read_db)):
   """
   Obtiene todos los pagos de una recaudación específica con detalles
   """
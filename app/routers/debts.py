@@ -17,6 +17,7 @@ def migrate_debtsto_bolivianos(db: Session = Depends(get_db)):
   Convierte todas las deudas y pagos de centavos a bolivianos (divide por 100)
   IMPORTANTE: Ejecutar solo una vez para migrar datos existentes
   """
+  # Las deudas de periodos cerrados se bloquean al guardar (409)
   # Migrar DebtItems
   debts = db.query(models.DebtItem).all()
   debts_updated = 0
@@ -69,37 +70,13 @@ def migrate_debtsto_bolivianos(db: Session = Depends(get_db)):
   }
 
 
-@router.get("/{debt_id}")
+@router.get("/{debt_id}", response_model=schemas.DebtItem)
 def get_debt_detail(debt_id: int, db: Session = Depends(get_db)):
   """
   Obtiene los detalles de una deuda específica
   """
-  debt = crud.get_debt_item(db, debt_id=debt_id)
+  debt = crud.get_debt_item_detail(db, debt_id=debt_id)
   if debt is None:
     raise HTTPException(status_code=404, detail="Debt not found")
 
-  debt_type_name = debt.debt_type.name if debt.debt_type else "Desconocido"
-
-  return {
-    "id": debt.id,
-    "neighbor_id": debt.neighbor_id,
-    "debt_type_id": debt.debt_type_id,
-    "debt_type_name": debt_type_name,
-    "meter_reading_id": debt.meter_reading_id,
-    "assistance_id": debt.assistance_id,
-    "amount": debt.amount,
-    "amount_paid": debt.amount_paid,
-    "balance": debt.balance,
-    "reason": debt.reason,
-    "period": debt.period,
-    "issue_date": str(debt.issue_date),
-    "due_date": str(debt.due_date) if debt.due_date else None,
-    "paid_date": str(debt.paid_date) if debt.paid_date else None,
-    "status": debt.status,
-    "is_overdue": debt.is_overdue,
-    "late_fee": debt.late_fee,
-    "discount": debt.discount,
-    "notes": debt.notes,
-    "created_at": str(debt.created_at),
-    "updated_at": str(debt.updated_at)
-  }
+  return debt
@@ -0,0 +1,66 @@
+import logging
+import time
+
+from sqlalchemy import text
+from fastapi import APIRouter, Response
+from starlette.concurrency import run_in_threadpool
+
+from ..db.database import engine, replica_engine
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+  prefix="/health", 
+  tags=['Health'], 
+)
+
+
+def pool_stats(pool) -> dict:
+  """
+  Estado del pool de conexiones (solo los contadores que soporta el tipo de pool)
+  """
+  stats = {"pool_class": type(pool).__name__}
+  for name in ("size", "checkedin", "checkedout", "overflow"):
+    counter = getattr(pool, name, None)
+    if callable(counter):
+      stats[name] = counter()
+  return stats
+
+
+def _ping_db(bind=engine) -> float:
+  start = time.perf_counter()
+  with bind.connect() as connection:
+    connection.execute(text("SELECT 1"))
+  return (time.perf_counter() - start) * 1000
+
+
+async def _check(bind) -> dict:
+  try:
+    latency_ms = await run_in_threadpool(_ping_db, bind)
+    status = "ok"
+  except Exception:
+    # El detalle (host, usuario) queda en el log, no en la respuesta pública
+    logger.exception("database health check failed (%s)", bind.dialect.name)
+    latency_ms = None
+    status = "error"
+
+  return {
+    "status": status,
+    "dialect": bind.dialect.name,
+    "latency_ms": round(latency_ms, 2) if latency_ms is not None else None,
+    "pool": pool_stats(bind.pool),
+  }
+
+
+@router.get("/db")
+async def health_db(response: Response):
+  """
+  Latencia de ida y vuelta a la base de datos y estado del pool
+  (y de la réplica de lectura, si hay una configurada).
+  Responde 503 si el primario no contesta
+  """
+  result = await _check(engine)
+  result["replica"] = await _check(replica_engine) if replica_engine is not None else None
+  if result["status"] != "ok":
+    response.status_code = 503
+  return result
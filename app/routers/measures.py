@@ -1,66 +1,46 @@
 # ========== MEDICIONES ==========
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from .. import models
 from ..schemas import schema as schemas
-from ..services import crud
-from ..db.database import get_db
+from ..services import async_crud, crud, reports
+from ..db.database import get_async_db, get_db, get_read_db
+from ..dependencies import conditional_get, select_fields
+from ..responses import partial_response
+from ..services.response_cache import CachedRoute, cached
 
 router = APIRouter(
   prefix="/measures", 
   tags=['Measures'], 
-  responses={404: {"description": "Not found"}}
+  responses={404: {"description": "Not found"}},
+  route_class=CachedRoute
 )
 
-@router.get("")
-def read_measures(db: Session = Depends(get_db)):
+@router.get("", response_model=list[schemas.Measure], dependencies=[Depends(conditional_get(models.Measure))])
+@cached("measures")
+async def read_measures(
+  response: Response,
+  fields: tuple[str, ...] | None = Depends(select_fields(schemas.Measure)),
+  db: AsyncSession = Depends(get_async_db)
+):
   """
   Obtiene todas las mediciones ordenadas por fecha de creación
   """
-  measures = crud.get_measures(db)
-
-  # Convertir las fechas a string para la respuesta
-  measures_data = []
-  for measure in measures:
-    measures_data.append({
-      "id": measure.id,
-      "measure_date": str(measure.measure_date),
-      "period": measure.period,
-      "reader_name": measure.reader_name,
-      "status": measure.status,
-      "total_meters": measure.total_meters,
-      "meters_read": measure.meters_read,
-      "meters_pending": measure.meters_pending,
-      "notes": measure.notes,
-      "created_at": str(measure.created_at),
-      "updated_at": str(measure.updated_at)
-    })
-
-  return measures_data
+  measures = await async_crud.get_measures(db, fields=fields)
+  return partial_response(schemas.Measure, measures, fields, response)
 
 
 @router.get("/{measure_id}", response_model=schemas.Measure)
-def read_measure(measure_id: int, db: Session = Depends(get_db)):
+async def read_measure(measure_id: int, db: AsyncSession = Depends(get_async_db)):
   """
   Obtiene una medición específica
   """
-  measure = crud.get_measure(db, measure_id=measure_id)
+  measure = await async_crud.get_measure(db, measure_id=measure_id)
   if measure is None:
     raise HTTPException(status_code=404, detail="Measure not found")
 
-  return {
-    "id": measure.id,
-    "measure_date": str(measure.measure_date),
-    "period": measure.period,
-    "reader_name": measure.reader_name,
-    "status": measure.status,
-    "total_meters": measure.total_meters,
-    "meters_read": measure.meters_read,
-    "meters_pending": measure.meters_pending,
-    "notes": measure.notes,
-    "created_at": str(measure.created_at),
-    "updated_at": str(measure.updated_at)
-  }
+  return measure
 
 
 @router.post("", response_model=schemas.Measure)
@@ -70,19 +50,7 @@ def create_measure(measure: schemas.MeasureCreate, db: Session = Depends(get_db)
   """
   db_measure = crud.create_measure(db=db, measure=measure)
 
-  return {
-    "id": db_measure.id,
-    "measure_date": str(db_measure.measure_date),
-    "period": db_measure.period,
-    "reader_name": db_measure.reader_name,
-    "status": db_measure.status,
-    "total_meters": db_measure.total_meters,
-    "meters_read": db_measure.meters_read,
-    "meters_pending": db_measure.meters_pending,
-    "notes": db_measure.notes,
-    "created_at": str(db_measure.created_at),
-    "updated_at": str(db_measure.updated_at)
-  }
+  return db_measure
 
 
 @router.put("/{measure_id}", response_model=schemas.Measure)
@@ -94,19 +62,7 @@ def update_measure(measure_id: int, measure: schemas.MeasureUpdate, db: Session
   if db_measure is None:
     raise HTTPException(status_code=404, detail="Measure not found")
 
-  return {
-    "id": db_measure.id,
-    "measure_date": str(db_measure.measure_date),
-    "period": db_measure.period,
-    "reader_name": db_measure.reader_name,
-    "status": db_measure.status,
-    "total_meters": db_measure.total_meters,
-    "meters_read": db_measure.meters_read,
-    "meters_pending": db_measure.meters_pending,
-    "notes": db_measure.notes,
-    "created_at": str(db_measure.created_at),
-    "updated_at": str(db_measure.updated_at)
-  }
+  return db_measure
 
 
 @router.delete("/{measure_id}")
@@ -120,8 +76,14 @@ def delete_measure(measure_id: int, db: Session = Depends(get_db)):
   return {"message": "Measure deleted successfully", "id": measure_id}
 
 
-@router.get("/{measure_id}/meter-readings")
-def get_measure_meter_readings(measure_id: int, db: Session = Depends(get_db)):
+@router.get("/{measure_id}/meter-readings", response_model=list[schemas.MeasureMeterReading])
+@cached("measures", "meter_readings", "neighbor_meters", "neighbors")
+def get_measure_meter_readings(
+  measure_id: int,
+  response: Response,
+  fields: tuple[str, ...] | None = Depends(select_fields(schemas.MeasureMeterReading)),
+  db: Session = Depends(get_read_db)
+):
   """
   Obtiene todas las lecturas de medidores para una medición específica
   """
@@ -130,41 +92,9 @@ def get_measure_meter_readings(measure_id: int, db: Session = Depends(get_db)):
   if not measure:
     raise HTTPException(status_code=404, detail="Measure not found")
 
-  # Obtener todas las lecturas de esta medición con información del vecino y medidor
-  meter_readings = db.query(models.MeterReading).filter(
-    models.MeterReading.measure_id == measure_id
-  ).join(
-    models.NeighborMeter, models.MeterReading.meter_id == models.NeighborMeter.id
-  ).join(
-    models.Neighbor, models.NeighborMeter.neighbor_id == models.Neighbor.id
-  ).order_by(models.Neighbor.last_name, models.Neighbor.first_name).all()
-
-  # Formatear respuesta con información del vecino
-  readings_data = []
-  for reading in meter_readings:
-    neighbor = reading.meter.neighbor
-    readings_data.append({
-      "id": reading.id,
-      "meter_id": reading.meter_id,
-      "meter_number": reading.meter.meter_code,
-      
-      "measure_id": reading.measure_id,
-      "current_reading": reading.current_reading,
-      # "reading_date": str(reading.reading_date),
-      # "status": reading.status,
-      # "has_anomaly": reading.has_anomaly,
-      "notes": reading.notes,
-      
-      # Información del vecino
-      "neighbor_first_name": neighbor.first_name,
-      "neighbor_second_name": neighbor.second_name,
-      "neighbor_last_name": neighbor.last_name,
-      
-      "created_at": str(reading.created_at),
-      "updated_at": str(reading.updated_at),
-    })
-
-  return readings_data
+  # Lecturas con información del vecino y medidor
+  readings = crud.get_measure_meter_readings(db, measure_id=measure_id, fields=fields)
+  return partial_response(schemas.MeasureMeterReading, readings, fields, response)
 
 @router.post("/{measure_id}/generate-debts")
 def generate_debts_from_measure(measure_id: int, db: Session = Depends(get_db)):
@@ -276,6 +206,9 @@ def delete_measure_debts(measure_id: int, db: Session = Depends(get_db)):
   measure = crud.get_measure(db, measure_id=measure_id)
   if not measure:
     raise HTTPException(status_code=404, detail="Measure not found")
+  # query.delete() no pasa por el flush de la sesión, que es donde se bloquean los periodos cerrados
+  if measure.period and reports.is_closed(db, measure.period):
+    raise HTTPException(status_code=409, detail="Period is closed")
 
   # Obtener todas las lecturas de esta medición
   meter_readings = db.query(models.MeterReading).filter(
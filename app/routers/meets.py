@@ -1,81 +1,83 @@
 # ==========  REUNIONES ==========
 
+from collections import Counter
+from datetime import date
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect
 
+from .. import models
 from ..schemas import schema as schemas
-from ..services import crud
-from ..db.database import get_db
+from ..services import async_crud, crud, reports
+from ..services.live_meets import live_meets
+from ..db.database import get_async_db, get_db, get_read_db
+from ..core.settings import settings
+from ..dependencies import conditional_get, select_fields
+from ..responses import partial_response
+from ..services.response_cache import CachedRoute, cached
 
 router = APIRouter(
   prefix="/meets", 
   tags=['Meets'], 
-  responses={404: {"description": "Not found"}}
+  responses={404: {"description": "Not found"}},
+  route_class=CachedRoute
 )
 
-@router.get("")
-def read_meets(db: Session = Depends(get_db)):
-  """
-  Obtiene todas las reuniones ordenadas por fecha de creación
-  """
-  meets = crud.get_meets(db)
-
-  # Convertir las fechas a string para la respuesta
-  meets_data = []
-  for meet in meets:
-    meets_data.append({
-      "id": meet.id,
-      "meet_date": str(meet.meet_date),
-      "meet_type": meet.meet_type,
-      "title": meet.title,
-      "description": meet.description,
-      "location": meet.location,
-      "start_time": str(meet.start_time) if meet.start_time else None,
-      "end_time": str(meet.end_time) if meet.end_time else None,
-      "status": meet.status,
-      "is_mandatory": meet.is_mandatory,
-      "total_neighbors": meet.total_neighbors,
-      "total_present": meet.total_present,
-      "total_absent": meet.total_absent,
-      "total_on_time": meet.total_on_time,
-      "organizer": meet.organizer,
-      "notes": meet.notes,
-      "created_at": str(meet.created_at),
-      "updated_at": str(meet.updated_at)
-    })
-
-  return meets_data
+@router.get("", response_model=list[schemas.Meet], dependencies=[Depends(conditional_get(models.Meet))])
+@cached("meets")
+async def read_meets(
+  response: Response,
+  fields: tuple[str, ...] | None = Depends(select_fields(schemas.Meet)),
+  db: AsyncSession = Depends(get_async_db)
+):
+  """
+  Obtiene todas las reuniones ordenadas por fecha de creación.
+  Con ?fields=id,title,meet_date solo se leen y devuelven esas columnas.
+  """
+  meets = await async_crud.get_meets(db, fields=fields)
+  return partial_response(schemas.Meet, meets, fields, response)
+
+
+@router.get("/compliance", response_model=list[schemas.AttendanceCompliance])
+@cached("meets", "assistances", "neighbors")
+def read_attendance_compliance(
+  date_from: date | None = None,
+  date_to: date | None = None,
+  meet_type: str | None = None,
+  db: Session = Depends(get_read_db)
+):
+  """
+  Ranking de cumplimiento de asistencia de todos los vecinos
+  """
+  rows = crud.get_attendance_compliance(db, date_from=date_from, date_to=date_to, meet_type=meet_type)
+
+  return [
+    {
+      "neighbor_id": row.neighbor_id,
+      "neighbor_name": f"{row.first_name} {row.second_name or ''} {row.last_name}".strip(),
+      "total_meets": row.total_meets,
+      "present": row.present,
+      "absent": row.absent,
+      "on_time": row.on_time,
+      "excused": row.excused,
+      "compliance_rate": row.compliance_rate
+    }
+    for row in rows
+  ]
 
 
 @router.get("/{meet_id}", response_model=schemas.Meet)
-def read_meet(meet_id: int, db: Session = Depends(get_db)):
+async def read_meet(meet_id: int, db: AsyncSession = Depends(get_async_db)):
   """
   Obtiene una reunión específica
   """
-  meet = crud.get_meet(db, meet_id=meet_id)
+  meet = await async_crud.get_meet(db, meet_id=meet_id)
   if meet is None:
     raise HTTPException(status_code=404, detail="Meet not found")
 
-  return {
-    "id": meet.id,
-    "meet_date": str(meet.meet_date),
-    "meet_type": meet.meet_type,
-    "title": meet.title,
-    "description": meet.description,
-    "location": meet.location,
-    "start_time": str(meet.start_time) if meet.start_time else None,
-    "end_time": str(meet.end_time) if meet.end_time else None,
-    "status": meet.status,
-    "is_mandatory": meet.is_mandatory,
-    "total_neighbors": meet.total_neighbors,
-    "total_present": meet.total_present,
-    "total_absent": meet.total_absent,
-    "total_on_time": meet.total_on_time,
-    "organizer": meet.organizer,
-    "notes": meet.notes,
-    "created_at": str(meet.created_at),
-    "updated_at": str(meet.updated_at)
-  }
+  return meet
 
 
 @router.post("/", response_model=schemas.Meet)
@@ -85,26 +87,7 @@ def create_meet(meet: schemas.MeetCreate, db: Session = Depends(get_db)):
   """
   db_meet = crud.create_meet(db=db, meet=meet)
 
-  return {
-    "id": db_meet.id,
-    "meet_date": str(db_meet.meet_date),
-    "meet_type": db_meet.meet_type,
-    "title": db_meet.title,
-    "description": db_meet.description,
-    "location": db_meet.location,
-    "start_time": str(db_meet.start_time) if db_meet.start_time else None,
-    "end_time": str(db_meet.end_time) if db_meet.end_time else None,
-    "status": db_meet.status,
-    "is_mandatory": db_meet.is_mandatory,
-    "total_neighbors": db_meet.total_neighbors,
-    "total_present": db_meet.total_present,
-    "total_absent": db_meet.total_absent,
-    "total_on_time": db_meet.total_on_time,
-    "organizer": db_meet.organizer,
-    "notes": db_meet.notes,
-    "created_at": str(db_meet.created_at),
-    "updated_at": str(db_meet.updated_at)
-  }
+  return db_meet
 
 
 @router.put("/{meet_id}", response_model=schemas.Meet)
@@ -116,26 +99,7 @@ def update_meet(meet_id: int, meet: schemas.MeetUpdate, db: Session = Depends(ge
   if db_meet is None:
     raise HTTPException(status_code=404, detail="Meet not found")
 
-  return {
-    "id": db_meet.id,
-    "meet_date": str(db_meet.meet_date),
-    "meet_type": db_meet.meet_type,
-    "title": db_meet.title,
-    "description": db_meet.description,
-    "location": db_meet.location,
-    "start_time": str(db_meet.start_time) if db_meet.start_time else None,
-    "end_time": str(db_meet.end_time) if db_meet.end_time else None,
-    "status": db_meet.status,
-    "is_mandatory": db_meet.is_mandatory,
-    "total_neighbors": db_meet.total_neighbors,
-    "total_present": db_meet.total_present,
-    "total_absent": db_meet.total_absent,
-    "total_on_time": db_meet.total_on_time,
-    "organizer": db_meet.organizer,
-    "notes": db_meet.notes,
-    "created_at": str(db_meet.created_at),
-    "updated_at": str(db_meet.updated_at)
-  }
+  return db_meet
 
 
 @router.delete("/{meet_id}")
@@ -149,6 +113,33 @@ def delete_meet(meet_id: int, db: Session = Depends(get_db)):
   return {"message": "Meet deleted successfully", "id": meet_id}
 
 
+@router.post("/{meet_id}/start")
+def start_meet(meet_id: int, db: Session = Depends(get_db)):
+  """
+  Inicia una reunión y crea el pase de lista con todos los vecinos activos como ausentes.
+  Se puede ejecutar varias veces sin duplicar registros.
+  """
+  meet = crud.get_meet(db, meet_id=meet_id)
+  if meet is None:
+    raise HTTPException(status_code=404, detail="Meet not found")
+  if meet.status in ("completed", "cancelled"):
+    raise HTTPException(status_code=400, detail=f"Meet is {meet.status}")
+
+  seeded = crud.start_meet(db, meet=meet)
+
+  return {
+    "message": "Meet started successfully",
+    "id": meet.id,
+    "status": meet.status,
+    "start_time": str(meet.start_time) if meet.start_time else None,
+    "assistances_created": seeded,
+    "total_neighbors": meet.total_neighbors,
+    "total_present": meet.total_present,
+    "total_absent": meet.total_absent,
+    "total_on_time": meet.total_on_time
+  }
+
+
 @router.get("/{meet_id}/assistances")
 def read_meet_assistances(meet_id: int, db: Session = Depends(get_db)):
   """
@@ -227,6 +218,106 @@ def create_meet_assistance(meet_id: int, assistance: schemas.AssistanceBase, db:
   }
 
 
+@router.post("/{meet_id}/assistances/{neighbor_id}/check-in", response_model=schemas.Assistance)
+def check_in_meet_assistance(meet_id: int, neighbor_id: int, check_in: schemas.AssistanceCheckIn, db: Session = Depends(get_db)):
+  """
+  Marca la llegada de un vecino en el pase de lista de una reunión iniciada
+  """
+  db_assistance = crud.check_in_assistance(
+    db,
+    meet_id=meet_id,
+    neighbor_id=neighbor_id,
+    is_on_time=check_in.is_on_time
+  )
+  if db_assistance is None:
+    raise HTTPException(status_code=404, detail="Assistance not found")
+
+  neighbor = db_assistance.neighbor
+  neighbor_name = f"{neighbor.first_name} {neighbor.second_name or ''} {neighbor.last_name}".strip()
+
+  return {
+    "id": db_assistance.id,
+    "meet_id": db_assistance.meet_id,
+    "neighbor_id": db_assistance.neighbor_id,
+    "neighbor_name": neighbor_name,
+    "is_present": db_assistance.is_present,
+    "is_on_time": db_assistance.is_on_time,
+    "arrival_time": str(db_assistance.arrival_time) if db_assistance.arrival_time else None,
+    "departure_time": str(db_assistance.departure_time) if db_assistance.departure_time else None,
+    "excuse_reason": db_assistance.excuse_reason,
+    "has_excuse": db_assistance.has_excuse,
+    "represented_by": db_assistance.represented_by,
+    "has_representative": db_assistance.has_representative,
+    "notes": db_assistance.notes
+  }
+
+
+@router.websocket("/{meet_id}/live")
+async def live_meet_check_in(websocket: WebSocket, meet_id: int):
+  """
+  Canal en vivo del pase de lista de una reunión.
+  Recibe {"action": "check_in", "neighbor_id": int, "is_on_time": bool}
+  y difunde los contadores actualizados a todos los clientes conectados.
+  """
+  await websocket.accept()
+  room = await live_meets.join(meet_id, websocket)
+  if room is None:
+    await websocket.close(code=4404, reason="Meet not found")
+    return
+
+  try:
+    await websocket.send_json({"event": "counters", "counters": await live_meets.refresh_counters(room)})
+    while True:
+      try:
+        message = await websocket.receive_json()
+      except ValueError:
+        # JSON mal formado (JSONDecodeError es un ValueError): se avisa y se sigue escuchando
+        await websocket.send_json({"event": "error", "detail": "Invalid JSON"})
+        continue
+      if not isinstance(message, dict) or message.get("action") != "check_in" or not isinstance(message.get("neighbor_id"), int):
+        await websocket.send_json({"event": "error", "detail": "Invalid message"})
+        continue
+
+      neighbor_id = message["neighbor_id"]
+      checked_in = await live_meets.check_in(room, neighbor_id, bool(message.get("is_on_time", False)))
+      if not checked_in:
+        await websocket.send_json({
+          "event": "ignored",
+          "neighbor_id": neighbor_id,
+          "detail": "Assistance not found or already present"
+        })
+  except WebSocketDisconnect:
+    pass
+  finally:
+    await live_meets.leave(room, websocket)
+
+
+@router.put("/{meet_id}/assistances/bulk", response_model=schemas.AssistanceBulkResponse)
+def bulk_update_meet_assistances(meet_id: int, body: schemas.AssistanceBulkUpdate, db: Session = Depends(get_db)):
+  """
+  Registra el pase de lista completo de una reunión en una sola petición
+  y retorna solo lo que cambió
+  """
+  meet = crud.get_meet(db, meet_id=meet_id)
+  if meet is None:
+    raise HTTPException(status_code=404, detail="Meet not found")
+
+  neighbor_ids = [item.neighbor_id for item in body.roster]
+  duplicated = sorted(neighbor_id for neighbor_id, count in Counter(neighbor_ids).items() if count > 1)
+  if duplicated:
+    raise HTTPException(status_code=422, detail={"message": "Duplicated neighbor_id in roster", "neighbor_ids": duplicated})
+  unknown = crud.get_unknown_neighbor_ids(db, neighbor_ids)
+  if unknown:
+    raise HTTPException(status_code=422, detail={"message": "Unknown neighbor_id in roster", "neighbor_ids": unknown})
+
+  try:
+    return crud.bulk_upsert_assistances(db, meet=meet, roster=body.roster)
+  except IntegrityError:
+    # Un vecino del pase de lista se eliminó entre la validación y el upsert
+    db.rollback()
+    raise HTTPException(status_code=422, detail={"message": "Unknown neighbor_id in roster"})
+
+
 @router.put("/{assistance_id}", response_model=schemas.Assistance)
 def update_assistance(assistance_id: int, assistance: schemas.AssistanceUpdate, db: Session = Depends(get_db)):
   """
@@ -257,6 +348,30 @@ def update_assistance(assistance_id: int, assistance: schemas.AssistanceUpdate,
   }
 
 
+@router.post("/{meet_id}/generate-fines")
+def generate_meet_fines(meet_id: int, dry_run: bool = False, db: Session = Depends(get_db)):
+  """
+  Genera las multas por inasistencia de una reunión obligatoria.
+  Solo multa a ausentes sin justificación ni representante y omite las multas ya generadas.
+  Con dry_run=true solo retorna los totales sin crear deudas.
+  """
+  meet = crud.get_meet(db, meet_id=meet_id)
+  if meet is None:
+    raise HTTPException(status_code=404, detail="Meet not found")
+  if not meet.is_mandatory:
+    raise HTTPException(status_code=400, detail="Meet is not mandatory")
+  # Las multas se insertan con Core, sin pasar por el flush que bloquea los periodos cerrados
+  if not dry_run and reports.is_closed(db, meet.meet_date.strftime("%Y-%m")):
+    raise HTTPException(status_code=409, detail="Period is closed")
+
+  return crud.generate_absence_fines(
+    db,
+    meet=meet,
+    amount=settings.absence_fine(meet.meet_type),
+    dry_run=dry_run
+  )
+
+
 @router.post("/{meet_id}/recalculate-statistics")
 def recalculate_meet_statistics(meet_id: int, db: Session = Depends(get_db)):
   """
@@ -280,12 +395,7 @@ def recalculate_all_meets_statistics(db: Session = Depends(get_db)):
   """
   Recalcula las estadísticas de asistencia de todas las reuniones
   """
-  meets = crud.get_meets(db)
-  updated_count = 0
-
-  for meet in meets:
-    crud.update_meet_statistics(db, meet.id)
-    updated_count += 1
+  updated_count = crud.recalculate_all_meet_statistics(db)
 
   return {
     "message": f"Statistics updated successfully for {updated_count} meetings",
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.settings import settings
+from app.services import metrics
+
+router = APIRouter(tags=['Metrics'])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics(request: Request):
+  """
+  Métricas en formato de texto de Prometheus, sumadas entre los workers.
+  Es async a propósito: corre en el hilo del event loop, igual que el middleware.
+  """
+  if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+    raise HTTPException(status_code=401, detail="not authorized")
+  return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
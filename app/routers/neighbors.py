@@ -1,14 +1,21 @@
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException
 
+from .. import models
 from ..schemas import schema as schemas
-from ..services import crud
-from ..db.database import get_db
+from ..services import async_crud, crud
+from ..db.database import get_async_db, get_db, get_read_db
+from ..dependencies import conditional_get
+from ..services.response_cache import CachedRoute, cache_for
 
 router = APIRouter(
   prefix="/neighbors", 
   tags=['Neighbors'], 
-  responses={404: {"description": "Not found"}}
+  responses={404: {"description": "Not found"}},
+  route_class=CachedRoute
 )
 
 @router.post("", response_model=schemas.Neighbor, )
@@ -20,9 +27,9 @@ def create_neighbor(neighbor: schemas.NeighborCreate, db: Session = Depends(get_
       raise HTTPException(status_code=400, detail="Email already registered")
   return crud.create_neighbor(db=db, neighbor=neighbor)
 
-@router.get("")
-def read_neighbors(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-  neighbors = crud.get_neighbors(db, skip=skip, limit=limit)
+@router.get("", dependencies=[Depends(conditional_get(models.Neighbor))])
+async def read_neighbors(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+  neighbors = await async_crud.get_neighbors(db, skip=skip, limit=limit)
   if neighbors:
     return {
       "data": neighbors,
@@ -100,7 +107,7 @@ def get_neighbor_meters(neighbor_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{neighbor_id}/payments")
-def get_neighbor_payments(neighbor_id: int, db: Session = Depends(get_db)):
+def get_neighbor_payments(neighbor_id: int, db: Session = Depends(get_read_db)):
   """
   Obtiene todos los pagos realizados por un vecino con sus detalles
   """
@@ -149,7 +156,11 @@ def get_neighbor_payments(neighbor_id: int, db: Session = Depends(get_db)):
 
 # ========== RUTAS DE DEUDAS ==========
 
-@router.get("/{neighbor_id}/debts/active", response_model=schemas.NeighborDebtsResponse)
+@router.get(
+  "/{neighbor_id}/debts/active",
+  response_model=schemas.NeighborDebtsResponse,
+  dependencies=[Depends(cache_for("neighbors", "debt_items", "debt_types"))]
+)
 def get_neighbor_active_debts(neighbor_id: int, db: Session = Depends(get_db)):
   """
   Obtiene todas las deudas activas de un vecino (pending, partial, overdue)
@@ -162,39 +173,9 @@ def get_neighbor_active_debts(neighbor_id: int, db: Session = Depends(get_db)):
   # Obtener deudas activas
   debts = crud.get_neighbor_active_debts(db, neighbor_id=neighbor_id)
 
-  # Formatear respuesta
-  debt_details = []
-  total_amount = 0
-  total_balance = 0
-
-  for debt in debts:
-    # Obtener el nombre del tipo de deuda
-    debt_type_name = debt.debt_type.name if debt.debt_type else "Desconocido"
-
-    debt_detail = {
-      "id": debt.id,
-      "neighbor_id": debt.neighbor_id,
-      "debt_type_id": debt.debt_type_id,
-      "debt_type_name": debt_type_name,
-      "meter_reading_id": debt.meter_reading_id,
-      "assistance_id": debt.assistance_id,
-      "amount": debt.amount,
-      "amount_paid": debt.amount_paid,
-      "balance": debt.balance,
-      "reason": debt.reason,
-      "period": debt.period,
-      "issue_date": str(debt.issue_date),
-      "due_date": str(debt.due_date) if debt.due_date else None,
-      "paid_date": str(debt.paid_date) if debt.paid_date else None,
-      "status": debt.status,
-      "is_overdue": debt.is_overdue,
-      "late_fee": debt.late_fee,
-      "discount": debt.discount,
-      "notes": debt.notes
-    }
-    debt_details.append(debt_detail)
-    total_amount += debt.amount
-    total_balance += debt.balance
+  # Las filas ya traen el nombre del tipo de deuda; el schema de respuesta las serializa
+  total_amount = sum(debt.amount for debt in debts)
+  total_balance = sum(debt.balance for debt in debts)
 
   neighbor_name = f"{neighbor.first_name} {neighbor.second_name} {neighbor.last_name}".strip()
 
@@ -204,11 +185,15 @@ def get_neighbor_active_debts(neighbor_id: int, db: Session = Depends(get_db)):
     "total_debts": len(debts),
     "total_amount": total_amount,
     "total_balance": total_balance,
-    "debt_details": debt_details
+    "debt_details": debts
   }
 
 
-@router.get("/{neighbor_id}/debts/all")
+@router.get(
+  "/{neighbor_id}/debts/all",
+  response_model=schemas.NeighborDebtsResponse,
+  dependencies=[Depends(cache_for("neighbors", "debt_items", "debt_types"))]
+)
 def get_neighbor_all_debts(neighbor_id: int, db: Session = Depends(get_db)):
   """
   Obtiene todas las deudas de un vecino (incluyendo pagadas)
@@ -221,38 +206,9 @@ def get_neighbor_all_debts(neighbor_id: int, db: Session = Depends(get_db)):
   # Obtener todas las deudas
   debts = crud.get_neighbor_all_debts(db, neighbor_id=neighbor_id)
 
-  # Formatear respuesta
-  debt_details = []
-  total_amount = 0
-  total_balance = 0
-
-  for debt in debts:
-    debt_type_name = debt.debt_type.name if debt.debt_type else "Desconocido"
-
-    debt_detail = {
-      "id": debt.id,
-      "neighbor_id": debt.neighbor_id,
-      "debt_type_id": debt.debt_type_id,
-      "debt_type_name": debt_type_name,
-      "meter_reading_id": debt.meter_reading_id,
-      "assistance_id": debt.assistance_id,
-      "amount": debt.amount,
-      "amount_paid": debt.amount_paid,
-      "balance": debt.balance,
-      "reason": debt.reason,
-      "period": debt.period,
-      "issue_date": str(debt.issue_date),
-      "due_date": str(debt.due_date) if debt.due_date else None,
-      "paid_date": str(debt.paid_date) if debt.paid_date else None,
-      "status": debt.status,
-      "is_overdue": debt.is_overdue,
-      "late_fee": debt.late_fee,
-      "discount": debt.discount,
-      "notes": debt.notes
-    }
-    debt_details.append(debt_detail)
-    total_amount += debt.amount
-    total_balance += debt.balance
+  # Las filas ya traen el nombre del tipo de deuda; el schema de respuesta las serializa
+  total_amount = sum(debt.amount for debt in debts)
+  total_balance = sum(debt.balance for debt in debts)
 
   neighbor_name = f"{neighbor.first_name} {neighbor.second_name} {neighbor.last_name}".strip()
 
@@ -262,5 +218,56 @@ def get_neighbor_all_debts(neighbor_id: int, db: Session = Depends(get_db)):
     "total_debts": len(debts),
     "total_amount": total_amount,
     "total_balance": total_balance,
-    "debt_details": debt_details
+    "debt_details": debts
+  }
+
+
+@router.get("/{neighbor_id}/attendance", response_model=schemas.NeighborAttendance)
+def get_neighbor_attendance(
+  neighbor_id: int,
+  date_from: date | None = None,
+  date_to: date | None = None,
+  meet_type: str | None = None,
+  db: Session = Depends(get_db)
+):
+  """
+  Obtiene el resumen y el historial de asistencia de un vecino a reuniones
+  """
+  neighbor = crud.get_neighbor(db, neighbor_id=neighbor_id)
+  if neighbor is None:
+    raise HTTPException(status_code=404, detail="Neighbor not found")
+
+  summary, history = crud.get_neighbor_attendance(
+    db,
+    neighbor_id=neighbor_id,
+    date_from=date_from,
+    date_to=date_to,
+    meet_type=meet_type
+  )
+
+  neighbor_name = f"{neighbor.first_name} {neighbor.second_name or ''} {neighbor.last_name}".strip()
+
+  return {
+    "neighbor_id": neighbor_id,
+    "neighbor_name": neighbor_name,
+    "total_meets": summary.total_meets,
+    "present": summary.present,
+    "absent": summary.absent,
+    "on_time": summary.on_time,
+    "excused": summary.excused,
+    "compliance_rate": summary.compliance_rate,
+    "history": [
+      {
+        "meet_id": item.meet_id,
+        "title": item.title,
+        "meet_type": item.meet_type,
+        "meet_date": str(item.meet_date),
+        "is_mandatory": bool(item.is_mandatory),
+        "is_present": bool(item.is_present),
+        "is_on_time": bool(item.is_on_time),
+        "has_excuse": bool(item.has_excuse),
+        "has_representative": bool(item.has_representative)
+      }
+      for item in history
+    ]
   }
@@ -0,0 +1,85 @@
+# ========== REPORTES FINANCIEROS ==========
+from datetime import date
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+
+from ..models.user import User
+from ..schemas import schema as schemas
+from ..services import reports
+from ..db.database import get_db, get_read_db
+from ..core.settings import settings
+from ..dependencies import get_current_user, require_admin
+
+router = APIRouter(
+  prefix="/reports",
+  tags=['Reports'],
+  responses={404: {"description": "Not found"}}
+)
+
+
+@router.get("/periods", response_model=list[schemas.PeriodReport])
+def read_period_reports(
+  period_from: str = Query(alias="from", pattern=reports.PERIOD_PATTERN),
+  period_to: str = Query(alias="to", pattern=reports.PERIOD_PATTERN),
+  db: Session = Depends(get_read_db)
+):
+  """
+  Reportes de un rango de periodos (ej: ?from=2024-01&to=2025-12): emitido vs.
+  cobrado de agua y multas, y saldo pendiente al cierre de cada mes
+  """
+  if period_from > period_to:
+    raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+  if len(reports.period_range(period_from, period_to)) > settings.REPORT_MAX_PERIODS:
+    raise HTTPException(status_code=400, detail=f"At most {settings.REPORT_MAX_PERIODS} periods per request")
+
+  return reports.get_period_reports(db, period_from, period_to)
+
+
+@router.get("/periods/{period}", response_model=schemas.PeriodReport)
+def read_period_report(
+  period: str = Path(pattern=reports.PERIOD_PATTERN),
+  db: Session = Depends(get_read_db)
+):
+  """
+  Reporte financiero de un periodo (YYYY-MM)
+  """
+  return reports.get_period_reports(db, period, period)[0]
+
+
+@router.post("/periods/{period}/close", response_model=schemas.PeriodClose)
+def close_period(
+  period: str = Path(pattern=reports.PERIOD_PATTERN),
+  current_user: User = Depends(get_current_user),
+  db: Session = Depends(get_db)
+):
+  """
+  Cierra un periodo ya terminado: congela sus totales y bloquea sus deudas
+  """
+  if reports.period_end(period) > date.today():
+    raise HTTPException(status_code=400, detail="Period has not ended yet")
+  if reports.is_closed(db, period):
+    raise HTTPException(status_code=409, detail="Period is already closed")
+
+  try:
+    return reports.close_period(db, period, closed_by=current_user.username)
+  except IntegrityError:
+    # Otro cierre del mismo periodo ganó la carrera
+    db.rollback()
+    raise HTTPException(status_code=409, detail="Period is already closed")
+
+
+@router.post("/periods/{period}/reopen")
+def reopen_period(
+  period: str = Path(pattern=reports.PERIOD_PATTERN),
+  admin: User = Depends(require_admin),
+  db: Session = Depends(get_db)
+):
+  """
+  Reabre un periodo cerrado (solo administradores): elimina sus snapshots y
+  vuelve a permitir cambios en sus deudas
+  """
+  if not reports.reopen_period(db, period):
+    raise HTTPException(status_code=404, detail="Period is not closed")
+  return {"message": "Period reopened successfully", "period": period, "reopened_by": admin.username}
@@ -0,0 +1,33 @@
+# ========== SINCRONIZACIÓN DE APPS DE CAMPO ==========
+from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..models.user import User
+from ..services import sync
+from ..db.database import get_db
+from ..core.settings import settings
+from ..dependencies import get_current_user
+
+router = APIRouter(
+  prefix="/sync",
+  tags=['Sync'],
+  responses={404: {"description": "Not found"}}
+)
+
+
+@router.get("/changes")
+def read_changes(
+  since: str | None = None,
+  limit: int = Query(default=settings.SYNC_PAGE_SIZE, ge=1, le=settings.SYNC_MAX_PAGE_SIZE),
+  current_user: User = Depends(get_current_user),
+  db: Session = Depends(get_db)
+):
+  """
+  Vecinos, medidores, deudas y mediciones que cambiaron o se eliminaron desde el
+  cursor `since` (sin cursor, todos). Se pide la página siguiente con el cursor
+  devuelto mientras has_more sea true; el último cursor se guarda para la próxima vez
+  """
+  try:
+    return sync.get_changes(db, since, limit)
+  except sync.InvalidCursor:
+    raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,6 +1,16 @@
-from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Annotated
+
+from pydantic import BaseModel, PlainSerializer
 from ..enums import UserType
 
+# Fechas leídas de la base: se validan desde el modelo y se serializan con str(),
+# el mismo formato que tenían las respuestas armadas a mano ("2025-01-31 10:00:00")
+DateStr = Annotated[datetime | date | str, PlainSerializer(str, return_type=str)]
+
+# Montos: enteros, o con decimales después de migrate-to-bolivianos
+Amount = int | float
+
 class ItemBase(BaseModel):
   title: str
   # description: str | None = None
@@ -61,8 +71,8 @@ class DebtTypeBase(BaseModel):
 
 class DebtType(DebtTypeBase):
   id: int
-  created_at: str
-  updated_at: str
+  created_at: DateStr
+  updated_at: DateStr
 
   class Config:
     from_attributes = True
@@ -84,31 +94,36 @@ class DebtItemDetail(BaseModel):
   debt_type_name: str  # Nombre del tipo de deuda
   meter_reading_id: int | None = None
   assistance_id: int | None = None
-  amount: int  # Monto total en centavos
-  amount_paid: int  # Monto ya pagado
-  balance: int  # Saldo pendiente
+  amount: Amount  # Monto total
+  amount_paid: Amount  # Monto ya pagado
+  balance: Amount  # Saldo pendiente
   reason: str
   period: str | None = None
-  issue_date: str
-  due_date: str | None = None
-  paid_date: str | None = None
+  issue_date: DateStr
+  due_date: DateStr | None = None
+  paid_date: DateStr | None = None
   status: str
   is_overdue: bool
-  late_fee: int
-  discount: int
+  late_fee: Amount
+  discount: Amount
   notes: str | None = None
 
   class Config:
     from_attributes = True
 
 
+class DebtItem(DebtItemDetail):
+  created_at: DateStr
+  updated_at: DateStr
+
+
 # Schema para respuesta de deudas de un vecino
 class NeighborDebtsResponse(BaseModel):
   neighbor_id: int
   neighbor_name: str
   total_debts: int  # Total de deudas activas
-  total_amount: int  # Monto total adeudado en centavos
-  total_balance: int  # Saldo total pendiente
+  total_amount: Amount  # Monto total adeudado
+  total_balance: Amount  # Saldo total pendiente
   debt_details: list[DebtItemDetail]
 
 
@@ -137,7 +152,7 @@ class MeasureUpdate(BaseModel):
 
 class Measure(BaseModel):
   id: int
-  measure_date: str
+  measure_date: DateStr
   period: str | None = None
   reader_name: str | None = None
   status: str
@@ -145,8 +160,8 @@ class Measure(BaseModel):
   meters_read: int
   meters_pending: int
   notes: str | None = None
-  created_at: str
-  updated_at: str
+  created_at: DateStr
+  updated_at: DateStr
 
   class Config:
     from_attributes = True
@@ -158,12 +173,12 @@ class MeterReading(BaseModel):
   meter_id: int
   measure_id: int
   current_reading: int
-  reading_date: str
+  reading_date: DateStr
   status: str
   has_anomaly: bool
   notes: str | None = None
-  created_at: str
-  updated_at: str
+  created_at: DateStr
+  updated_at: DateStr
 
   # Información del vecino y medidor
   neighbor_first_name: str | None = None
@@ -176,6 +191,24 @@ class MeterReading(BaseModel):
     from_attributes = True
 
 
+# Lectura dentro del listado de una medición, con los datos del vecino
+class MeasureMeterReading(BaseModel):
+  id: int
+  meter_id: int
+  meter_number: str | None = None
+  measure_id: int
+  current_reading: int
+  notes: str | None = None
+  neighbor_first_name: str | None = None
+  neighbor_second_name: str | None = None
+  neighbor_last_name: str | None = None
+  created_at: DateStr
+  updated_at: DateStr
+
+  class Config:
+    from_attributes = True
+
+
 # Schemas para Meet (Reuniones)
 class MeetBase(BaseModel):
   meet_date: str  # DateTime en formato string
@@ -208,13 +241,13 @@ class MeetUpdate(BaseModel):
 
 class Meet(BaseModel):
   id: int
-  meet_date: str
+  meet_date: DateStr
   meet_type: str
   title: str
   description: str | None = None
   location: str | None = None
-  start_time: str | None = None
-  end_time: str | None = None
+  start_time: DateStr | None = None
+  end_time: DateStr | None = None
   status: str
   is_mandatory: bool
   total_neighbors: int
@@ -223,8 +256,8 @@ class Meet(BaseModel):
   total_on_time: int
   organizer: str | None = None
   notes: str | None = None
-  created_at: str
-  updated_at: str
+  created_at: DateStr
+  updated_at: DateStr
 
   class Config:
     from_attributes = True
@@ -253,6 +286,36 @@ class AssistanceUpdate(BaseModel):
   notes: str | None = None
 
 
+# Schemas para registro masivo de asistencia (pase de lista)
+class AssistanceRosterItem(BaseModel):
+  neighbor_id: int
+  is_present: bool = False
+  is_on_time: bool = False
+  has_excuse: bool = False
+  excuse_reason: str | None = None
+  has_representative: bool = False
+  represented_by: str | None = None
+
+
+class AssistanceCheckIn(BaseModel):
+  is_on_time: bool = False
+
+
+class AssistanceBulkUpdate(BaseModel):
+  roster: list[AssistanceRosterItem]
+
+
+class AssistanceBulkResponse(BaseModel):
+  meet_id: int
+  created: list[int]  # neighbor_id de los registros nuevos
+  updated: dict[int, dict]  # neighbor_id -> campos que cambiaron con su nuevo valor
+  unchanged: int
+  total_neighbors: int
+  total_present: int
+  total_absent: int
+  total_on_time: int
+
+
 class Assistance(BaseModel):
   id: int
   meet_id: int
@@ -260,8 +323,8 @@ class Assistance(BaseModel):
   neighbor_name: str | None = None  # Para incluir el nombre del vecino
   is_present: bool
   is_on_time: bool
-  arrival_time: str | None = None
-  departure_time: str | None = None
+  arrival_time: DateStr | None = None
+  departure_time: DateStr | None = None
   excuse_reason: str | None = None
   has_excuse: bool
   represented_by: str | None = None
@@ -272,6 +335,39 @@ class Assistance(BaseModel):
     from_attributes = True
 
 
+# Schemas para cumplimiento de asistencia
+class AttendanceCounts(BaseModel):
+  total_meets: int
+  present: int
+  absent: int
+  on_time: int
+  excused: int  # Ausencias con justificación o representante
+  compliance_rate: float | None = None  # (presentes + justificados) / total, en %
+
+
+class AttendanceHistoryItem(BaseModel):
+  meet_id: int
+  title: str
+  meet_type: str
+  meet_date: DateStr
+  is_mandatory: bool
+  is_present: bool
+  is_on_time: bool
+  has_excuse: bool
+  has_representative: bool
+
+
+class NeighborAttendance(AttendanceCounts):
+  neighbor_id: int
+  neighbor_name: str
+  history: list[AttendanceHistoryItem]
+
+
+class AttendanceCompliance(AttendanceCounts):
+  neighbor_id: int
+  neighbor_name: str
+
+
 # Schemas para CollectDebt (Recaudaciones)
 class CollectDebtBase(BaseModel):
   collect_date: str  # Fecha en formato string
@@ -301,22 +397,56 @@ class CollectDebtUpdate(BaseModel):
 
 class CollectDebt(BaseModel):
   id: int
-  collect_date: str
+  collect_date: DateStr
   period: str | None = None
   collector_name: str | None = None
   location: str | None = None
   status: str
   total_payments: int
-  total_collected: int
+  total_collected: Amount
   total_neighbors_paid: int
-  start_time: str | None = None
-  end_time: str | None = None
+  start_time: DateStr | None = None
+  end_time: DateStr | None = None
   notes: str | None = None
-  created_at: str
-  updated_at: str
+  created_at: DateStr
+  updated_at: DateStr
 
   class Config:
-    from_attributes = True 
+    from_attributes = True
+
+
+# Schemas para reportes financieros por periodo
+class PeriodSection(BaseModel):
+  billed: Amount  # Emitido en el periodo
+  collected: Amount  # Cobrado en el periodo (por fecha de pago)
+  outstanding: Amount  # Saldo pendiente acumulado al cierre del periodo
+
+
+class PeriodDebtTypeLine(PeriodSection):
+  debt_type_id: int | None = None
+  debt_type: str
+  section: str
+
+
+class PeriodReport(BaseModel):
+  period: str
+  closed: bool
+  water: PeriodSection
+  fines: PeriodSection
+  other: PeriodSection
+  total: PeriodSection
+  debt_types: list[PeriodDebtTypeLine]
+
+
+class PeriodClose(BaseModel):
+  id: int
+  period: str
+  closed_by: str | None = None
+  created_at: DateStr
+
+  class Config:
+    from_attributes = True
+
 
 class User(BaseModel):
   name:str
@@ -0,0 +1,74 @@
+"""
+Versión async (AsyncSession) de las consultas de lectura más usadas.
+Se migran aquí primero los endpoints de lectura; las escrituras siguen en crud.
+
+Los listados seleccionan las columnas de la tabla en lugar de la entidad (sin
+identity map ni instancias ORM) y devuelven dicts: pydantic valida un dict varias
+veces más rápido que una fila leída atributo por atributo.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+
+def _as_dicts(result) -> list[dict]:
+    return [row._asdict() for row in result]
+
+
+def _columns(model, fields: tuple[str, ...] | None = None):
+    """
+    Columnas de la tabla, o solo las pedidas con ?fields=
+    """
+    table = model.__table__
+    return [table.c[name] for name in fields] if fields else list(table.columns)
+
+
+async def get_neighbors(db: AsyncSession, skip: int = 0, limit: int = 100):
+    # Orden por id: sin un orden fijo las páginas de offset/limit podrían repetir o saltar filas
+    result = await db.execute(select(models.Neighbor).order_by(models.Neighbor.id).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+# ========== MEDICIONES ==========
+
+async def get_measures(db: AsyncSession, fields: tuple[str, ...] | None = None):
+    """
+    Obtiene todas las mediciones ordenadas por fecha de creación (más recientes primero)
+    """
+    result = await db.execute(select(*_columns(models.Measure, fields)).order_by(models.Measure.created_at.desc()))
+    return _as_dicts(result)
+
+
+async def get_measure(db: AsyncSession, measure_id: int):
+    """
+    Obtiene una medición específica por ID
+    """
+    return await db.get(models.Measure, measure_id)
+
+
+# ========== REUNIONES ==========
+
+async def get_meets(db: AsyncSession, fields: tuple[str, ...] | None = None):
+    """
+    Obtiene todas las reuniones ordenadas por fecha de creación (más recientes primero)
+    """
+    result = await db.execute(select(*_columns(models.Meet, fields)).order_by(models.Meet.created_at.desc()))
+    return _as_dicts(result)
+
+
+async def get_meet(db: AsyncSession, meet_id: int):
+    """
+    Obtiene una reunión específica por ID
+    """
+    return await db.get(models.Meet, meet_id)
+
+
+# ========== RECAUDACIONES ==========
+
+async def get_collect_debts(db: AsyncSession, fields: tuple[str, ...] | None = None):
+    """
+    Obtiene todas las recaudaciones ordenadas por fecha de creación (más recientes primero)
+    """
+    result = await db.execute(select(*_columns(models.CollectDebt, fields)).order_by(models.CollectDebt.created_at.desc()))
+    return _as_dicts(result)
@@ -1,5 +1,17 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from threading import BoundedSemaphore, Lock
+
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.settings import settings
 from app.models.user import User
+from app.services.cache import LRUCache
+from app.services.jwt import invalidate_user_tokens
 from uuid import UUID 
 import bcrypt
 
@@ -11,6 +23,37 @@ def get_user_by_username(db: Session, username:str):
 def get_user_by_id(db:Session, user_id:int | UUID) -> User | None:
   return db.query(User).filter(User.id == user_id).first()
 
+# ---------------- cached user lookup -------------------
+
+# Columnas de usuarios autenticados, por id
+user_cache = LRUCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS, name="users")
+
+def get_cached_user_by_id(db:Session, user_id:int | UUID) -> User | None:
+  """
+  Como get_user_by_id, pero usa la cache; en un hit retorna un User sin sesión
+  """
+  values = user_cache.get(str(user_id))
+  if values is not None:
+    return User(**values)
+
+  user = get_user_by_id(db, user_id=user_id)
+  if user:
+    user_cache.set(
+      str(user_id),
+      {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    )
+  return user
+
+def invalidate_user(user_id:int | UUID) -> None:
+  user_cache.discard(str(user_id))
+  invalidate_user_tokens(user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target:User) -> None:
+  # Cambios de rol o contraseña hechos por el ORM (no cubre query.update() masivos)
+  invalidate_user(target.id)
+
 # ---------------- password methods -------------------
 
 def hash_password(plain_text_password:str) -> str:
@@ -24,20 +67,130 @@ def verify_password(plain_text_password:str, hashed_password:str)->bool:
     hashed_password=hashed_password.encode('utf-8')
   )
 
-def verify_credentials(username:str, password:str, db:Session) -> User | None:
-  
+# ---------------- bcrypt executor -------------------
+
+# bcrypt corre en hilos propios para no ocupar el threadpool de las peticiones
+_bcrypt_executor = ThreadPoolExecutor(
+  max_workers=settings.BCRYPT_MAX_WORKERS,
+  thread_name_prefix="bcrypt"
+)
+_bcrypt_slots = BoundedSemaphore(settings.BCRYPT_MAX_PENDING)
+
+
+class AuthBusyError(Exception):
+  """There are too many password checks in progress"""
+
+
+@cache
+def _dummy_hash() -> str:
+  """
+  Hash fijo (calculado una sola vez) para usuarios inexistentes,
+  así el tiempo de respuesta es igual al de una contraseña incorrecta
+  """
+  return bcrypt.hashpw(b"dummy", bcrypt.gensalt()).decode("utf-8")
+
+
+def _verify_password_or_dummy(plain_text_password:str, hashed_password:str | None) -> bool:
+  return verify_password(plain_text_password, hashed_password or _dummy_hash())
+
+
+def _find_user(db:Session, username:str) -> User | None:
   user = get_user_by_username(db, username)
+  if user:
+    db.expunge(user)
+  # Libera la conexión del pool mientras bcrypt verifica la contraseña
+  db.rollback()
+  return user
+
+
+async def check_password(plain_text_password:str, hashed_password:str | None) -> bool:
+  if not _bcrypt_slots.acquire(blocking=False):
+    raise AuthBusyError()
+  try:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+      _bcrypt_executor,
+      _verify_password_or_dummy,
+      plain_text_password,
+      hashed_password
+    )
+  finally:
+    _bcrypt_slots.release()
+
+
+async def verify_credentials(username:str, password:str, db:Session) -> User | None:
+  
+  user = await run_in_threadpool(_find_user, db, username)
   if not user:
     #Simulation to avoid timing attacks
-    bcrypt.checkpw(b"dummy", bcrypt.hashpw(b"dummy", bcrypt.gensalt()))
+    await check_password(password, None)
     return None
   
   # If there is an error with incorrect password have to be an custom message
-  if not verify_password(plain_text_password=password, hashed_password=user.password_hash):
+  if not await check_password(password, user.password_hash):
     return None
   
   # TODO: for inactive users have to be an espcific error
   # if not user.is_active:
   #   return None
   
-  return user
\ No newline at end of file
+  return user
+
+# ---------------- login throttling -------------------
+
+class LoginThrottle:
+  """
+  Cuenta intentos fallidos por clave (ip o usuario) en una ventana deslizante.
+  Con max_attempts <= 0 no limita nada.
+  """
+
+  def __init__(self, max_attempts:int, window_seconds:int, max_keys:int = 10_000):
+    self.max_attempts = max_attempts
+    self.window_seconds = window_seconds
+    self.max_keys = max_keys
+    self._failures: dict[str, deque[float]] = {}
+    self._lock = Lock()
+
+  def _prune(self, key:str, now:float) -> deque[float] | None:
+    attempts = self._failures.get(key)
+    if attempts is None:
+      return None
+    while attempts and attempts[0] <= now - self.window_seconds:
+      attempts.popleft()
+    if not attempts:
+      del self._failures[key]
+      return None
+    return attempts
+
+  def retry_after(self, key:str) -> int:
+    """Segundos que faltan para desbloquear la clave, 0 si no está bloqueada"""
+    now = time.monotonic()
+    with self._lock:
+      attempts = self._prune(key, now)
+      if self.max_attempts <= 0 or attempts is None or len(attempts) < self.max_attempts:
+        return 0
+      return max(1, int(attempts[0] + self.window_seconds - now) + 1)
+
+  def register_failure(self, key:str) -> None:
+    if self.max_attempts <= 0:
+      return
+    now = time.monotonic()
+    with self._lock:
+      if key not in self._failures and len(self._failures) >= self.max_keys:
+        for stale in list(self._failures):
+          self._prune(stale, now)
+      self._failures.setdefault(key, deque()).append(now)
+
+  def reset(self, key:str) -> None:
+    with self._lock:
+      self._failures.pop(key, None)
+
+
+username_throttle = LoginThrottle(
+  max_attempts=settings.LOGIN_MAX_ATTEMPTS_PER_USERNAME,
+  window_seconds=settings.LOGIN_THROTTLE_WINDOW_SECONDS
+)
+ip_throttle = LoginThrottle(
+  max_attempts=settings.LOGIN_MAX_ATTEMPTS_PER_IP,
+  window_seconds=settings.LOGIN_THROTTLE_WINDOW_SECONDS
+)
@@ -0,0 +1,101 @@
+import time
+from collections import OrderedDict, defaultdict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+# Contadores de versión por tabla: se incrementan al confirmar una transacción que las escribió (db/database.py)
+_table_versions: defaultdict[str, int] = defaultdict(int)
+_versions_lock = Lock()
+# Funciones que además propagan los incrementos (ej: a un Redis compartido)
+_bump_hooks: list[Callable[[tuple[str, ...]], None]] = []
+
+
+def bump_tables(*tables: str) -> None:
+  """
+  Invalida las entradas que dependen de estas tablas
+  """
+  with _versions_lock:
+    for table in tables:
+      _table_versions[table] += 1
+  for hook in _bump_hooks:
+    hook(tables)
+
+
+def on_bump(hook: Callable[[tuple[str, ...]], None]) -> None:
+  _bump_hooks.append(hook)
+
+
+def tables_version(*tables: str) -> tuple[int, ...]:
+  return tuple(_table_versions[table] for table in tables)
+
+
+_MISSING = object()
+
+# Caches con nombre, para exponer sus estadísticas en /metrics
+caches: dict[str, "LRUCache"] = {}
+
+
+class LRUCache:
+  """
+  Cache en memoria acotada, descarta la entrada usada hace más tiempo.
+  Con ttl (segundos) las entradas además vencen; cada set puede usar su propio ttl.
+  Con name queda registrada en caches.
+  """
+
+  def __init__(self, maxsize: int = 128, ttl: float | None = None, name: str | None = None):
+    if name is not None:
+      caches[name] = self
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+    self._lock = Lock()
+
+  def get(self, key: Hashable, default: Any = None) -> Any:
+    with self._lock:
+      expires_at, value = self._data.get(key, (None, _MISSING))
+      if value is not _MISSING and expires_at is not None and expires_at <= time.monotonic():
+        del self._data[key]
+        value = _MISSING
+      if value is _MISSING:
+        self.misses += 1
+        return default
+      self.hits += 1
+      self._data.move_to_end(key)
+      return value
+
+  def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+    ttl = self.ttl if ttl is None else ttl
+    expires_at = time.monotonic() + ttl if ttl is not None else None
+    with self._lock:
+      self._data[key] = (expires_at, value)
+      self._data.move_to_end(key)
+      while len(self._data) > self.maxsize:
+        self._data.popitem(last=False)
+
+  def discard(self, key: Hashable) -> None:
+    with self._lock:
+      self._data.pop(key, None)
+
+  def discard_where(self, predicate: Callable[[Any], bool]) -> None:
+    with self._lock:
+      for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+        del self._data[key]
+
+  def clear(self) -> None:
+    with self._lock:
+      self._data.clear()
+
+  def stats(self) -> dict[str, Any]:
+    total = self.hits + self.misses
+    return {
+      "size": len(self._data),
+      "maxsize": self.maxsize,
+      "hits": self.hits,
+      "misses": self.misses,
+      "hit_ratio": round(self.hits / total, 4) if total else None,
+    }
+
+  def __len__(self) -> int:
+    return len(self._data)
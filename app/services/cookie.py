@@ -1,7 +1,14 @@
+import hashlib
+import hmac
+import math
+import time
+
 from fastapi import Response
 from app.core.settings import settings
 
 COOKIE_NAME = "access_token"
+# Hasta cuándo el cliente lee del primario después de escribir (firmada, la ven todos los workers)
+READ_PRIMARY_COOKIE = "read_primary_until"
 
 def set_auth_cookie(response: Response, token: str) -> None:
   response.set_cookie(
@@ -21,4 +28,27 @@ def delete_auth_cookie(response: Response) -> None:
     secure=settings.cookie_secure,     # same
     samesite=settings.cookie_samesite, # same
     path="/",                          # same
-  )
\ No newline at end of file
+  )
+
+def _sign(value: str) -> str:
+  return hmac.new(settings.SECRET_KEY.encode("utf-8"), value.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+def read_primary_cookie(until: float) -> str:
+  """
+  Header Set-Cookie con el vencimiento de la ventana de lectura desde el primario
+  """
+  value = str(int(until))
+  cookie = (
+    f"{READ_PRIMARY_COOKIE}={value}.{_sign(value)}; Max-Age={math.ceil(until - time.time())}; "
+    f"Path=/; HttpOnly; SameSite={settings.cookie_samesite}"
+  )
+  return cookie + "; Secure" if settings.cookie_secure else cookie
+
+def reads_primary(cookies: dict[str, str]) -> bool:
+  """
+  Si la cookie de lectura desde el primario es válida y no venció
+  """
+  value, _, signature = cookies.get(READ_PRIMARY_COOKIE, "").partition(".")
+  if not value.isdigit() or not hmac.compare_digest(signature, _sign(value)):
+    return False
+  return int(value) > time.time()
@@ -1,3 +1,6 @@
+from sqlalchemy import and_, case, false, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from .. import models
@@ -8,6 +11,14 @@ def get_neighbor(db: Session, neighbor_id: int):
     return db.query(models.Neighbor).filter(models.Neighbor.id == neighbor_id).first()
 
 
+def get_unknown_neighbor_ids(db: Session, neighbor_ids: list[int]) -> list[int]:
+    """
+    Ids de la lista que no corresponden a ningún vecino, con una sola consulta
+    """
+    known = set(db.scalars(select(models.Neighbor.id).where(models.Neighbor.id.in_(set(neighbor_ids)))))
+    return sorted(set(neighbor_ids) - known)
+
+
 def get_neighbor_by_email(db: Session, email: str):
     return db.query(models.Neighbor).filter(models.Neighbor.email == email).first()
 
@@ -15,11 +26,6 @@ def get_user_by_username(db: Session, username:str):
     return db.query(models.User).filter(models.User.username==username).first()
 
 
-def get_neighbors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Neighbor).all()
-        #.offset(skip).limit(limit)
-
-
 def create_neighbor(db: Session, neighbor: schemas.NeighborCreate):
     db_neighbor = models.Neighbor(
         first_name=neighbor.first_name,
@@ -82,27 +88,42 @@ def delete_neighbor(db: Session, neighbor_id: int):
 
 # ========== DEUDAS ==========
 
+def _debt_item_rows(*filters):
+    """
+    Deudas con el nombre de su tipo en una sola consulta (filas, no entidades)
+    """
+    return (
+        select(
+            *models.DebtItem.__table__.columns,
+            func.coalesce(models.DebtType.name, "Desconocido").label("debt_type_name")
+        )
+        .outerjoin(models.DebtType, models.DebtItem.debt_type_id == models.DebtType.id)
+        .where(*filters)
+    )
+
+
 def get_neighbor_active_debts(db: Session, neighbor_id: int):
     """
     Obtiene todas las deudas activas (pending, partial, overdue) de un vecino
     """
-    debts = db.query(models.DebtItem).filter(
+    return db.execute(_debt_item_rows(
         models.DebtItem.neighbor_id == neighbor_id,
         models.DebtItem.status.in_(["pending", "partial", "overdue"])
-    ).all()
-
-    return debts
+    )).all()
 
 
 def get_neighbor_all_debts(db: Session, neighbor_id: int):
     """
     Obtiene todas las deudas de un vecino (incluyendo pagadas)
     """
-    debts = db.query(models.DebtItem).filter(
-        models.DebtItem.neighbor_id == neighbor_id
-    ).all()
+    return db.execute(_debt_item_rows(models.DebtItem.neighbor_id == neighbor_id)).all()
+
 
-    return debts
+def get_debt_item_detail(db: Session, debt_id: int):
+    """
+    Obtiene una deuda con el nombre de su tipo, para la respuesta de detalle
+    """
+    return db.execute(_debt_item_rows(models.DebtItem.id == debt_id)).first()
 
 
 def get_debt_item(db: Session, debt_id: int):
@@ -114,18 +135,40 @@ def get_debt_item(db: Session, debt_id: int):
 
 # ========== MEDICIONES ==========
 
-def get_measures(db: Session):
+def get_measure(db: Session, measure_id: int):
     """
-    Obtiene todas las mediciones ordenadas por fecha de creación (más recientes primero)
+    Obtiene una medición específica por ID
     """
-    return db.query(models.Measure).order_by(models.Measure.created_at.desc()).all()
+    return db.query(models.Measure).filter(models.Measure.id == measure_id).first()
 
 
-def get_measure(db: Session, measure_id: int):
+def get_measure_meter_readings(db: Session, measure_id: int, fields: tuple[str, ...] | None = None):
     """
-    Obtiene una medición específica por ID
+    Lecturas de una medición con el medidor y el vecino, en una sola consulta
+    (ordenadas por apellido y nombre del vecino). Con fields solo esas columnas.
     """
-    return db.query(models.Measure).filter(models.Measure.id == measure_id).first()
+    columns = (
+        models.MeterReading.id,
+        models.MeterReading.meter_id,
+        models.NeighborMeter.meter_code.label("meter_number"),
+        models.MeterReading.measure_id,
+        models.MeterReading.current_reading,
+        models.MeterReading.notes,
+        models.Neighbor.first_name.label("neighbor_first_name"),
+        models.Neighbor.second_name.label("neighbor_second_name"),
+        models.Neighbor.last_name.label("neighbor_last_name"),
+        models.MeterReading.created_at,
+        models.MeterReading.updated_at,
+    )
+    if fields:
+        columns = [column for column in columns if column.key in fields]
+    return db.execute(
+        select(*columns)
+        .join(models.NeighborMeter, models.MeterReading.meter_id == models.NeighborMeter.id)
+        .join(models.Neighbor, models.NeighborMeter.neighbor_id == models.Neighbor.id)
+        .where(models.MeterReading.measure_id == measure_id)
+        .order_by(models.Neighbor.last_name, models.Neighbor.first_name)
+    ).all()
 
 
 def create_measure(db: Session, measure: schemas.MeasureCreate):
@@ -187,13 +230,6 @@ def delete_measure(db: Session, measure_id: int):
 
 # ========== REUNIONES ==========
 
-def get_meets(db: Session):
-    """
-    Obtiene todas las reuniones ordenadas por fecha de creación (más recientes primero)
-    """
-    return db.query(models.Meet).order_by(models.Meet.created_at.desc()).all()
-
-
 def get_meet(db: Session, meet_id: int):
     """
     Obtiene una reunión específica por ID
@@ -285,12 +321,18 @@ def create_assistance(db: Session, assistance: schemas.AssistanceCreate):
         is_on_time=assistance.is_on_time
     )
     db.add(db_assistance)
-    db.commit()
-    db.refresh(db_assistance)
 
-    # Actualizar estadísticas de la reunión
-    update_meet_statistics(db, assistance.meet_id)
+    # Actualizar estadísticas de la reunión en la misma transacción
+    apply_meet_statistics_delta(
+        db,
+        assistance.meet_id,
+        neighbors=1,
+        present=int(bool(assistance.is_present)),
+        on_time=int(bool(assistance.is_on_time))
+    )
 
+    db.commit()
+    db.refresh(db_assistance)
     return db_assistance
 
 
@@ -309,52 +351,518 @@ def update_assistance(db: Session, assistance_id: int, assistance: schemas.Assis
         if "departure_time" in update_data and update_data["departure_time"]:
             update_data["departure_time"] = datetime.strptime(update_data["departure_time"], "%Y-%m-%dT%H:%M")
 
+        was_present = bool(db_assistance.is_present)
+        was_on_time = bool(db_assistance.is_on_time)
+
         for key, value in update_data.items():
             setattr(db_assistance, key, value)
+
+        # Actualizar estadísticas de la reunión con la diferencia
+        apply_meet_statistics_delta(
+            db,
+            db_assistance.meet_id,
+            present=int(bool(db_assistance.is_present)) - int(was_present),
+            on_time=int(bool(db_assistance.is_on_time)) - int(was_on_time)
+        )
+
         db.commit()
         db.refresh(db_assistance)
 
-        # Actualizar estadísticas de la reunión
-        update_meet_statistics(db, db_assistance.meet_id)
-
     return db_assistance
 
 
+def apply_meet_statistics_delta(db: Session, meet_id: int, neighbors: int = 0, present: int = 0, on_time: int = 0):
+    """
+    Aplica incrementos atómicos a los contadores de asistencia de una reunión
+    (sin recontar las asistencias). No hace commit.
+    """
+    absent = neighbors - present
+    if not (neighbors or present or absent or on_time):
+        return
+
+    db.execute(
+        update(models.Meet)
+        .where(models.Meet.id == meet_id)
+        .values(
+            total_neighbors=models.Meet.total_neighbors + neighbors,
+            total_present=models.Meet.total_present + present,
+            total_absent=models.Meet.total_absent + absent,
+            total_on_time=models.Meet.total_on_time + on_time
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _meet_statistics_columns():
+    """
+    Columnas de agregación condicional para las estadísticas de asistencia
+    """
+    total_neighbors = func.count(models.Assistance.id)
+    total_present = func.count(case((models.Assistance.is_present.is_(True), 1)))
+    return (
+        total_neighbors.label("total_neighbors"),
+        total_present.label("total_present"),
+        (total_neighbors - total_present).label("total_absent"),
+        func.count(case((models.Assistance.is_on_time.is_(True), 1))).label("total_on_time"),
+    )
+
+
+def get_meet_statistics(db: Session, meet_id: int) -> dict[str, int]:
+    """
+    Cuenta las asistencias de una reunión sin tocar sus contadores guardados
+    """
+    return db.execute(
+        select(*_meet_statistics_columns()).where(models.Assistance.meet_id == meet_id)
+    ).one()._asdict()
+
+
 def update_meet_statistics(db: Session, meet_id: int):
     """
     Actualiza las estadísticas de asistencia de una reunión
     """
     meet = db.query(models.Meet).filter(models.Meet.id == meet_id).first()
     if meet:
-        # Obtener todas las asistencias de esta reunión
-        assistances = db.query(models.Assistance).filter(models.Assistance.meet_id == meet_id).all()
+        _refresh_meet_statistics(db, meet)
+        db.commit()
+        db.refresh(meet)
+    return meet
+
+
+def _refresh_meet_statistics(db: Session, meet: models.Meet):
+    """
+    Recalcula las estadísticas de una reunión con una sola consulta de agregación.
+    No hace commit.
+    """
+    stats = db.execute(
+        select(*_meet_statistics_columns()).where(models.Assistance.meet_id == meet.id)
+    ).one()
 
-        # Calcular estadísticas
-        total_neighbors = len(assistances)
-        total_present = sum(1 for a in assistances if a.is_present)
-        total_absent = sum(1 for a in assistances if not a.is_present)
-        total_on_time = sum(1 for a in assistances if a.is_on_time)
+    meet.total_neighbors = stats.total_neighbors
+    meet.total_present = stats.total_present
+    meet.total_absent = stats.total_absent
+    meet.total_on_time = stats.total_on_time
 
-        # Actualizar el registro de la reunión
-        meet.total_neighbors = total_neighbors
-        meet.total_present = total_present
-        meet.total_absent = total_absent
-        meet.total_on_time = total_on_time
 
+def recalculate_all_meet_statistics(db: Session) -> int:
+    """
+    Recalcula las estadísticas de todas las reuniones con un UPDATE ... FROM agrupado.
+    Retorna la cantidad de reuniones.
+    """
+    stats = (
+        select(models.Assistance.meet_id, *_meet_statistics_columns())
+        .group_by(models.Assistance.meet_id)
+        .subquery()
+    )
+
+    db.execute(
+        update(models.Meet)
+        .where(models.Meet.id == stats.c.meet_id)
+        .values(
+            total_neighbors=stats.c.total_neighbors,
+            total_present=stats.c.total_present,
+            total_absent=stats.c.total_absent,
+            total_on_time=stats.c.total_on_time
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    # Reuniones sin asistencias registradas
+    has_assistances = select(models.Assistance.id).where(models.Assistance.meet_id == models.Meet.id).exists()
+    db.execute(
+        update(models.Meet)
+        .where(~has_assistances)
+        .values(total_neighbors=0, total_present=0, total_absent=0, total_on_time=0)
+        .execution_options(synchronize_session=False)
+    )
+
+    db.commit()
+    return db.query(func.count(models.Meet.id)).scalar()
+
+
+ROSTER_FIELDS = (
+    "is_present",
+    "is_on_time",
+    "has_excuse",
+    "excuse_reason",
+    "has_representative",
+    "represented_by",
+)
+
+
+def _dialect_insert(db: Session):
+    """
+    Retorna el insert del dialecto actual (soporta ON CONFLICT en PostgreSQL y SQLite)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql_insert
+    return sqlite_insert
+
+
+def bulk_upsert_assistances(db: Session, meet: models.Meet, roster: list[schemas.AssistanceRosterItem]):
+    """
+    Registra el pase de lista completo de una reunión en una sola transacción.
+    Hace upsert sobre (meet_id, neighbor_id) con una sentencia multi-fila,
+    recalcula las estadísticas una vez y retorna la diferencia aplicada.
+    """
+    from datetime import datetime
+
+    # Un neighbor_id por fila: el router rechaza los repetidos (un INSERT multi-fila
+    # con ON CONFLICT no puede actualizar la misma fila dos veces)
+    desired = {item.neighbor_id: item.model_dump(include=set(ROSTER_FIELDS)) for item in roster}
+
+    existing = {
+        row.neighbor_id: row._asdict()
+        for row in db.execute(
+            select(
+                models.Assistance.neighbor_id,
+                *(getattr(models.Assistance, field) for field in ROSTER_FIELDS)
+            ).where(models.Assistance.meet_id == meet.id)
+        )
+    }
+
+    created = []
+    updated = {}
+    rows = []
+    for neighbor_id, values in desired.items():
+        current = existing.get(neighbor_id)
+        if current is None:
+            created.append(neighbor_id)
+        else:
+            changes = {field: value for field, value in values.items() if current[field] != value}
+            if not changes:
+                continue
+            updated[neighbor_id] = changes
+        rows.append({"meet_id": meet.id, "neighbor_id": neighbor_id, **values})
+
+    if rows:
+        insert = _dialect_insert(db)
+        stmt = insert(models.Assistance).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Assistance.meet_id, models.Assistance.neighbor_id],
+            set_={
+                **{field: getattr(stmt.excluded, field) for field in ROSTER_FIELDS},
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        db.execute(stmt)
+        _refresh_meet_statistics(db, meet)
+
+    db.commit()
+    db.refresh(meet)
+
+    return {
+        "meet_id": meet.id,
+        "created": created,
+        "updated": updated,
+        "unchanged": len(desired) - len(rows),
+        "total_neighbors": meet.total_neighbors,
+        "total_present": meet.total_present,
+        "total_absent": meet.total_absent,
+        "total_on_time": meet.total_on_time,
+    }
+
+
+def start_meet(db: Session, meet: models.Meet) -> int:
+    """
+    Inicia una reunión (in_progress) y crea con un solo INSERT ... SELECT un registro
+    de asistencia ausente por defecto para cada vecino activo que aún no lo tenga.
+    Es idempotente. Retorna la cantidad de registros creados.
+    """
+    from datetime import datetime
+
+    now = datetime.utcnow()
+    roster = select(
+        literal(meet.id),
+        models.Neighbor.id,
+        false(),
+        false(),
+        false(),
+        false(),
+        literal(now),
+        literal(now),
+    ).where(models.Neighbor.is_active.is_(True))
+
+    insert = _dialect_insert(db)
+    stmt = insert(models.Assistance).from_select(
+        [
+            "meet_id",
+            "neighbor_id",
+            "is_present",
+            "is_on_time",
+            "has_excuse",
+            "has_representative",
+            "created_at",
+            "updated_at",
+        ],
+        roster
+    ).on_conflict_do_nothing(
+        index_elements=[models.Assistance.meet_id, models.Assistance.neighbor_id]
+    )
+    seeded = db.execute(stmt).rowcount
+
+    if meet.status != "in_progress":
+        meet.status = "in_progress"
+    if meet.start_time is None:
+        meet.start_time = now
+
+    if seeded:
+        _refresh_meet_statistics(db, meet)
+
+    db.commit()
+    db.refresh(meet)
+    return seeded
+
+
+def mark_assistance_present(db: Session, meet_id: int, neighbor_id: int, is_on_time: bool = False) -> bool:
+    """
+    Marca como presente a un vecino con una sola sentencia UPDATE, sin tocar los
+    contadores de la reunión. No hace commit. Retorna True si cambió el registro.
+    """
+    from datetime import datetime
+
+    result = db.execute(
+        update(models.Assistance)
+        .where(
+            models.Assistance.meet_id == meet_id,
+            models.Assistance.neighbor_id == neighbor_id,
+            models.Assistance.is_present.isnot(True)
+        )
+        .values(is_present=True, is_on_time=is_on_time, arrival_time=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return bool(result.rowcount)
+
+
+def check_in_assistance(db: Session, meet_id: int, neighbor_id: int, is_on_time: bool = False):
+    """
+    Marca la llegada de un vecino y ajusta los contadores de la reunión.
+    Retorna None si no tiene registro de asistencia.
+    """
+    if mark_assistance_present(db, meet_id, neighbor_id, is_on_time):
+        apply_meet_statistics_delta(db, meet_id, present=1, on_time=int(is_on_time))
         db.commit()
-        db.refresh(meet)
-    return meet
 
+    return db.query(models.Assistance).filter(
+        models.Assistance.meet_id == meet_id,
+        models.Assistance.neighbor_id == neighbor_id
+    ).first()
+
+
+ABSENCE_FINE_DEBT_TYPE = "Multa por Inasistencia"
 
-# ========== RECAUDACIONES ==========
 
-def get_collect_debts(db: Session):
+def get_or_create_debt_type(db: Session, name: str, description: str | None = None):
     """
-    Obtiene todas las recaudaciones ordenadas por fecha de creación (más recientes primero)
+    Obtiene un tipo de deuda por nombre o lo crea si no existe, dentro de la
+    transacción en curso (no la confirma). Si otra transacción lo crea a la vez,
+    el ON CONFLICT deja el suyo
     """
-    return db.query(models.CollectDebt).order_by(models.CollectDebt.created_at.desc()).all()
+    debt_type = db.query(models.DebtType).filter(models.DebtType.name == name).first()
+    if not debt_type:
+        insert = _dialect_insert(db)
+        db.execute(
+            insert(models.DebtType)
+            .values(name=name, description=description)
+            .on_conflict_do_nothing(index_elements=[models.DebtType.name])
+        )
+        debt_type = db.query(models.DebtType).filter(models.DebtType.name == name).one()
+    return debt_type
 
 
+def generate_absence_fines(db: Session, meet: models.Meet, amount: int, dry_run: bool = False):
+    """
+    Genera las multas por inasistencia de una reunión con un solo INSERT ... SELECT.
+    Incluye a los ausentes sin justificación ni representante que aún no tengan multa,
+    por lo que es idempotente; el índice único sobre debt_items.assistance_id y el
+    ON CONFLICT DO NOTHING lo mantienen con llamadas concurrentes.
+    Con dry_run solo calcula los totales.
+    """
+    from datetime import date, datetime
+
+    fined = select(models.DebtItem.id).where(
+        models.DebtItem.assistance_id == models.Assistance.id
+    ).exists()
+
+    absentees = (
+        models.Assistance.meet_id == meet.id,
+        models.Assistance.is_present.isnot(True),
+        models.Assistance.has_excuse.isnot(True),
+        models.Assistance.has_representative.isnot(True),
+    )
+
+    existing, pending = db.execute(
+        select(
+            func.count(case((fined, 1))),
+            func.count(case((~fined, 1)))
+        ).where(*absentees)
+    ).one()
+
+    fines_created = pending
+    if not dry_run and pending:
+        debt_type = get_or_create_debt_type(
+            db,
+            name=ABSENCE_FINE_DEBT_TYPE,
+            description="Multa por inasistencia a reuniones obligatorias"
+        )
+        now = datetime.utcnow()
+        reason = f"Inasistencia a reunión - {meet.title}"[:200]
+
+        candidates = select(
+            models.Assistance.neighbor_id,
+            literal(debt_type.id),
+            models.Assistance.id,
+            literal(amount),
+            literal(0),
+            literal(amount),
+            literal(reason),
+            literal(meet.meet_date.strftime("%Y-%m")),
+            literal(date.today()),
+            literal("pending"),
+            false(),
+            literal(0),
+            literal(0),
+            literal(now),
+            literal(now),
+        ).where(*absentees, ~fined)
+
+        insert = _dialect_insert(db)
+        fines_created = db.execute(
+            insert(models.DebtItem).from_select(
+                [
+                    "neighbor_id",
+                    "debt_type_id",
+                    "assistance_id",
+                    "amount",
+                    "amount_paid",
+                    "balance",
+                    "reason",
+                    "period",
+                    "issue_date",
+                    "status",
+                    "is_overdue",
+                    "late_fee",
+                    "discount",
+                    "created_at",
+                    "updated_at",
+                ],
+                candidates
+            ).on_conflict_do_nothing(
+                index_elements=[models.DebtItem.assistance_id],
+                index_where=models.DebtItem.assistance_id.isnot(None)
+            )
+        ).rowcount
+        db.commit()
+
+    return {
+        "meet_id": meet.id,
+        "dry_run": dry_run,
+        "fine_amount": amount,
+        "fines_created": fines_created,
+        "fines_skipped": existing,
+        "total_amount": fines_created * amount,
+    }
+
+
+# ========== CUMPLIMIENTO DE ASISTENCIA ==========
+
+def _attendance_columns():
+    """
+    Conteos de asistencia agrupables por vecino
+    """
+    present = models.Assistance.is_present.is_(True)
+    excused = and_(
+        models.Assistance.is_present.isnot(True),
+        or_(models.Assistance.has_excuse.is_(True), models.Assistance.has_representative.is_(True))
+    )
+    total = func.count(models.Assistance.id)
+    total_present = func.count(case((present, 1)))
+    total_excused = func.count(case((excused, 1)))
+    return (
+        total.label("total_meets"),
+        total_present.label("present"),
+        (total - total_present).label("absent"),
+        func.count(case((models.Assistance.is_on_time.is_(True), 1))).label("on_time"),
+        total_excused.label("excused"),
+        # NULLIF: sin reuniones no hay tasa (y Postgres no permite dividir por cero)
+        ((total_present + total_excused) * 100.0 / func.nullif(total, 0)).label("compliance_rate"),
+    )
+
+
+def _attendance_filters(date_from=None, date_to=None, meet_type: str | None = None):
+    from datetime import timedelta
+
+    filters = [models.Meet.status != "cancelled"]
+    if date_from:
+        filters.append(models.Meet.meet_date >= date_from)
+    if date_to:
+        filters.append(models.Meet.meet_date < date_to + timedelta(days=1))
+    if meet_type:
+        filters.append(models.Meet.meet_type == meet_type)
+    return filters
+
+
+def get_neighbor_attendance(db: Session, neighbor_id: int, date_from=None, date_to=None, meet_type: str | None = None):
+    """
+    Obtiene el resumen y el historial de asistencia de un vecino
+    """
+    filters = _attendance_filters(date_from, date_to, meet_type)
+
+    summary = db.execute(
+        select(*_attendance_columns())
+        .join(models.Meet, models.Assistance.meet_id == models.Meet.id)
+        .where(models.Assistance.neighbor_id == neighbor_id, *filters)
+    ).one()
+
+    history = db.execute(
+        select(
+            models.Meet.id.label("meet_id"),
+            models.Meet.title,
+            models.Meet.meet_type,
+            models.Meet.meet_date,
+            models.Meet.is_mandatory,
+            models.Assistance.is_present,
+            models.Assistance.is_on_time,
+            models.Assistance.has_excuse,
+            models.Assistance.has_representative,
+        )
+        .join(models.Meet, models.Assistance.meet_id == models.Meet.id)
+        .where(models.Assistance.neighbor_id == neighbor_id, *filters)
+        .order_by(models.Meet.meet_date.desc())
+    ).all()
+
+    return summary, history
+
+
+def get_attendance_compliance(db: Session, date_from=None, date_to=None, meet_type: str | None = None):
+    """
+    Ranking de cumplimiento de asistencia de todos los vecinos en una sola consulta agrupada
+    """
+    columns = _attendance_columns()
+    compliance_rate = columns[-1]
+    rows = db.execute(
+        select(
+            models.Neighbor.id.label("neighbor_id"),
+            models.Neighbor.first_name,
+            models.Neighbor.second_name,
+            models.Neighbor.last_name,
+            *columns
+        )
+        .join(models.Assistance, models.Assistance.neighbor_id == models.Neighbor.id)
+        .join(models.Meet, models.Assistance.meet_id == models.Meet.id)
+        .where(*_attendance_filters(date_from, date_to, meet_type))
+        .group_by(
+            models.Neighbor.id,
+            models.Neighbor.first_name,
+            models.Neighbor.second_name,
+            models.Neighbor.last_name
+        )
+        .order_by(compliance_rate.desc(), models.Neighbor.last_name, models.Neighbor.first_name)
+    ).all()
+    return rows
+
+
+# ========== RECAUDACIONES ==========
+
 def get_collect_debt(db: Session, collect_debt_id: int):
     """
     Obtiene una recaudación específica por ID
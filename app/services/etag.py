@@ -0,0 +1,53 @@
+from hashlib import blake2b
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _marker_columns(model):
+  """
+  Columnas baratas que cambian cuando la tabla cambia:
+  cantidad de filas, id máximo y última modificación
+  """
+  table = model.__table__
+  changed = table.c.updated_at if "updated_at" in table.c else table.c.created_at
+  return [
+    select(func.count()).select_from(table).scalar_subquery(),
+    select(func.max(table.c.id)).scalar_subquery(),
+    select(func.max(changed)).scalar_subquery(),
+  ]
+
+
+async def table_markers(db: AsyncSession, *models) -> tuple:
+  """
+  Obtiene los marcadores de cambio de varias tablas en una sola consulta
+  """
+  columns = []
+  for model in models:
+    columns.extend(_marker_columns(model))
+  return tuple((await db.execute(select(*columns))).one())
+
+
+async def compute_etag(db: AsyncSession, models, key: str = "") -> str:
+  """
+  Calcula un ETag débil a partir de los marcadores de las tablas y la clave del recurso
+  (ruta + parámetros), sin cargar ninguna fila
+  """
+  markers = await table_markers(db, *models)
+  digest = blake2b(f"{key}|{markers}".encode("utf-8"), digest_size=12).hexdigest()
+  return f'W/"{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+  """
+  Compara el ETag contra el header If-None-Match (comparación débil)
+  """
+  if not if_none_match:
+    return False
+  if if_none_match.strip() == "*":
+    return True
+  opaque = etag.removeprefix("W/")
+  for candidate in if_none_match.split(","):
+    if candidate.strip().removeprefix("W/") == opaque:
+      return True
+  return False
@@ -1,8 +1,14 @@
 from datetime import datetime, timedelta, timezone
+from hashlib import sha256
 from typing import Any
+import time
 import jwt
 
 from app.core.settings import settings
+from app.services.cache import LRUCache
+
+# Payloads de tokens ya verificados, por digest del token, hasta su "exp"
+token_cache = LRUCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, name="tokens")
 
 
 def create_access_token(payload: dict[str, Any]) -> str:
@@ -34,4 +40,26 @@ def decode_token(token:str) -> dict[str, Any] | None:
   except jwt.ExpiredSignatureError:
     return None
   except jwt.InvalidTokenError:
-    return None
\ No newline at end of file
+    return None
+
+
+def decode_token_cached(token:str) -> dict[str, Any] | None:
+  """
+  Igual que decode_token, pero reutiliza el payload de un token ya verificado
+  hasta que vence
+  """
+  key = sha256(token.encode("utf-8")).digest()
+  payload = token_cache.get(key)
+  if payload is not None:
+    return payload
+
+  payload = decode_token(token)
+  if payload:
+    ttl = payload["exp"] - time.time()
+    if ttl > 0:
+      token_cache.set(key, payload, ttl=ttl)
+  return payload
+
+
+def invalidate_user_tokens(user_id:int) -> None:
+  token_cache.discard_where(lambda payload: str(payload.get("sub")) == str(user_id))
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+
+from fastapi import WebSocket
+from starlette.concurrency import run_in_threadpool
+
+from app.core.settings import settings
+from app.db.database import SessionLocal
+from app.services import crud
+from app.services.metrics import track_job
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- operaciones de BD (en threadpool) -------------------
+
+def _load_counters(meet_id: int) -> dict[str, int] | None:
+  db = SessionLocal()
+  try:
+    if crud.get_meet(db, meet_id=meet_id) is None:
+      return None
+    return crud.get_meet_statistics(db, meet_id)
+  finally:
+    db.close()
+
+
+def _mark_present(meet_id: int, neighbor_id: int, is_on_time: bool) -> dict[str, int] | None:
+  """
+  Marca la llegada y retorna los contadores recontados, o None si no cambió nada
+  """
+  db = SessionLocal()
+  try:
+    if not crud.mark_assistance_present(db, meet_id, neighbor_id, is_on_time):
+      return None
+    db.commit()
+    return crud.get_meet_statistics(db, meet_id)
+  finally:
+    db.close()
+
+
+def _flush_counters(meet_id: int) -> None:
+  db = SessionLocal()
+  try:
+    crud.update_meet_statistics(db, meet_id)
+  finally:
+    db.close()
+
+
+# ---------------- salas en memoria -------------------
+
+class MeetRoom:
+  """
+  Estado en vivo de una reunión: clientes conectados y últimos contadores difundidos.
+  Los contadores se recuentan de las asistencias en cada check-in (el pase de lista
+  masivo, la API REST u otros workers también las modifican) y se guardan en la
+  reunión periódicamente: recontar es idempotente, no se pisan otras escrituras.
+  """
+
+  def __init__(self, meet_id: int, counters: dict[str, int]):
+    self.meet_id = meet_id
+    self.counters = counters
+    self.dirty = False
+    self.clients: set[WebSocket] = set()
+    self.flush_task: asyncio.Task | None = None
+
+
+class LiveMeetManager:
+
+  def __init__(self, flush_interval: float):
+    self.flush_interval = flush_interval
+    self.rooms: dict[int, MeetRoom] = {}
+    self._lock = asyncio.Lock()
+
+  async def join(self, meet_id: int, websocket: WebSocket) -> MeetRoom | None:
+    async with self._lock:
+      room = self.rooms.get(meet_id)
+      if room is None:
+        counters = await run_in_threadpool(_load_counters, meet_id)
+        if counters is None:
+          return None
+        room = MeetRoom(meet_id, counters)
+        room.flush_task = asyncio.create_task(self._flush_periodically(room))
+        self.rooms[meet_id] = room
+      room.clients.add(websocket)
+      return room
+
+  async def leave(self, room: MeetRoom, websocket: WebSocket) -> None:
+    async with self._lock:
+      room.clients.discard(websocket)
+      if room.clients:
+        return
+      self.rooms.pop(room.meet_id, None)
+    # Fuera del lock del manager: la escritura en BD no frena a las demás salas
+    if room.flush_task:
+      room.flush_task.cancel()
+    await self.flush(room)
+
+  async def refresh_counters(self, room: MeetRoom) -> dict[str, int]:
+    """
+    Recuenta los contadores (al conectarse un cliente a una sala que ya existe)
+    """
+    counters = await run_in_threadpool(_load_counters, room.meet_id)
+    if counters is not None:
+      room.counters = counters
+    return dict(room.counters)
+
+  async def check_in(self, room: MeetRoom, neighbor_id: int, is_on_time: bool) -> bool:
+    counters = await run_in_threadpool(_mark_present, room.meet_id, neighbor_id, is_on_time)
+    if counters is None:
+      return False
+
+    room.counters = counters
+    room.dirty = True
+
+    await self.broadcast(room, {
+      "event": "check_in",
+      "neighbor_id": neighbor_id,
+      "is_on_time": is_on_time,
+      "counters": counters,
+    })
+    return True
+
+  async def broadcast(self, room: MeetRoom, message: dict) -> None:
+    clients = list(room.clients)
+    results = await asyncio.gather(
+      *(client.send_json(message) for client in clients),
+      return_exceptions=True
+    )
+    for client, result in zip(clients, results):
+      if isinstance(result, Exception):
+        room.clients.discard(client)
+
+  async def flush(self, room: MeetRoom) -> None:
+    if not room.dirty:
+      return
+    # Un check-in durante la escritura vuelve a marcar la sala para el próximo ciclo
+    room.dirty = False
+
+    try:
+      with track_job("live_meet_flush"):
+        await run_in_threadpool(_flush_counters, room.meet_id)
+    except Exception:
+      # Se reintenta en el próximo ciclo
+      logger.exception("could not flush live counters of meet %s", room.meet_id)
+      room.dirty = True
+
+  async def flush_all(self) -> None:
+    for room in list(self.rooms.values()):
+      await self.flush(room)
+
+  async def _flush_periodically(self, room: MeetRoom) -> None:
+    while True:
+      await asyncio.sleep(self.flush_interval)
+      await self.flush(room)
+
+
+live_meets = LiveMeetManager(flush_interval=settings.LIVE_MEET_FLUSH_SECONDS)
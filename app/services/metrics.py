@@ -0,0 +1,300 @@
+"""
+Métricas en formato de texto de Prometheus, sin servicios externos.
+
+Cada worker acumula sus contadores en memoria. Las métricas HTTP se registran
+desde el middleware, que corre siempre en el hilo del event loop, así que no
+necesitan locks. Cada METRICS_FLUSH_SECONDS el worker guarda una foto en
+METRICS_DIR (un archivo JSON por pid) y GET /metrics suma las fotos de los
+workers vivos con los valores actuales del propio worker.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from app.core.settings import settings
+from app.services.cache import caches
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+HELP = {
+  "http_requests_total": ("counter", "Peticiones HTTP atendidas"),
+  "http_request_errors_total": ("counter", "Peticiones HTTP con respuesta 5xx o excepción"),
+  "http_request_duration_seconds": ("histogram", "Latencia de las peticiones HTTP por ruta"),
+  "job_runs_total": ("counter", "Ejecuciones de tareas en segundo plano"),
+  "job_duration_seconds": ("histogram", "Duración de las tareas en segundo plano"),
+  "db_pool_size": ("gauge", "Tamaño configurado del pool de conexiones"),
+  "db_pool_checked_out": ("gauge", "Conexiones en uso"),
+  "db_pool_checked_in": ("gauge", "Conexiones libres en el pool"),
+  "db_pool_overflow": ("gauge", "Conexiones abiertas por encima del tamaño del pool"),
+  "cache_hits_total": ("counter", "Aciertos de cache"),
+  "cache_misses_total": ("counter", "Fallos de cache"),
+  "cache_entries": ("gauge", "Entradas en cache"),
+  "cache_hit_ratio": ("gauge", "Proporción de aciertos de cache"),
+}
+
+
+def _key(labels: dict) -> str:
+  return json.dumps(sorted(labels.items()))
+
+
+class Registry:
+  """
+  Contadores e histogramas de un worker, indexados por nombre y etiquetas
+  """
+
+  def __init__(self):
+    self.counters: dict[str, dict[str, float]] = {}
+    self.histograms: dict[str, dict[str, dict]] = {}
+    # Solo para las escrituras desde otros hilos (tareas) y para la foto
+    self.lock = threading.Lock()
+
+  def inc(self, name: str, labels: dict, value: float = 1) -> None:
+    series = self.counters.setdefault(name, {})
+    key = _key(labels)
+    series[key] = series.get(key, 0) + value
+
+  def observe(self, name: str, labels: dict, value: float, buckets=LATENCY_BUCKETS) -> None:
+    series = self.histograms.setdefault(name, {})
+    key = _key(labels)
+    histogram = series.get(key)
+    if histogram is None:
+      histogram = series[key] = {"buckets": list(buckets), "counts": [0] * (len(buckets) + 1), "sum": 0.0}
+    histogram["counts"][bisect_left(histogram["buckets"], value)] += 1
+    histogram["sum"] += value
+
+  def snapshot(self) -> dict:
+    with self.lock:
+      counters = {name: dict(series) for name, series in self.counters.items()}
+      histograms = {
+        name: {key: {**h, "counts": list(h["counts"])} for key, h in series.items()}
+        for name, series in self.histograms.items()
+      }
+    return {"counters": counters, "histograms": histograms, "gauges": _gauges()}
+
+
+registry = Registry()
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+  """
+  Llamado desde el middleware (hilo del event loop)
+  """
+  registry.inc("http_requests_total", {"method": method, "route": route, "status": str(status)})
+  if status >= 500:
+    registry.inc("http_request_errors_total", {"method": method, "route": route})
+  registry.observe("http_request_duration_seconds", {"method": method, "route": route}, seconds)
+
+
+@contextmanager
+def track_job(name: str):
+  """
+  Mide la duración de una tarea en segundo plano (puede correr en otro hilo)
+  """
+  start = time.perf_counter()
+  status = "ok"
+  try:
+    yield
+  except Exception:
+    status = "error"
+    raise
+  finally:
+    with registry.lock:
+      registry.inc("job_runs_total", {"job": name, "status": status})
+      registry.observe("job_duration_seconds", {"job": name}, time.perf_counter() - start, JOB_BUCKETS)
+
+
+def _gauges() -> dict[str, dict[str, float]]:
+  """
+  Valores leídos al momento: pools de conexiones y caches
+  """
+  from app.db import database
+
+  gauges: dict[str, dict[str, float]] = {}
+  pools = {"primary": database.engine.pool, "async_primary": database.async_engine.pool}
+  if database.replica_engine is not None:
+    pools["replica"] = database.replica_engine.pool
+    pools["async_replica"] = database.async_replica_engine.pool
+  for name, pool in pools.items():
+    for metric, attribute in (
+      ("db_pool_size", "size"), ("db_pool_checked_out", "checkedout"),
+      ("db_pool_checked_in", "checkedin"), ("db_pool_overflow", "overflow"),
+    ):
+      counter = getattr(pool, attribute, None)
+      if callable(counter):
+        gauges.setdefault(metric, {})[_key({"pool": name})] = counter()
+
+  for name, cache in caches.items():
+    labels = _key({"cache": name})
+    gauges.setdefault("cache_hits_total", {})[labels] = cache.hits
+    gauges.setdefault("cache_misses_total", {})[labels] = cache.misses
+    gauges.setdefault("cache_entries", {})[labels] = len(cache)
+  return gauges
+
+
+# ========== AGREGACIÓN ENTRE WORKERS ==========
+
+def metrics_dir() -> str:
+  return settings.METRICS_DIR or os.path.join(tempfile.gettempdir(), "otb-metrics")
+
+
+def _snapshot_path(pid: int) -> str:
+  return os.path.join(metrics_dir(), f"worker-{pid}.json")
+
+
+def _pid_alive(pid: int) -> bool:
+  try:
+    os.kill(pid, 0)
+  except ProcessLookupError:
+    return False
+  except PermissionError:
+    return True
+  return True
+
+
+def write_snapshot() -> None:
+  os.makedirs(metrics_dir(), exist_ok=True)
+  path = _snapshot_path(os.getpid())
+  tmp = f"{path}.tmp"
+  with open(tmp, "w") as f:
+    json.dump(registry.snapshot(), f)
+  os.replace(tmp, path)
+
+
+def remove_snapshot() -> None:
+  try:
+    os.remove(_snapshot_path(os.getpid()))
+  except FileNotFoundError:
+    pass
+
+
+def _other_snapshots() -> list[dict]:
+  snapshots = []
+  directory = metrics_dir()
+  if not os.path.isdir(directory):
+    return snapshots
+  for filename in os.listdir(directory):
+    if not (filename.startswith("worker-") and filename.endswith(".json")):
+      continue
+    pid = int(filename[len("worker-"):-len(".json")])
+    if pid == os.getpid():
+      continue
+    if not _pid_alive(pid):
+      # Worker terminado: sus contadores se descartan (Prometheus lo ve como un reinicio)
+      try:
+        os.remove(os.path.join(directory, filename))
+      except FileNotFoundError:
+        pass
+      continue
+    try:
+      with open(os.path.join(directory, filename)) as f:
+        snapshots.append(json.load(f))
+    except (OSError, ValueError):
+      continue
+  return snapshots
+
+
+def aggregate() -> dict:
+  """
+  Suma la foto actual de este worker con las de los demás
+  """
+  total = {"counters": {}, "histograms": {}, "gauges": {}}
+  for snapshot in [registry.snapshot(), *_other_snapshots()]:
+    for kind in ("counters", "gauges"):
+      for name, series in snapshot.get(kind, {}).items():
+        merged = total[kind].setdefault(name, {})
+        for key, value in series.items():
+          merged[key] = merged.get(key, 0) + value
+    for name, series in snapshot.get("histograms", {}).items():
+      merged = total["histograms"].setdefault(name, {})
+      for key, histogram in series.items():
+        current = merged.get(key)
+        if current is None:
+          merged[key] = {**histogram, "counts": list(histogram["counts"])}
+        else:
+          current["counts"] = [a + b for a, b in zip(current["counts"], histogram["counts"])]
+          current["sum"] += histogram["sum"]
+  return total
+
+
+# ========== FORMATO DE TEXTO ==========
+
+def _labels(key: str, extra: dict | None = None) -> str:
+  pairs = [tuple(pair) for pair in json.loads(key)]
+  if extra:
+    pairs += list(extra.items())
+  if not pairs:
+    return ""
+  escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+  return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _header(lines: list[str], name: str) -> None:
+  kind, help_text = HELP.get(name, ("untyped", name))
+  lines.append(f"# HELP {name} {help_text}")
+  lines.append(f"# TYPE {name} {kind}")
+
+
+def render() -> str:
+  data = aggregate()
+  # La proporción de aciertos se calcula después de sumar los workers
+  hits = data["gauges"].get("cache_hits_total", {})
+  misses = data["gauges"].get("cache_misses_total", {})
+  data["gauges"]["cache_hit_ratio"] = {
+    key: hits[key] / (hits[key] + misses.get(key, 0))
+    for key in hits if hits[key] + misses.get(key, 0)
+  }
+
+  lines: list[str] = []
+  for kind in ("counters", "gauges"):
+    for name, series in sorted(data[kind].items()):
+      _header(lines, name)
+      for key, value in sorted(series.items()):
+        lines.append(f"{name}{_labels(key)} {value:g}")
+
+  for name, series in sorted(data["histograms"].items()):
+    _header(lines, name)
+    for key, histogram in sorted(series.items()):
+      cumulative = 0
+      for bound, count in zip(histogram["buckets"], histogram["counts"]):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(key, {'le': f'{bound:g}'})} {cumulative}")
+      cumulative += histogram["counts"][-1]
+      lines.append(f"{name}_bucket{_labels(key, {'le': '+Inf'})} {cumulative}")
+      lines.append(f"{name}_sum{_labels(key)} {histogram['sum']:g}")
+      lines.append(f"{name}_count{_labels(key)} {cumulative}")
+  return "\n".join(lines) + "\n"
+
+
+# ========== TAREA PERIÓDICA ==========
+
+_flush_task: asyncio.Task | None = None
+
+
+async def _flush_periodically() -> None:
+  while True:
+    await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+    try:
+      write_snapshot()
+    except OSError:
+      logger.exception("could not write metrics snapshot")
+
+
+def start() -> None:
+  global _flush_task
+  write_snapshot()
+  _flush_task = asyncio.create_task(_flush_periodically())
+
+
+def stop() -> None:
+  if _flush_task is not None:
+    _flush_task.cancel()
+  remove_snapshot()
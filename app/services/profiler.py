@@ -0,0 +1,193 @@
+"""
+Perfilado de una petición a pedido (?profile=1, solo administradores).
+
+Es un perfilador determinista propio en lugar de cProfile: cProfile solo mide el
+hilo que lo activa, y los endpoints sync corren en el threadpool. La función de
+perfilado se instala en todos los hilos (threading.setprofile_all_threads) y solo
+registra los eventos de la petición perfilada, identificada por una contextvar
+que se copia a sus tareas y al hilo del threadpool. Mientras no hay una
+petición perfilada no hay ninguna función instalada.
+"""
+import html
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from itertools import count
+
+from app.core.settings import settings
+
+_active: ContextVar["RequestProfiler | None"] = ContextVar("active_profiler", default=None)
+
+# Solo una petición perfilada a la vez (la función de perfilado es global)
+_running = threading.Lock()
+
+_reports: deque[dict] = deque(maxlen=settings.PROFILE_BUFFER_SIZE)
+_reports_lock = threading.Lock()
+_ids = count(1)
+
+
+class ProfilerBusy(RuntimeError):
+  pass
+
+
+def _frame_key(frame) -> str:
+  code = frame.f_code
+  module = frame.f_globals.get("__name__", "?")
+  return f"{module}.{code.co_qualname}:{frame.f_lineno if code.co_name == '<module>' else code.co_firstlineno}"
+
+
+def _c_key(function) -> str:
+  module = getattr(function, "__module__", None) or type(getattr(function, "__self__", None)).__name__
+  return f"{module}.{getattr(function, '__qualname__', repr(function))}"
+
+
+class RequestProfiler:
+  """
+  Acumula tiempo propio por pila (formato "collapsed" para flamegraphs) y
+  llamadas, tiempo propio y acumulado por función
+  """
+
+  def __init__(self):
+    self.id = next(_ids)
+    self.collapsed: defaultdict[str, float] = defaultdict(float)
+    self.functions: defaultdict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])  # llamadas, propio, acumulado
+    self._local = threading.local()
+
+  def _stack(self) -> list:
+    stack = getattr(self._local, "stack", None)
+    if stack is None:
+      stack = self._local.stack = []
+    return stack
+
+  def _callback(self, frame, event, arg):
+    if _active.get() is not self:
+      return
+    now = time.perf_counter()
+    stack = self._stack()
+
+    if event == "call" or event == "c_call":
+      key = _frame_key(frame) if event == "call" else _c_key(arg)
+      parent = stack[-1][0] if stack else threading.current_thread().name
+      # [pila, función, inicio, tiempo de los hijos, frame]
+      stack.append([f"{parent};{key}", key, now, 0.0, frame if event == "call" else None])
+      return
+
+    if not stack:
+      return
+    if event == "return":
+      # Retornos de frames que empezaron antes de perfilar: se ignoran
+      if stack[-1][4] is not frame:
+        if not any(entry[4] is frame for entry in stack):
+          return
+        while stack[-1][4] is not frame:
+          self._close(stack, now)
+    elif stack[-1][4] is not None:
+      # c_return / c_exception sin su c_call
+      return
+    self._close(stack, now)
+
+  def _close(self, stack: list, now: float) -> None:
+    path, key, start, children, _ = stack.pop()
+    elapsed = now - start
+    own = max(elapsed - children, 0.0)
+    self.collapsed[path] += own
+    stats = self.functions[key]
+    stats[0] += 1
+    stats[1] += own
+    stats[2] += elapsed
+    if stack:
+      stack[-1][3] += elapsed
+
+  def start(self):
+    if not _running.acquire(blocking=False):
+      raise ProfilerBusy("Another request is being profiled")
+    token = _active.set(self)
+    threading.setprofile_all_threads(self._callback)
+    return token
+
+  def stop(self, token) -> None:
+    threading.setprofile_all_threads(None)
+    _active.reset(token)
+    _running.release()
+
+  def top_functions(self, limit: int = 50) -> list[dict]:
+    ranked = sorted(self.functions.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return [
+      {"function": key, "calls": calls, "self_ms": round(own * 1000, 3), "cumulative_ms": round(cumulative * 1000, 3)}
+      for key, (calls, own, cumulative) in ranked
+    ]
+
+  def collapsed_text(self) -> str:
+    # Microsegundos enteros, como esperan flamegraph.pl y speedscope
+    return "\n".join(
+      f"{path} {round(seconds * 1_000_000)}"
+      for path, seconds in sorted(self.collapsed.items()) if seconds >= 0.000001
+    )
+
+
+def store_report(profiler: RequestProfiler, scope: dict, status_code: int, duration_ms: float, sql: dict | None) -> None:
+  report = {
+    "id": profiler.id,
+    "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+    "method": scope["method"],
+    "path": scope["path"],
+    "route": getattr(scope.get("route"), "path", None),
+    "status": status_code,
+    "duration_ms": round(duration_ms, 2),
+    "sql": sql,
+    "functions": profiler.top_functions(),
+    "collapsed": profiler.collapsed_text(),
+  }
+  with _reports_lock:
+    _reports.append(report)
+
+
+def reports() -> list[dict]:
+  """
+  Resumen de los perfiles guardados, el más reciente primero
+  """
+  with _reports_lock:
+    recent = list(reversed(_reports))
+  return [
+    {key: report[key] for key in ("id", "at", "method", "path", "route", "status", "duration_ms")}
+    for report in recent
+  ]
+
+
+def get_report(report_id: int) -> dict | None:
+  with _reports_lock:
+    for report in _reports:
+      if report["id"] == report_id:
+        return report
+  return None
+
+
+def render_html(report: dict) -> str:
+  """
+  Reporte HTML simple: funciones más costosas, desglose SQL y pilas colapsadas
+  """
+  e = html.escape
+  rows = "".join(
+    f"<tr><td>{e(f['function'])}</td><td>{f['calls']}</td><td>{f['self_ms']}</td><td>{f['cumulative_ms']}</td></tr>"
+    for f in report["functions"]
+  )
+  sql = report["sql"] or {}
+  sql_rows = "".join(
+    f"<tr><td>{s['count']}</td><td>{s['total_ms']}</td><td><code>{e(s['statement'])}</code></td></tr>"
+    for s in sql.get("statements", [])
+  )
+  return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Perfil #{report['id']}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse}}td,th{{border:1px solid #ccc;padding:2px 6px;font-size:13px;text-align:left}}pre{{font-size:12px;overflow:auto}}</style>
+</head><body>
+<h1>{e(report['method'])} {e(report['path'])}</h1>
+<p>Ruta: {e(str(report['route']))} &middot; Estado: {report['status']} &middot; Duración: {report['duration_ms']} ms &middot; {e(report['at'])}</p>
+<h2>SQL: {sql.get('queries', 0)} consultas, {sql.get('db_ms', 0)} ms</h2>
+<table><tr><th>veces</th><th>ms</th><th>sentencia</th></tr>{sql_rows}</table>
+<h2>Funciones (por tiempo propio)</h2>
+<table><tr><th>función</th><th>llamadas</th><th>propio ms</th><th>acumulado ms</th></tr>{rows}</table>
+<h2>Pilas colapsadas (µs)</h2>
+<pre>{e(report['collapsed'])}</pre>
+</body></html>"""
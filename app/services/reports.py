@@ -0,0 +1,324 @@
+"""
+Reporte financiero por periodo (YYYY-MM), por sección: agua, multas y otros.
+
+- billed: monto de las deudas del periodo (debt_items.period), sin las anuladas
+- collected: pagos aplicados con fecha de pago dentro del mes
+- outstanding: saldo pendiente al cierre del mes de las deudas de ese periodo y
+  los anteriores (lo emitido menos lo pagado hasta esa fecha)
+
+Solo cuentan como periodos los valores con formato YYYY-MM. Un rango se calcula
+con tres consultas agrupadas, sin importar cuántos meses abarque.
+
+Un periodo ya terminado se puede cerrar: sus totales quedan congelados en
+period_snapshots (por sección y tipo de deuda), sus reportes se leen solo de ahí y
+sus deudas no se pueden crear, modificar ni eliminar hasta que un administrador
+lo reabra, lo que elimina los snapshots. El bloqueo se aplica en cada flush de la
+sesión (incluye las eliminaciones en cascada, ej: al eliminar un vecino); las
+sentencias masivas o de Core (query.delete(), insert()) lo verifican con is_closed.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import case, event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.settings import settings
+from app.services.cache import LRUCache, tables_version
+
+WATER_DEBT_TYPE = "Consumo de Agua"
+SECTIONS = ("water", "fines", "other")
+PERIOD_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+# Reportes por periodo: los cerrados sin vencimiento, por id y fecha del cierre (en SQLite
+# un id se puede reutilizar tras reabrir y volver a cerrar); los abiertos con TTL
+_reports_cache = LRUCache(maxsize=512, name="period_reports")
+
+# Columnas de una deuda que cambian los totales de su periodo (los pagos sí se permiten)
+_LOCKED_COLUMNS = ("amount", "period", "debt_type_id", "reason", "meter_reading_id", "assistance_id")
+
+
+class ClosedPeriodError(RuntimeError):
+  """
+  Se intentó crear, modificar o eliminar una deuda de un periodo cerrado
+  """
+
+  def __init__(self, periods: list[str]):
+    super().__init__(f"closed periods: {', '.join(periods)}")
+    self.periods = periods
+
+
+def period_start(period: str) -> date:
+  year, month = period.split("-")
+  return date(int(year), int(month), 1)
+
+
+def period_end(period: str) -> date:
+  """
+  Primer día del mes siguiente (límite exclusivo)
+  """
+  start = period_start(period)
+  return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def period_of(day: date) -> str:
+  return f"{day.year:04d}-{day.month:02d}"
+
+
+def period_range(first: str, last: str) -> list[str]:
+  periods = []
+  current = period_start(first)
+  while period_of(current) <= last:
+    periods.append(period_of(current))
+    current = period_end(period_of(current))
+  return periods
+
+
+def _section():
+  debt = models.DebtItem
+  return case(
+    (or_(debt.meter_reading_id.isnot(None), models.DebtType.name == WATER_DEBT_TYPE), "water"),
+    (or_(debt.assistance_id.isnot(None), models.DebtType.name.like("Multa%")), "fines"),
+    else_="other"
+  ).label("section")
+
+
+def _not_cancelled():
+  return func.coalesce(models.DebtItem.status, "pending") != "cancelled"
+
+
+def _as_period():
+  return models.DebtItem.period.like("____-__")
+
+
+def _compute(db: Session, first: str, last: str) -> dict[str, dict[tuple, dict[str, int]]]:
+  """
+  Totales de cada periodo entre first y last (inclusive), por línea
+  (sección, id y nombre del tipo de deuda)
+  """
+  debt = models.DebtItem
+  line = (_section(), debt.debt_type_id, func.coalesce(models.DebtType.name, "Desconocido"))
+  start, end = period_start(first), period_end(last)
+
+  # Emitido por periodo; lo anterior al rango en una sola fila por línea
+  billed_period = case((debt.period < first, "before"), else_=debt.period)
+  billed_rows = db.execute(
+    select(billed_period, *line, func.sum(debt.amount))
+    .outerjoin(models.DebtType, debt.debt_type_id == models.DebtType.id)
+    .where(_as_period(), debt.period <= last, _not_cancelled())
+    .group_by(billed_period, *line)
+  ).all()
+
+  # Pagos aplicados por día de pago y periodo de la deuda (para el saldo acumulado)
+  applied_rows = db.execute(
+    select(models.Payment.payment_date, debt.period, *line, func.sum(models.PaymentDetail.amount_applied))
+    .select_from(models.PaymentDetail)
+    .join(models.Payment, models.PaymentDetail.payment_id == models.Payment.id)
+    .join(debt, models.PaymentDetail.debt_item_id == debt.id)
+    .outerjoin(models.DebtType, debt.debt_type_id == models.DebtType.id)
+    .where(_as_period(), debt.period <= last, _not_cancelled(), models.Payment.payment_date < end)
+    .group_by(models.Payment.payment_date, debt.period, *line)
+  ).all()
+
+  # Cobrado en el rango, sin importar el periodo (o el formato) de la deuda
+  collected_rows = db.execute(
+    select(models.Payment.payment_date, *line, func.sum(models.PaymentDetail.amount_applied))
+    .select_from(models.PaymentDetail)
+    .join(models.Payment, models.PaymentDetail.payment_id == models.Payment.id)
+    .join(debt, models.PaymentDetail.debt_item_id == debt.id)
+    .outerjoin(models.DebtType, debt.debt_type_id == models.DebtType.id)
+    .where(models.Payment.payment_date >= start, models.Payment.payment_date < end)
+    .group_by(models.Payment.payment_date, *line)
+  ).all()
+
+  billed = defaultdict(int)
+  for period, *key, amount in billed_rows:
+    billed[period, tuple(key)] += amount or 0
+  collected = defaultdict(int)
+  for payment_date, *key, amount in collected_rows:
+    collected[period_of(payment_date), tuple(key)] += amount or 0
+  keys = {key for _, key in billed} | {key for _, key in collected}
+
+  totals = {}
+  cumulative = {key: billed["before", key] for key in keys}
+  for period in period_range(first, last):
+    cutoff = period_end(period)
+    paid = defaultdict(int)
+    for payment_date, debt_period, *key, amount in applied_rows:
+      if payment_date < cutoff and debt_period <= period:
+        paid[tuple(key)] += amount or 0
+    lines = {}
+    for key in keys:
+      cumulative[key] += billed[period, key]
+      values = {
+        "billed": billed[period, key],
+        "collected": collected[period, key],
+        "outstanding": cumulative[key] - paid[key],
+      }
+      if any(values.values()):
+        lines[key] = values
+    totals[period] = lines
+  return totals
+
+
+def _report(period: str, closed: bool, lines: dict[tuple, dict[str, int]]) -> dict:
+  """
+  Arma el reporte de un periodo a partir de sus líneas por sección y tipo de deuda
+  """
+  sections = {name: {"billed": 0, "collected": 0, "outstanding": 0} for name in (*SECTIONS, "total")}
+  debt_types = []
+  for (section, debt_type_id, debt_type_name), values in sorted(lines.items(), key=lambda item: (item[0][0], item[0][2])):
+    for key, amount in values.items():
+      sections[section][key] += amount
+      sections["total"][key] += amount
+    debt_types.append({"debt_type_id": debt_type_id, "debt_type": debt_type_name, "section": section, **values})
+  return {"period": period, "closed": closed, **sections, "debt_types": debt_types}
+
+
+def _snapshot_lines(db: Session, close_ids: list[int]) -> dict[int, dict[tuple, dict[str, int]]]:
+  snapshot = models.PeriodSnapshot
+  lines = defaultdict(dict)
+  rows = db.execute(
+    select(
+      snapshot.period_close_id, snapshot.section, snapshot.debt_type_id, snapshot.debt_type_name,
+      snapshot.billed, snapshot.collected, snapshot.outstanding
+    ).where(snapshot.period_close_id.in_(close_ids))
+  ).all()
+  for close_id, section, debt_type_id, debt_type_name, billed, collected, outstanding in rows:
+    lines[close_id][section, debt_type_id, debt_type_name] = {"billed": billed, "collected": collected, "outstanding": outstanding}
+  return lines
+
+
+def closed_periods(db: Session, first: str, last: str) -> dict[str, tuple[int, datetime]]:
+  """
+  Periodos cerrados del rango, con el id y la fecha de su cierre
+  """
+  rows = db.execute(
+    select(models.PeriodClose.period, models.PeriodClose.id, models.PeriodClose.created_at)
+    .where(models.PeriodClose.period >= first, models.PeriodClose.period <= last)
+  ).all()
+  return {period: (close_id, closed_at) for period, close_id, closed_at in rows}
+
+
+def is_closed(db: Session, period: str) -> bool:
+  return bool(closed_periods(db, period, period))
+
+
+def _locked_change(debt: models.DebtItem) -> bool:
+  state = inspect(debt)
+  if any(state.attrs[column].history.has_changes() for column in _LOCKED_COLUMNS):
+    return True
+  # Anular (o reactivar) una deuda la saca (o la devuelve) de lo emitido
+  status = state.attrs.status.history
+  return status.has_changes() and "cancelled" in (*status.added, *status.deleted)
+
+
+@event.listens_for(Session, "before_flush")
+def _guard_closed_periods(session, flush_context, instances) -> None:
+  # Periodos nuevos desde la sesión; los guardados desde la BD (el historial de un
+  # atributo expirado no tiene el valor anterior)
+  periods, stored_ids, reading_ids, assistance_ids = set(), set(), set(), set()
+  for debt in session.new:
+    if isinstance(debt, models.DebtItem) and debt.period:
+      periods.add(debt.period)
+  for instance in session.deleted:
+    if isinstance(instance, models.DebtItem):
+      stored_ids.add(instance.id)
+    # Al eliminar la lectura o la asistencia, el flush deja su deuda sin origen
+    elif isinstance(instance, models.MeterReading):
+      reading_ids.add(instance.id)
+    elif isinstance(instance, models.Assistance):
+      assistance_ids.add(instance.id)
+  for debt in session.dirty:
+    if isinstance(debt, models.DebtItem) and _locked_change(debt):
+      stored_ids.add(debt.id)
+      if debt.period:
+        periods.add(debt.period)
+  if not (periods or stored_ids or reading_ids or assistance_ids):
+    return
+
+  debt = models.DebtItem
+  stored_periods = select(debt.period).where(
+    or_(debt.id.in_(stored_ids), debt.meter_reading_id.in_(reading_ids), debt.assistance_id.in_(assistance_ids))
+  )
+  closed = session.scalars(
+    select(models.PeriodClose.period)
+    .where(or_(models.PeriodClose.period.in_(periods), models.PeriodClose.period.in_(stored_periods)))
+  ).all()
+  if closed:
+    raise ClosedPeriodError(sorted(closed))
+
+
+def get_period_reports(db: Session, first: str, last: str) -> list[dict]:
+  """
+  Reportes de un rango de periodos. Los cerrados salen de sus snapshots y quedan
+  en cache sin vencimiento; los abiertos que no están en cache se calculan juntos,
+  en un solo rango (del primero al último que falta).
+  """
+  periods = period_range(first, last)
+  closes = closed_periods(db, first, last)
+  versions = tables_version("debt_items", "debt_types", "payments", "payment_details")
+  keys = {
+    period: ("closed", *closes[period]) if period in closes else ("open", period, versions)
+    for period in periods
+  }
+
+  found = {}
+  for period in periods:
+    report = _reports_cache.get(keys[period])
+    if report is not None:
+      found[period] = report
+
+  missing_closed = [period for period in periods if period not in found and period in closes]
+  if missing_closed:
+    snapshots = _snapshot_lines(db, [closes[period][0] for period in missing_closed])
+    for period in missing_closed:
+      found[period] = _report(period, True, snapshots[closes[period][0]])
+      _reports_cache.set(keys[period], found[period], ttl=None)
+
+  missing_open = [period for period in periods if period not in found]
+  if missing_open:
+    computed = _compute(db, missing_open[0], missing_open[-1])
+    for period in missing_open:
+      found[period] = _report(period, False, computed[period])
+      _reports_cache.set(keys[period], found[period], ttl=settings.REPORT_OPEN_PERIOD_TTL_SECONDS)
+
+  return [found[period] for period in periods]
+
+
+def _forget_period(period: str) -> None:
+  # Las claves ya no se pueden repetir; esto solo libera las entradas de este worker
+  _reports_cache.discard_where(lambda report: report["period"] == period)
+
+
+def close_period(db: Session, period: str, closed_by: str | None = None) -> models.PeriodClose:
+  """
+  Cierra un periodo: guarda sus totales por sección y tipo de deuda (al cierre
+  del mes) en period_snapshots. Desde ahí sus deudas no se pueden modificar.
+  """
+  lines = _compute(db, period, period)[period]
+  period_close = models.PeriodClose(period=period, closed_by=closed_by)
+  period_close.snapshots = [
+    models.PeriodSnapshot(
+      period=period, section=section, debt_type_id=debt_type_id, debt_type_name=debt_type_name, **values
+    )
+    for (section, debt_type_id, debt_type_name), values in lines.items()
+  ]
+  db.add(period_close)
+  db.commit()
+  db.refresh(period_close)
+  _forget_period(period)
+  return period_close
+
+
+def reopen_period(db: Session, period: str) -> bool:
+  """
+  Reabre un periodo cerrado: elimina su cierre y sus snapshots
+  """
+  period_close = db.scalar(select(models.PeriodClose).where(models.PeriodClose.period == period))
+  if period_close is None:
+    return False
+  db.delete(period_close)
+  db.commit()
+  _forget_period(period)
+  return True
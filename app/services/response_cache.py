@@ -0,0 +1,286 @@
+"""
+Cache de respuestas de GET: guarda el cuerpo ya serializado por ruta, parámetros
+y rol del usuario, así un hit no ejecuta el endpoint ni consulta la base.
+
+Las entradas dependen de tablas: sus contadores de versión (cache.bump_tables, que
+se incrementan al confirmar una transacción que las escribió) forman parte de la
+clave, así que una escritura deja de usar las entradas viejas sin recorrerlas.
+Si varias peticiones piden a la vez una clave que no está, solo la primera ejecuta
+el endpoint y las demás esperan su resultado (single-flight, por worker).
+
+Por defecto la cache vive en memoria de cada worker. Con RESPONSE_CACHE_URL y el
+paquete "redis" las entradas y las versiones se comparten entre workers en un
+Redis local (o compatible: Valkey, KeyDB, ...).
+
+Solo para respuestas que dependen de la ruta, los parámetros y el rol (no del
+usuario puntual). Se marca el endpoint con el decorador o con la dependencia, en
+un router con route_class=CachedRoute:
+
+  @router.get("", response_model=...)
+  @cached("measures")
+  async def read_measures(...): ...
+
+  @router.get("", response_model=..., dependencies=[Depends(cache_for("measures"))])
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from hashlib import blake2b
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app.core.settings import settings
+from app.db.database import SessionLocal
+from app.services import cache
+from app.services.auth import get_cached_user_by_id, user_cache
+from app.services.etag import etag_matches
+from app.services.jwt import decode_token_cached
+
+try:
+  import redis
+  import redis.asyncio
+except ImportError:
+  redis = None
+
+logger = logging.getLogger(__name__)
+
+# Headers que no se guardan: los agrega cada respuesta (o no deben repetirse)
+_SKIPPED_HEADERS = {b"server-timing", b"x-profile-id", b"x-cache"}
+
+
+@dataclass(frozen=True)
+class CacheRule:
+  tables: tuple[str, ...]
+  ttl: float | None = None
+
+
+# Una entrada: (status, headers crudos, cuerpo)
+Entry = tuple[int, list[tuple[bytes, bytes]], bytes]
+
+
+class MemoryBackend:
+  """
+  LRU en memoria del worker, con las versiones de tabla del mismo proceso
+  """
+
+  def __init__(self, maxsize: int):
+    self.entries = cache.LRUCache(maxsize=maxsize, name="responses")
+
+  async def versions(self, tables: tuple[str, ...]) -> tuple[int, ...] | None:
+    return cache.tables_version(*tables)
+
+  async def get(self, key: str) -> Entry | None:
+    return self.entries.get(key)
+
+  async def set(self, key: str, entry: Entry, ttl: float) -> None:
+    self.entries.set(key, entry, ttl=ttl)
+
+
+class RedisBackend:
+  """
+  Entradas y versiones de tabla en Redis, compartidas entre workers. Si Redis no
+  responde las peticiones se atienden sin cache (no fallan).
+  """
+
+  PREFIX = "otb:"
+
+  def __init__(self, url: str):
+    self.client = redis.asyncio.from_url(url)
+    # Los incrementos llegan desde código sync (commit en el threadpool)
+    self.sync_client = redis.Redis.from_url(url)
+    cache.on_bump(self.bump)
+
+  def bump(self, tables: tuple[str, ...]) -> None:
+    try:
+      with self.sync_client.pipeline(transaction=False) as pipe:
+        for table in tables:
+          pipe.incr(f"{self.PREFIX}version:{table}")
+        pipe.execute()
+    except redis.RedisError:
+      logger.warning("Could not bump table versions in redis: %s", tables, exc_info=True)
+
+  async def versions(self, tables: tuple[str, ...]) -> tuple[int, ...] | None:
+    try:
+      values = await self.client.mget([f"{self.PREFIX}version:{table}" for table in tables])
+    except redis.RedisError:
+      logger.warning("Response cache unavailable", exc_info=True)
+      return None
+    return tuple(int(value or 0) for value in values)
+
+  async def get(self, key: str) -> Entry | None:
+    try:
+      data = await self.client.get(self._key(key))
+    except redis.RedisError:
+      return None
+    if data is None:
+      return None
+    meta, _, body = data.partition(b"\n")
+    status, headers = json.loads(meta)
+    return status, [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers], body
+
+  async def set(self, key: str, entry: Entry, ttl: float) -> None:
+    status, headers, body = entry
+    meta = json.dumps([status, [(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers]])
+    try:
+      await self.client.set(self._key(key), meta.encode("latin-1") + b"\n" + body, px=int(ttl * 1000))
+    except redis.RedisError:
+      logger.warning("Could not store response in redis", exc_info=True)
+
+  def _key(self, key: str) -> str:
+    return f"{self.PREFIX}response:{blake2b(key.encode('utf-8'), digest_size=16).hexdigest()}"
+
+
+def _make_backend():
+  if settings.RESPONSE_CACHE_URL:
+    if redis is not None:
+      return RedisBackend(settings.RESPONSE_CACHE_URL)
+    logger.warning("RESPONSE_CACHE_URL is set but the redis package is not installed, using the in-process cache")
+  return MemoryBackend(settings.RESPONSE_CACHE_SIZE)
+
+
+backend = _make_backend()
+
+# Claves que se están calculando en este worker: las demás peticiones esperan el resultado
+_inflight: dict[str, asyncio.Future] = {}
+# Peticiones atendidas con el resultado de otra en curso
+coalesced = 0
+
+
+def cached(*tables: str, ttl: float | None = None):
+  """
+  Decorador: cachea la respuesta del endpoint mientras no cambien estas tablas
+  """
+  def decorator(endpoint):
+    endpoint.response_cache = CacheRule(tables, ttl)
+    return endpoint
+  return decorator
+
+
+def cache_for(*tables: str, ttl: float | None = None):
+  """
+  Lo mismo que cached, como dependencia de la ruta
+  """
+  async def dependency() -> None:
+    return None
+  dependency.response_cache = CacheRule(tables, ttl)
+  return dependency
+
+
+def _route_rule(route: APIRoute) -> CacheRule | None:
+  rule = getattr(route.endpoint, "response_cache", None)
+  if rule is not None:
+    return rule
+  for dependency in route.dependencies:
+    rule = getattr(dependency.dependency, "response_cache", None)
+    if rule is not None:
+      return rule
+  return None
+
+
+def _load_role(user_id) -> str | None:
+  db = SessionLocal()
+  try:
+    user = get_cached_user_by_id(db, user_id=user_id)
+    return user.role.value if user else None
+  finally:
+    db.close()
+
+
+async def request_role(request: Request) -> str:
+  """
+  Rol del usuario de la cookie de sesión; "anonymous" sin sesión válida
+  """
+  token = request.cookies.get("access_token")
+  payload = decode_token_cached(token) if token else None
+  if not payload:
+    return "anonymous"
+  values = user_cache.get(str(payload["sub"]))
+  if values is not None:
+    return values["role"].value
+  return await run_in_threadpool(_load_role, payload["sub"]) or "anonymous"
+
+
+def _cache_key(request: Request, role: str, versions: tuple[int, ...]) -> str:
+  params = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+  return f"{request.url.path}?{params}|{role}|{versions}"
+
+
+def _entry(response: Response) -> Entry | None:
+  """
+  Solo se guardan respuestas 200 completas que no crean cookies
+  """
+  if response.status_code != 200 or not hasattr(response, "body"):
+    return None
+  headers = [(name, value) for name, value in response.raw_headers if name not in _SKIPPED_HEADERS]
+  if any(name == b"set-cookie" for name, _ in headers):
+    return None
+  return response.status_code, headers, response.body
+
+
+def _replay(entry: Entry, request: Request) -> Response:
+  status, headers, body = entry
+  etag = next((value.decode("latin-1") for name, value in headers if name == b"etag"), None)
+  if etag and etag_matches(etag, request.headers.get("if-none-match")):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "X-Cache": "HIT"})
+  response = Response(body, status_code=status)
+  response.raw_headers = [*headers, (b"x-cache", b"HIT")]
+  return response
+
+
+async def serve(request: Request, rule: CacheRule, handler) -> Response:
+  """
+  Atiende la petición desde la cache o ejecuta el endpoint (una sola vez por clave)
+  """
+  global coalesced
+  versions = await backend.versions(rule.tables)
+  if versions is None:
+    return await handler(request)
+  key = _cache_key(request, await request_role(request), versions)
+
+  entry = await backend.get(key)
+  if entry is not None:
+    return _replay(entry, request)
+
+  pending = _inflight.get(key)
+  if pending is not None:
+    entry = await asyncio.shield(pending)
+    if entry is not None:
+      coalesced += 1
+      return _replay(entry, request)
+    # La petición en curso no dejó nada cacheable: cada una ejecuta el endpoint
+    return await handler(request)
+
+  future = asyncio.get_running_loop().create_future()
+  _inflight[key] = future
+  entry = None
+  try:
+    response = await handler(request)
+    entry = _entry(response)
+    if entry is not None:
+      await backend.set(key, entry, rule.ttl or settings.RESPONSE_CACHE_TTL_SECONDS)
+      response.headers["X-Cache"] = "MISS"
+    return response
+  finally:
+    del _inflight[key]
+    future.set_result(entry)
+
+
+class CachedRoute(APIRoute):
+  """
+  Ruta que aplica la cache de respuestas si su endpoint está marcado con
+  cached/cache_for; las demás rutas del router quedan igual
+  """
+
+  def get_route_handler(self):
+    handler = super().get_route_handler()
+    rule = _route_rule(self)
+    if rule is None or not settings.RESPONSE_CACHE_ENABLED or "GET" not in self.methods:
+      return handler
+
+    async def cached_handler(request: Request) -> Response:
+      return await serve(request, rule, handler)
+
+    return cached_handler
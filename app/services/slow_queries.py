@@ -0,0 +1,170 @@
+"""
+Registro de consultas lentas: las sentencias que superan SLOW_QUERY_MS se guardan
+(sin valores de parámetros) en un buffer circular con la ruta que las originó.
+El EXPLAIN se obtiene en segundo plano, en una conexión aparte; se ejecuta con
+los valores reales (el plan depende de ellos) pero se guarda sin los literales
+que PostgreSQL muestra en las condiciones.
+"""
+import json
+import logging
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import count
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.settings import settings
+from app.services.metrics import track_job
+
+logger = logging.getLogger("app.sql")
+
+_entries: deque[dict] = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+_entries_lock = threading.Lock()
+_ids = count(1)
+
+# Un solo hilo para los EXPLAIN; si hay demasiados en cola se omiten
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+_explain_slots = threading.BoundedSemaphore(8)
+_explain_engines: dict[str, object] = {}
+_explain_engines_lock = threading.Lock()
+
+
+def redact(parameters):
+  """
+  Reemplaza los valores de los parámetros por su tipo
+  """
+  if parameters is None:
+    return None
+  if isinstance(parameters, dict):
+    return {key: type(value).__name__ for key, value in parameters.items()}
+  if isinstance(parameters, (list, tuple)):
+    if parameters and isinstance(parameters[0], (dict, list, tuple)):
+      # executemany: basta con la forma del primer conjunto
+      return {"executemany": len(parameters), "first": redact(parameters[0])}
+    return [type(value).__name__ for value in parameters]
+  return type(parameters).__name__
+
+
+_PLAN_STRING = re.compile(r"'(?:[^']|'')*'")
+# "Index Cond: ", "Filter: ", "Join Filter: "... (no "Rows Removed by Filter: N")
+_PLAN_CONDITION = re.compile(r"^\s*(?!Rows Removed)(?:[\w-]+ )*(?:Cond|Filter): ")
+_PLAN_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?(?![\w.])")
+
+
+def scrub_plan(line: str) -> str:
+  """
+  Quita los valores de una línea del plan: los textos en cualquier parte y los
+  números solo en las condiciones (Index Cond, Filter...), no en costos ni filas
+  """
+  line = _PLAN_STRING.sub("'?'", line)
+  match = _PLAN_CONDITION.search(line)
+  if match:
+    line = line[:match.end()] + _PLAN_NUMBER.sub("?", line[match.end():])
+  return line
+
+
+def _sync_url(engine) -> str | None:
+  """
+  URL sync equivalente al engine que ejecutó la sentencia
+  """
+  from app.db import database
+
+  if engine is database.async_engine.sync_engine:
+    return database.DATABASE_URL
+  if database.async_replica_engine is not None and engine is database.async_replica_engine.sync_engine:
+    return database.REPLICA_URL
+  return engine.url.render_as_string(hide_password=False)
+
+
+def _explain_engine(url: str):
+  # NullPool: cada EXPLAIN abre su propia conexión, sin tocar el pool de la app
+  with _explain_engines_lock:
+    if url not in _explain_engines:
+      _explain_engines[url] = create_engine(url, poolclass=NullPool)
+    return _explain_engines[url]
+
+
+def is_explain_connection(conn) -> bool:
+  return conn.engine in _explain_engines.values()
+
+
+def _explain_prefix(dialect_name: str) -> str:
+  if dialect_name == "sqlite":
+    return "EXPLAIN QUERY PLAN"
+  if dialect_name == "postgresql" and settings.SLOW_QUERY_EXPLAIN_ANALYZE:
+    return "EXPLAIN (ANALYZE, BUFFERS)"
+  return "EXPLAIN"
+
+
+def _explain(entry: dict, url: str, source_dialect, statement: str, parameters, compiled) -> None:
+  try:
+    engine = _explain_engine(url)
+    with track_job("slow_query_explain"), engine.connect() as conn:
+      if source_dialect.paramstyle == engine.dialect.paramstyle:
+        sql, params = statement, parameters
+      else:
+        # ej: asyncpg ($1) -> psycopg2 (%(name)s), se vuelve a compilar con los valores
+        sql = str(compiled.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+        params = None
+      rows = conn.exec_driver_sql(f"{_explain_prefix(engine.dialect.name)} {sql}", params).all()
+    entry["explain"] = [scrub_plan(" | ".join(str(value) for value in row)) for row in rows]
+  except Exception as exc:
+    entry["explain_error"] = str(exc).splitlines()[0][:300]
+  finally:
+    _explain_slots.release()
+
+
+def _can_explain(statement: str, executemany: bool) -> bool:
+  if executemany:
+    return False
+  keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+  if settings.SLOW_QUERY_EXPLAIN_ANALYZE:
+    # Con ANALYZE la sentencia se ejecuta de verdad: solo lecturas
+    return keyword in ("SELECT", "WITH")
+  return keyword in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def record(conn, statement, parameters, context, executemany, elapsed_ms: float, route: str | None) -> None:
+  """
+  Registra una consulta lenta y programa su EXPLAIN
+  """
+  entry = {
+    "id": next(_ids),
+    "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+    "duration_ms": round(elapsed_ms, 2),
+    "route": route,
+    "dialect": conn.dialect.name,
+    "statement": statement[:4000],
+    "parameters": redact(parameters),
+    "explain": None,
+    "explain_error": None,
+  }
+  with _entries_lock:
+    _entries.append(entry)
+  logger.warning(json.dumps({"event": "sql.slow", **{k: entry[k] for k in ("duration_ms", "route", "statement")}}, ensure_ascii=False))
+
+  if not settings.SLOW_QUERY_EXPLAIN or not _can_explain(statement, executemany):
+    return
+  if not _explain_slots.acquire(blocking=False):
+    entry["explain_error"] = "skipped: too many pending EXPLAIN"
+    return
+  compiled = getattr(context, "compiled", None)
+  _explain_executor.submit(_explain, entry, _sync_url(conn.engine), conn.dialect, statement, parameters, compiled)
+
+
+def entries(limit: int | None = None) -> list[dict]:
+  """
+  Consultas lentas registradas, la más reciente primero
+  """
+  with _entries_lock:
+    recent = list(reversed(_entries))
+  return recent[:limit] if limit else recent
+
+
+def clear() -> None:
+  with _entries_lock:
+    _entries.clear()
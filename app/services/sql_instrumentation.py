@@ -0,0 +1,145 @@
+"""
+Instrumentación SQL por petición: cantidad de consultas, tiempo en la base y
+sentencias repetidas (N+1). Los eventos se registran sobre la clase Engine, así
+cubren el primario, la réplica y los engines async. También alimentan el
+registro de consultas lentas (slow_queries), dentro o fuera de una petición.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.settings import settings
+from app.services import slow_queries
+
+
+class RepeatedQueryError(RuntimeError):
+  """
+  Una misma sentencia se repitió más de SQL_REPEAT_LIMIT veces en una petición
+  (solo con SQL_REPEAT_MODE=raise, pensado para los tests)
+  """
+
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+  """
+  Forma de la sentencia sin valores: listas IN, números y textos pasan a "?"
+  """
+  shape = _STRING.sub("?", statement)
+  shape = _NUMBER.sub("?", shape)
+  shape = _IN_LIST.sub("(?)", shape)
+  return _SPACES.sub(" ", shape).strip()
+
+
+class RequestSQLStats:
+  def __init__(self, scope: dict):
+    self.scope = scope
+    self.count = 0
+    self.total_ms = 0.0
+    self.shapes: Counter[str] = Counter()
+    self.shape_ms: Counter[str] = Counter()
+
+  @property
+  def route(self) -> str:
+    route = self.scope.get("route")
+    return getattr(route, "path", None) or self.scope.get("path", "")
+
+  def record(self, statement: str, elapsed_ms: float) -> None:
+    self.count += 1
+    self.total_ms += elapsed_ms
+    shape = statement_shape(statement)
+    self.shapes[shape] += 1
+    self.shape_ms[shape] += elapsed_ms
+    if settings.SQL_REPEAT_MODE == "raise" and self.shapes[shape] == settings.SQL_REPEAT_LIMIT + 1:
+      raise RepeatedQueryError(
+        f"{self.route}: la sentencia se repitió más de {settings.SQL_REPEAT_LIMIT} veces: {shape[:200]}"
+      )
+
+  def repeated(self, limit: int | None = None) -> list[tuple[str, int]]:
+    limit = settings.SQL_REPEAT_LIMIT if limit is None else limit
+    return [(shape, count) for shape, count in self.shapes.most_common() if count > limit]
+
+  def breakdown(self, limit: int = 20) -> list[dict]:
+    """
+    Sentencias que más tiempo de base consumieron en la petición
+    """
+    return [
+      {"statement": shape, "count": self.shapes[shape], "total_ms": round(ms, 2)}
+      for shape, ms in self.shape_ms.most_common(limit)
+    ]
+
+  def summary(self) -> dict:
+    return {
+      "route": self.route,
+      "queries": self.count,
+      "db_ms": round(self.total_ms, 2),
+      "distinct_statements": len(self.shapes),
+      "repeated": [{"count": count, "statement": shape[:200]} for shape, count in self.repeated()],
+    }
+
+
+_current: ContextVar[RequestSQLStats | None] = ContextVar("request_sql_stats", default=None)
+
+
+def current_stats() -> RequestSQLStats | None:
+  return _current.get()
+
+
+def start_request(scope: dict):
+  """
+  Empieza a contar las consultas de la petición; devuelve (stats, token)
+  """
+  stats = RequestSQLStats(scope)
+  return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+  _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  starts = conn.info.get("query_start")
+  if not starts:
+    return
+  elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+  # BEGIN IMMEDIATE del perfil SQLite no cuenta como consulta
+  if statement.startswith("BEGIN"):
+    return
+
+  stats = _current.get()
+  if settings.SLOW_QUERY_MS is not None and elapsed_ms >= settings.SLOW_QUERY_MS and not slow_queries.is_explain_connection(conn):
+    slow_queries.record(
+      conn, statement, parameters, context, executemany, elapsed_ms,
+      route=stats.route if stats is not None else None
+    )
+  if stats is not None:
+    stats.record(statement, elapsed_ms)
+
+
+def _handle_error(exception_context):
+  # La sentencia falló: descartar su tiempo de inicio
+  conn = exception_context.connection
+  if conn is not None and conn.info.get("query_start"):
+    conn.info["query_start"].pop()
+
+
+def install() -> None:
+  if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
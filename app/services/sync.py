@@ -0,0 +1,168 @@
+"""
+Sincronización incremental para las apps de campo (lectura de medidores y cobro).
+
+Los cambios de todas las entidades forman un solo flujo ordenado por
+(updated_at, entidad, id); las eliminaciones entran al mismo flujo desde
+sync_tombstones, ordenadas por (deleted_at, id). El cursor es la posición de la
+última fila entregada, así una página siguiente empieza justo después aunque
+haya muchas filas con el mismo updated_at, y una fila modificada mientras se
+pagina vuelve a salir más adelante con su nuevo updated_at.
+
+No se entregan las filas de los últimos SYNC_SAFETY_LAG_SECONDS: updated_at se
+asigna al escribir, no al confirmar, y una transacción lenta podría confirmar
+una fila con un updated_at anterior al cursor que el cliente ya tiene.
+
+Cada página viene en formato compacto, por entidad: los nombres de las columnas
+una sola vez y las filas como listas de valores.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, and_, event, insert, literal, or_, select, true
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.settings import settings
+
+# Entidades sincronizadas (nombre en la API -> modelo); el orden desempata el cursor
+ENTITIES = {
+  "neighbors": models.Neighbor,
+  "meters": models.NeighborMeter,
+  "debts": models.DebtItem,
+  "measures": models.Measure,
+}
+_RANKS = {entity: rank for rank, entity in enumerate(ENTITIES)}
+_DELETED_RANK = len(ENTITIES)
+_TABLE_ENTITIES = {model.__tablename__: entity for entity, model in ENTITIES.items()}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidCursor(ValueError):
+  pass
+
+
+# ---------------- tombstones -------------------
+
+def _record_delete(entity: str):
+  def listener(mapper, connection, target) -> None:
+    # En la misma transacción del DELETE: si se deshace, el tombstone también
+    connection.execute(insert(models.SyncTombstone).values(entity=entity, row_id=target.id, deleted_at=datetime.utcnow()))
+  return listener
+
+
+for _entity, _model in ENTITIES.items():
+  event.listen(_model, "after_delete", _record_delete(_entity))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_deletes(orm_execute_state) -> None:
+  # DELETE masivos (query.delete(), session.execute(delete(...))) no disparan after_delete:
+  # antes de ejecutarlos se guardan los ids de las filas que van a eliminar
+  if not orm_execute_state.is_delete:
+    return
+  statement = orm_execute_state.statement
+  entity = _TABLE_ENTITIES.get(statement.table.name)
+  if entity is None:
+    return
+  deleted = select(literal(entity), statement.table.c.id, literal(datetime.utcnow(), DateTime))
+  if statement.whereclause is not None:
+    deleted = deleted.where(statement.whereclause)
+  orm_execute_state.session.execute(
+    insert(models.SyncTombstone).from_select(["entity", "row_id", "deleted_at"], deleted)
+  )
+
+
+# ---------------- cursor -------------------
+
+def encode_cursor(position: tuple[datetime, int, int]) -> str:
+  timestamp, rank, row_id = position
+  return f"{(timestamp - _EPOCH) // _MICROSECOND}-{rank}-{row_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, int]:
+  try:
+    micros, rank, row_id = (int(part) for part in cursor.split("-"))
+    if micros < 0 or not 0 <= rank <= _DELETED_RANK or not 0 <= row_id < 2 ** 63:
+      raise InvalidCursor(cursor)
+    # OverflowError: un cursor con una fecha fuera de rango (más allá del año 9999)
+    return _EPOCH + micros * _MICROSECOND, rank, row_id
+  except (ValueError, OverflowError):
+    raise InvalidCursor(cursor)
+
+
+def _after(timestamp_column, id_column, rank: int, position: tuple[datetime, int, int] | None):
+  """
+  Filas de una entidad que van después de la posición del cursor
+  """
+  if position is None:
+    return true()
+  timestamp, cursor_rank, row_id = position
+  if rank < cursor_rank:
+    return timestamp_column > timestamp
+  if rank > cursor_rank:
+    return timestamp_column >= timestamp
+  return or_(timestamp_column > timestamp, and_(timestamp_column == timestamp, id_column > row_id))
+
+
+# ---------------- cambios -------------------
+
+def get_changes(db: Session, since: str | None, limit: int) -> dict:
+  """
+  Página de cambios posteriores al cursor `since` (todo, si no hay cursor).
+  Con has_more el cliente pide la siguiente con el cursor devuelto.
+  """
+  position = decode_cursor(since) if since else None
+  horizon = datetime.utcnow() - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+
+  # Cada entidad aporta sus primeras limit + 1 filas: las primeras `limit` del flujo
+  # completo están entre ellas, y la sobrante indica si hay otra página
+  events = []
+  for entity, model in ENTITIES.items():
+    table = model.__table__
+    rank = _RANKS[entity]
+    rows = db.execute(
+      select(*table.columns)
+      .where(_after(table.c.updated_at, table.c.id, rank, position), table.c.updated_at <= horizon)
+      .order_by(table.c.updated_at, table.c.id)
+      .limit(limit + 1)
+    ).all()
+    events.extend(((row.updated_at, rank, row.id), entity, row) for row in rows)
+
+  tombstone = models.SyncTombstone
+  rows = db.execute(
+    select(tombstone.id, tombstone.entity, tombstone.row_id, tombstone.deleted_at)
+    .where(_after(tombstone.deleted_at, tombstone.id, _DELETED_RANK, position), tombstone.deleted_at <= horizon)
+    .order_by(tombstone.deleted_at, tombstone.id)
+    .limit(limit + 1)
+  ).all()
+  events.extend(((row.deleted_at, _DELETED_RANK, row.id), None, row) for row in rows)
+
+  events.sort(key=lambda item: item[0])
+  page = events[:limit]
+
+  # Solo el último evento de cada fila: así no importa en qué orden aplique el
+  # cliente los cambios y las eliminaciones (ej: un id eliminado y vuelto a usar)
+  latest = {}
+  for _, entity, row in page:
+    if entity is None:
+      latest[row.entity, row.row_id] = None
+    else:
+      latest[entity, row.id] = row
+
+  changes, deleted = {}, {}
+  for (entity, row_id), row in latest.items():
+    if row is None:
+      deleted.setdefault(entity, []).append(row_id)
+    else:
+      changes.setdefault(entity, []).append(list(row))
+
+  return {
+    "cursor": encode_cursor(page[-1][0]) if page else since,
+    "has_more": len(events) > limit,
+    "changes": {
+      entity: {"fields": list(ENTITIES[entity].__table__.columns.keys()), "rows": rows}
+      for entity, rows in changes.items()
+    },
+    "deleted": deleted,
+  }
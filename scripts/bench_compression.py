@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark de compresión de respuestas: bytes y CPU por respuesta con gzip
+(varios niveles) y brotli (si el paquete está instalado) sobre payloads reales
+de la API: lecturas de una medición, pagos de una jornada de cobro, deudas de
+un vecino y el listado de reuniones.
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/bench_compression.py --neighbors 300 --repeat 20
+"""
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--neighbors", type=int, default=300)
+parser.add_argument("--repeat", type=int, default=20)
+args = parser.parse_args()
+
+_db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_compression.db')}"
+os.environ["ENVIRONMENT"] = "DEVELOPMENT"
+os.environ["DB_URL_SQLITE"] = _db_url
+os.environ.setdefault("DB_URL_SUPABASE", _db_url)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+os.environ["SQL_INSTRUMENTATION"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["DB_MIGRATE_ON_STARTUP"] = "true"
+
+from datetime import date, datetime
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.db import migrate
+from app.db.database import SessionLocal, engine
+from app.main import app
+from app.middleware import brotli
+
+PAYLOADS = {
+  "meter readings": "/measures/1/meter-readings",
+  "collect payments": "/collect-debts/1/payments",
+  "neighbor debts": "/neighbors/1/debts/all",
+  "meets": "/meets",
+}
+
+
+def seed(count):
+  migrate.upgrade(engine)
+  db = SessionLocal()
+  try:
+    neighbors = [
+      models.Neighbor(first_name=f"Nombre{i}", second_name="Segundo", last_name=f"Apellido{i % 40}", ci=1000 + i, phone_number=70000000 + i)
+      for i in range(count)
+    ]
+    db.add_all(neighbors)
+    db.flush()
+    meters = [models.NeighborMeter(neighbor_id=neighbor.id, meter_code=f"MED-{neighbor.id:05d}") for neighbor in neighbors]
+    measure = models.Measure(measure_date=date(2025, 1, 31), period="2025-01", reader_name="Lector")
+    collect = models.CollectDebt(collect_date=date(2025, 2, 5), period="2025-01", collector_name="Cobrador", location="Sede")
+    debt_type = models.DebtType(name="Consumo de Agua")
+    db.add_all([*meters, measure, collect, debt_type])
+    db.flush()
+    db.add_all([
+      models.MeterReading(measure_id=measure.id, meter_id=meter.id, current_reading=100 + i, notes="Lectura normal")
+      for i, meter in enumerate(meters)
+    ])
+    debts = [
+      models.DebtItem(
+        neighbor_id=neighbors[i % 10].id, debt_type_id=debt_type.id, amount=25, balance=25,
+        reason=f"Consumo de agua - {20 + i % 15} m3", period=f"2025-{1 + i % 12:02d}", issue_date=date(2025, 1 + i % 12, 1)
+      )
+      for i in range(count)
+    ]
+    db.add_all(debts)
+    db.flush()
+    for i, neighbor in enumerate(neighbors):
+      payment = models.Payment(
+        neighbor_id=neighbor.id, collect_debt_id=collect.id, payment_date=date(2025, 2, 5),
+        total_amount=25, payment_method="efectivo", received_by="Cobrador"
+      )
+      db.add(payment)
+      db.flush()
+      db.add(models.PaymentDetail(payment_id=payment.id, debt_item_id=debts[i].id, amount_applied=25, previous_balance=25, new_balance=0))
+    db.add_all([
+      models.Meet(meet_date=datetime(2025, 1 + i % 12, 1, 19), meet_type="ordinaria", title=f"Reunión ordinaria {i}",
+                  description="Informe de directiva, estado de cuentas y varios", location="Sede vecinal")
+      for i in range(count // 2)
+    ])
+    db.commit()
+  finally:
+    db.close()
+
+
+def timed(fn, body):
+  times = []
+  for _ in range(args.repeat):
+    start = time.process_time()
+    result = fn(body)
+    times.append((time.process_time() - start) * 1000)
+  return result, statistics.median(times)
+
+
+def codecs():
+  yield "gzip-1", lambda body: gzip.compress(body, compresslevel=1, mtime=0)
+  yield "gzip-6", lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+  yield "gzip-9", lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+  if brotli is not None:
+    yield "br-4", lambda body: brotli.compress(body, quality=4)
+    yield "br-11", lambda body: brotli.compress(body, quality=11)
+
+
+if __name__ == "__main__":
+  seed(args.neighbors)
+  print(f"{args.neighbors} neighbors, CPU time is the median of {args.repeat} runs"
+        + ("" if brotli is not None else " (brotli not installed)"))
+  with TestClient(app) as client:
+    for name, path in PAYLOADS.items():
+      body = client.get(path, headers={"Accept-Encoding": "identity"}).content
+      print(f"\n{name} ({path}): {len(body) / 1024:.1f} KiB")
+      for codec, fn in codecs():
+        compressed, cpu_ms = timed(fn, body)
+        print(f"  {codec:<7} {len(compressed) / 1024:8.1f} KiB  {len(body) / len(compressed):5.1f}x  {cpu_ms:6.2f} ms CPU")
+
+      response = client.get(path, headers={"Accept-Encoding": "gzip, br"})
+      print(f"  served  content-encoding={response.headers.get('content-encoding')} "
+            f"content-length={response.headers.get('content-length')}")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Benchmark de login bajo una avalancha de contraseñas incorrectas.
+
+Lanza N logins concurrentes con contraseña incorrecta (usuario existente e inexistente)
+y al mismo tiempo mide la latencia de un endpoint de lectura normal (GET /meets),
+para comprobar que bcrypt no deja sin hilos al resto de la API.
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/bench_login.py --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_file = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("DB_URL_SUPABASE", f"sqlite:///{_db_file}")
+os.environ.setdefault("DB_URL_SQLITE", f"sqlite:///{_db_file}")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+# Sin bloqueo por intentos para medir solo el costo de bcrypt
+os.environ.setdefault("LOGIN_MAX_ATTEMPTS_PER_IP", "1000000")
+os.environ.setdefault("LOGIN_MAX_ATTEMPTS_PER_USERNAME", "1000000")
+
+import bcrypt
+import httpx
+
+from app.main import app
+from app.db import migrate
+from app.db.database import SessionLocal
+from app.enums import UserType
+from app.models import User
+
+
+def create_user():
+  migrate.upgrade()
+  db = SessionLocal()
+  try:
+    if not db.query(User).filter(User.username == "bench").first():
+      db.add(User(
+        username="bench",
+        password_hash=bcrypt.hashpw(b"secret", bcrypt.gensalt()).decode("utf-8"),
+        role=UserType.ADMIN
+      ))
+      db.commit()
+  finally:
+    db.close()
+
+
+def percentile(values, pct):
+  values = sorted(values)
+  return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(total, concurrency, reads):
+  transport = httpx.ASGITransport(app=app)
+  async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = {}
+
+    async def bad_login(i):
+      username = "bench" if i % 2 else f"ghost{i}"
+      async with semaphore:
+        response = await client.post("/auth/login", json={"username": username, "password": "wrong"})
+      statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    read_latencies = []
+
+    async def reader():
+      for _ in range(reads):
+        start = time.perf_counter()
+        await client.get("/meets")
+        read_latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    await asyncio.gather(reader(), *(bad_login(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+  print(f"logins: {total} concurrency: {concurrency} elapsed: {elapsed:.2f}s")
+  print(f"throughput: {total / elapsed:.1f} logins/s  statuses: {statuses}")
+  print(
+    f"GET /meets during flood: p50 {statistics.median(read_latencies):.1f} ms"
+    f"  p99 {percentile(read_latencies, 99):.1f} ms  max {max(read_latencies):.1f} ms"
+  )
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--requests", type=int, default=200)
+  parser.add_argument("--concurrency", type=int, default=50)
+  parser.add_argument("--reads", type=int, default=50)
+  args = parser.parse_args()
+
+  create_user()
+  asyncio.run(run(args.requests, args.concurrency, args.reads))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+Benchmark de los reportes por periodo: GET /reports/periods con un rango de 24
+meses, sin cache (cálculo con las consultas agrupadas) y con cache. Compara el
+resultado con un cálculo fila por fila en Python sobre los mismos datos. Después
+cierra todos los periodos y mide el mismo rango leído de los snapshots.
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/bench_period_reports.py --neighbors 500 --months 24 --repeat 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--neighbors", type=int, default=500)
+parser.add_argument("--months", type=int, default=24)
+parser.add_argument("--repeat", type=int, default=10)
+args = parser.parse_args()
+
+_db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_period_reports.db')}"
+os.environ["ENVIRONMENT"] = "DEVELOPMENT"
+os.environ["DB_URL_SQLITE"] = _db_url
+os.environ.setdefault("DB_URL_SUPABASE", _db_url)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+os.environ["SQL_INSTRUMENTATION"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["DB_MIGRATE_ON_STARTUP"] = "true"
+
+from collections import defaultdict
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from app import models
+from app.db import migrate
+from app.db.database import SessionLocal, engine
+from app.main import app
+from app.services import reports
+
+FIRST = "2024-01"
+
+
+def seed(neighbors, months):
+  migrate.upgrade(engine)
+  periods = reports.period_range(FIRST, reports.period_of(reports.period_start(FIRST) + timedelta(days=31 * (months - 1))))
+  with engine.begin() as conn:
+    conn.execute(insert(models.Neighbor), [
+      {"first_name": f"Nombre{i}", "last_name": f"Apellido{i}", "ci": 1000 + i, "phone_number": 70000000 + i}
+      for i in range(neighbors)
+    ])
+    conn.execute(insert(models.DebtType), [{"name": reports.WATER_DEBT_TYPE}, {"name": "Multa por Inasistencia"}, {"name": "Cuota extraordinaria"}])
+    debts, payments = [], []
+    for p, period in enumerate(periods):
+      for n in range(1, neighbors + 1):
+        debts.append({"neighbor_id": n, "debt_type_id": 1, "amount": 20 + n % 15, "balance": 0, "reason": "Consumo", "period": period, "issue_date": reports.period_start(period)})
+        if (n + p) % 7 == 0:
+          debts.append({"neighbor_id": n, "debt_type_id": 2, "amount": 20, "balance": 0, "reason": "Multa", "period": period, "issue_date": reports.period_start(period)})
+        if (n + p) % 31 == 0:
+          debts.append({"neighbor_id": n, "debt_type_id": 3, "amount": 50, "balance": 0, "reason": "Cuota", "period": period, "issue_date": reports.period_start(period), "status": "cancelled"})
+    conn.execute(insert(models.DebtItem), debts)
+    rows = conn.execute(select(models.DebtItem.id, models.DebtItem.amount, models.DebtItem.period, models.DebtItem.neighbor_id)).all()
+    details = []
+    for debt_id, amount, period, neighbor_id in rows:
+      if neighbor_id % 5 == 0:
+        continue  # sin pagar: queda como saldo pendiente
+      # Se paga el mes siguiente
+      payment_date = reports.period_end(period) + timedelta(days=neighbor_id % 20)
+      payments.append({"neighbor_id": neighbor_id, "payment_date": payment_date, "total_amount": amount})
+      details.append((len(payments), debt_id, amount))
+    conn.execute(insert(models.Payment), payments)
+    conn.execute(insert(models.PaymentDetail), [
+      {"payment_id": payment_id, "debt_item_id": debt_id, "amount_applied": amount}
+      for payment_id, debt_id, amount in details
+    ])
+  return periods
+
+
+def naive(periods):
+  """
+  Mismo reporte recorriendo todas las filas en Python
+  """
+  with engine.connect() as conn:
+    debts = {row.id: row for row in conn.execute(select(models.DebtItem.__table__, models.DebtType.name.label("type_name")).join(models.DebtType))}
+    applied = conn.execute(
+      select(models.PaymentDetail.debt_item_id, models.PaymentDetail.amount_applied, models.Payment.payment_date)
+      .join(models.Payment, models.PaymentDetail.payment_id == models.Payment.id)
+    ).all()
+
+  def section(debt):
+    if debt.meter_reading_id is not None or debt.type_name == reports.WATER_DEBT_TYPE:
+      return "water"
+    if debt.assistance_id is not None or debt.type_name.startswith("Multa"):
+      return "fines"
+    return "other"
+
+  result = {}
+  for period in periods:
+    totals = defaultdict(lambda: {"billed": 0, "collected": 0, "outstanding": 0})
+    end = reports.period_end(period)
+    for debt in debts.values():
+      if debt.status != "cancelled" and debt.period <= period:
+        totals[section(debt)]["outstanding"] += debt.amount
+        if debt.period == period:
+          totals[section(debt)]["billed"] += debt.amount
+    for debt_id, amount, payment_date in applied:
+      debt = debts[debt_id]
+      if reports.period_of(payment_date) == period:
+        totals[section(debt)]["collected"] += amount
+      if debt.status != "cancelled" and debt.period <= period and payment_date < end:
+        totals[section(debt)]["outstanding"] -= amount
+    result[period] = {name: totals[name] for name in reports.SECTIONS}
+  return result
+
+
+def timed(client, path, clear):
+  latencies = []
+  for _ in range(args.repeat):
+    if clear:
+      reports._reports_cache.clear()
+    start = time.perf_counter()
+    response = client.get(path)
+    response.raise_for_status()
+    latencies.append((time.perf_counter() - start) * 1000)
+  return latencies, response.json()
+
+
+def report(name, latencies):
+  print(f"  {name:<18} p50 {statistics.median(latencies):7.1f} ms  max {max(latencies):7.1f} ms")
+
+
+def sections(served):
+  return {item["period"]: {name: item[name] for name in reports.SECTIONS} for item in served}
+
+
+if __name__ == "__main__":
+  periods = seed(args.neighbors, args.months)
+  path = f"/reports/periods?from={periods[0]}&to={periods[-1]}"
+  print(f"{args.neighbors} neighbors, {len(periods)} periods, {args.repeat} runs (median)")
+  print(f"GET {path}")
+  with TestClient(app) as client:
+    latencies, computed = timed(client, path, clear=True)
+    report("open, uncached", latencies)
+    report("open, cached", timed(client, path, clear=False)[0])
+
+    db = SessionLocal()
+    try:
+      for period in periods:
+        reports.close_period(db, period, closed_by="bench")
+    finally:
+      db.close()
+    latencies, closed = timed(client, path, clear=True)
+    report("closed, snapshots", latencies)
+
+  expected = naive(periods)
+  print("matches row-by-row computation" if sections(computed) == expected else "MISMATCH with row-by-row computation")
+  print("snapshots match" if sections(closed) == expected else "MISMATCH between snapshots and computation")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Benchmark de la cache de respuestas: latencia de GET sin cache, en frío (miss) y
+con hit, invalidación después de una escritura y single-flight: N peticiones
+concurrentes a una clave fría ejecutan el endpoint una sola vez.
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/bench_response_cache.py --neighbors 2000 --repeat 50 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--neighbors", type=int, default=2000)
+parser.add_argument("--repeat", type=int, default=50)
+parser.add_argument("--concurrency", type=int, default=20)
+args = parser.parse_args()
+
+_db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_response_cache.db')}"
+os.environ["ENVIRONMENT"] = "DEVELOPMENT"
+os.environ["DB_URL_SQLITE"] = _db_url
+os.environ.setdefault("DB_URL_SUPABASE", _db_url)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+os.environ["SQL_INSTRUMENTATION"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["DB_MIGRATE_ON_STARTUP"] = "true"
+
+from datetime import date
+
+import httpx
+
+from app import models
+from app.db import migrate
+from app.db.database import SessionLocal, engine
+from app.main import app
+from app.services import response_cache
+
+PATH = "/measures/1/meter-readings"
+
+
+def seed(count):
+  migrate.upgrade(engine)
+  db = SessionLocal()
+  try:
+    neighbors = [
+      models.Neighbor(first_name=f"Nombre{i}", second_name="Segundo", last_name=f"Apellido{i % 40}", ci=1000 + i, phone_number=70000000 + i)
+      for i in range(count)
+    ]
+    db.add_all(neighbors)
+    db.flush()
+    meters = [models.NeighborMeter(neighbor_id=neighbor.id, meter_code=f"MED-{neighbor.id:05d}") for neighbor in neighbors]
+    measure = models.Measure(measure_date=date(2025, 1, 31), period="2025-01", reader_name="Lector")
+    db.add_all([*meters, measure])
+    db.flush()
+    db.add_all([
+      models.MeterReading(measure_id=measure.id, meter_id=meter.id, current_reading=100 + i, notes="Lectura normal")
+      for i, meter in enumerate(meters)
+    ])
+    db.commit()
+  finally:
+    db.close()
+
+
+async def timed_get(client, path, headers=None):
+  start = time.perf_counter()
+  response = await client.get(path, headers=headers)
+  response.raise_for_status()
+  return (time.perf_counter() - start) * 1000, response
+
+
+def report(name, latencies):
+  print(f"{name:<12} p50 {statistics.median(latencies):7.2f} ms  max {max(latencies):7.2f} ms")
+
+
+async def main():
+  seed(args.neighbors)
+  print(f"{args.neighbors} meter readings on GET {PATH}, {args.repeat} runs")
+  async with app.router.lifespan_context(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+      # Cada parámetro distinto es una clave nueva: siempre miss
+      cold = [(await timed_get(client, f"{PATH}?run={i}"))[0] for i in range(args.repeat)]
+      report("miss", cold)
+      warm = [(await timed_get(client, PATH))[0] for _ in range(args.repeat + 1)][1:]
+      report("hit", warm)
+
+      await client.put("/measures/1", json={"notes": "Revisada"})
+      _, response = await timed_get(client, PATH)
+      print(f"after write  x-cache={response.headers.get('x-cache')}")
+
+      before = response_cache.coalesced
+      results = await asyncio.gather(*(timed_get(client, f"{PATH}?burst=1") for _ in range(args.concurrency)))
+      states = [response.headers.get("x-cache") for _, response in results]
+      print(
+        f"burst of {args.concurrency}: {states.count('MISS')} miss, {states.count('HIT')} hit "
+        f"({response_cache.coalesced - before} coalesced)"
+      )
+
+
+if __name__ == "__main__":
+  asyncio.run(main())
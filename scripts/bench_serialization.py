@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Benchmark de serialización de un listado grande (por defecto 10k mediciones).
+
+Compara el camino anterior (entidades ORM + dict armado a mano con str() +
+jsonable_encoder + json.dumps) con el actual (proyección de columnas + schema
+de respuesta con from_attributes + pydantic_core), primero por etapas dentro
+del proceso y después de punta a punta con GET /measures.
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/bench_serialization.py --rows 10000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=10_000)
+parser.add_argument("--repeat", type=int, default=20)
+args = parser.parse_args()
+
+_db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_serialization.db')}"
+os.environ["ENVIRONMENT"] = "DEVELOPMENT"
+os.environ["DB_URL_SQLITE"] = _db_url
+os.environ.setdefault("DB_URL_SUPABASE", _db_url)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+os.environ["SQL_INSTRUMENTATION"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["DB_MIGRATE_ON_STARTUP"] = "true"
+
+from datetime import date, datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from app import models
+from app.db import migrate
+from app.db.database import SessionLocal, engine
+from app.main import app
+from app.responses import FastJSONResponse
+from app.schemas import schema as schemas
+
+measures_adapter = TypeAdapter(list[schemas.Measure])
+
+
+def seed(rows):
+  migrate.upgrade(engine)
+  now = datetime.utcnow()
+  with engine.begin() as conn:
+    conn.execute(insert(models.Measure), [
+      {
+        "measure_date": date(2025, 1 + i % 12, 1 + i % 28), "period": f"2025-{1 + i % 12:02d}",
+        "reader_name": f"Lector {i % 50}", "status": "completed", "total_meters": 120,
+        "meters_read": 118, "meters_pending": 2, "notes": None, "created_at": now, "updated_at": now,
+      }
+      for i in range(rows)
+    ])
+
+
+def manual(db):
+  """
+  Como estaba: entidades, dict a mano y json.dumps
+  """
+  stages = {}
+  start = time.perf_counter()
+  measures = db.scalars(select(models.Measure).order_by(models.Measure.created_at.desc())).all()
+  stages["query"] = time.perf_counter()
+  data = [
+    {
+      "id": measure.id,
+      "measure_date": str(measure.measure_date),
+      "period": measure.period,
+      "reader_name": measure.reader_name,
+      "status": measure.status,
+      "total_meters": measure.total_meters,
+      "meters_read": measure.meters_read,
+      "meters_pending": measure.meters_pending,
+      "notes": measure.notes,
+      "created_at": str(measure.created_at),
+      "updated_at": str(measure.updated_at)
+    }
+    for measure in measures
+  ]
+  data = jsonable_encoder(data)
+  stages["build"] = time.perf_counter()
+  body = JSONResponse(data).body
+  stages["render"] = time.perf_counter()
+  db.expunge_all()
+  return start, stages, body
+
+
+def projected(db):
+  """
+  Como ahora: columnas proyectadas como dicts, schema de respuesta y pydantic_core
+  """
+  stages = {}
+  start = time.perf_counter()
+  rows = [row._asdict() for row in db.execute(select(*models.Measure.__table__.columns).order_by(models.Measure.created_at.desc()))]
+  stages["query"] = time.perf_counter()
+  # Lo mismo que hace FastAPI con response_model=list[schemas.Measure]
+  data = measures_adapter.dump_python(measures_adapter.validate_python(rows, from_attributes=True), mode="json")
+  stages["build"] = time.perf_counter()
+  body = FastJSONResponse(data).body
+  stages["render"] = time.perf_counter()
+  return start, stages, body
+
+
+def run(name, fn):
+  timings = {"query": [], "build": [], "render": [], "total": []}
+  db = SessionLocal()
+  try:
+    fn(db)  # calentamiento
+    for _ in range(args.repeat):
+      start, stages, body = fn(db)
+      previous = start
+      for stage in ("query", "build", "render"):
+        timings[stage].append((stages[stage] - previous) * 1000)
+        previous = stages[stage]
+      timings["total"].append((previous - start) * 1000)
+  finally:
+    db.close()
+  print(
+    f"{name:<10}" + "".join(f"  {stage} {statistics.median(values):7.1f} ms" for stage, values in timings.items())
+    + f"  ({len(body) / 1024:.0f} KiB)"
+  )
+  return body
+
+
+def end_to_end(client):
+  latencies = []
+  client.get("/measures")
+  for _ in range(args.repeat):
+    start = time.perf_counter()
+    response = client.get("/measures")
+    response.raise_for_status()
+    latencies.append((time.perf_counter() - start) * 1000)
+  print(f"GET /measures  p50 {statistics.median(latencies):7.1f} ms  max {max(latencies):7.1f} ms")
+
+
+if __name__ == "__main__":
+  seed(args.rows)
+  print(f"{args.rows} rows, {args.repeat} runs (median), db: {engine.dialect.name}")
+  before = run("manual", manual)
+  after = run("projected", projected)
+  print("same payload" if before == after else "payload differs")
+  with TestClient(app) as client:
+    end_to_end(client)
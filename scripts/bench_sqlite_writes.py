@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Benchmark de escrituras y lecturas concurrentes sobre SQLite.
+
+Levanta N procesos (como N workers de uvicorn), cada uno con varias peticiones
+simultáneas, que registran pagos en la misma recaudación con
+POST /collect-debts/{id}/payments mientras otras leen los pagos con
+GET /collect-debts/{id}/payments, primero sin el perfil SQLite
+(SQLITE_PRODUCTION_PROFILE=false) y luego con él. Cuenta cuántas peticiones
+fallan (ej: "database is locked") y la latencia de las lecturas.
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/bench_sqlite_writes.py --workers 6 --payments 20 --reads 40
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def configure_env(db_file, profile):
+  os.environ["ENVIRONMENT"] = "DEVELOPMENT"
+  os.environ["DB_URL_SQLITE"] = f"sqlite:///{db_file}"
+  os.environ["DB_URL_SUPABASE"] = f"sqlite:///{db_file}"
+  os.environ["SQLITE_PRODUCTION_PROFILE"] = "true" if profile else "false"
+  os.environ["SQL_INSTRUMENTATION"] = "false"
+  os.environ["SLOW_QUERY_MS"] = "60000"  # con carga todo es lento, sin logs de consultas lentas
+  os.environ["METRICS_ENABLED"] = "false"
+  os.environ.setdefault("SECRET_KEY", "bench")
+  os.environ.setdefault("ALGORITHM", "HS256")
+  os.environ.setdefault("PORT", "8000")
+  os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+  os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+
+
+def seed(db_file, profile, workers, payments):
+  """
+  Crea una recaudación, un vecino por worker y una deuda por pago
+  """
+  configure_env(db_file, profile)
+  from datetime import date
+
+  from app import models
+  from app.db import migrate
+  from app.db.database import SessionLocal, engine
+
+  migrate.upgrade(engine)
+  db = SessionLocal()
+  try:
+    debt_type = models.DebtType(name="Consumo de Agua")
+    collect_debt = models.CollectDebt(collect_date=date.today(), collector_name="bench")
+    db.add_all([debt_type, collect_debt])
+    db.flush()
+    plan = []
+    for w in range(workers):
+      neighbor = models.Neighbor(first_name=f"Vecino{w}", last_name="Bench", ci=w + 1, phone_number=w + 1)
+      db.add(neighbor)
+      db.flush()
+      items = [
+        models.DebtItem(
+          neighbor_id=neighbor.id, debt_type_id=debt_type.id, amount=100, balance=100,
+          reason="bench", issue_date=date.today()
+        )
+        for _ in range(payments)
+      ]
+      db.add_all(items)
+      db.flush()
+      plan.append((neighbor.id, [item.id for item in items]))
+    db.commit()
+    return collect_debt.id, plan
+  finally:
+    db.close()
+    engine.dispose()
+
+
+def worker(db_file, profile, collect_debt_id, neighbor_id, debt_item_ids, reads, concurrency, start_event, results):
+  configure_env(db_file, profile)
+  from fastapi.testclient import TestClient
+
+  from app.main import app
+
+  outcomes = {"write": [], "read": []}
+  read_latencies = []
+
+  def request(client, task):
+    kind, debt_item_id = task
+    start = time.perf_counter()
+    try:
+      if kind == "write":
+        response = client.post(
+          f"/collect-debts/{collect_debt_id}/payments",
+          params={"neighbor_id": neighbor_id, "total_amount": 10},
+          json=[{"debt_item_id": debt_item_id, "amount_applied": 10}],
+        )
+      else:
+        response = client.get(f"/collect-debts/{collect_debt_id}/payments")
+      outcomes[kind].append(None if response.status_code == 200 else f"HTTP {response.status_code}")
+    except Exception as exc:  # el error de la base llega como excepción del servidor
+      outcomes[kind].append(str(exc).splitlines()[0][:80])
+    if kind == "read":
+      read_latencies.append(time.perf_counter() - start)
+
+  # Lecturas intercaladas con las escrituras
+  tasks = [("write", debt_item_id) for debt_item_id in debt_item_ids]
+  for i in range(reads):
+    tasks.insert((i * len(tasks)) // max(reads, 1) + i, ("read", None))
+
+  with TestClient(app) as client:
+    start_event.wait()
+    # Peticiones simultáneas dentro del proceso, como el threadpool de un worker
+    with ThreadPoolExecutor(concurrency) as executor:
+      list(executor.map(lambda task: request(client, task), tasks))
+
+  summary = {}
+  for kind, kind_outcomes in outcomes.items():
+    errors = {}
+    for reason in filter(None, kind_outcomes):
+      errors[reason] = errors.get(reason, 0) + 1
+    summary[kind] = (kind_outcomes.count(None), len(kind_outcomes) - kind_outcomes.count(None), errors)
+  results.put((summary, read_latencies))
+
+
+def run(profile, workers, payments, reads, concurrency):
+  db_file = os.path.join(tempfile.mkdtemp(), "bench_writes.db")
+  ctx = multiprocessing.get_context("spawn")
+  collect_debt_id, plan = ctx.Pool(1).apply(seed, (db_file, profile, workers, payments))
+
+  start_event = ctx.Event()
+  results = ctx.Queue()
+  processes = [
+    ctx.Process(target=worker, args=(db_file, profile, collect_debt_id, neighbor_id, items, reads, concurrency, start_event, results))
+    for neighbor_id, items in plan
+  ]
+  for process in processes:
+    process.start()
+  time.sleep(3)  # tiempo para que cada proceso importe la app
+  start = time.perf_counter()
+  start_event.set()
+  outcomes = [results.get() for _ in processes]
+  elapsed = time.perf_counter() - start
+  for process in processes:
+    process.join()
+
+  label = "profile on " if profile else "profile off"
+  print(f"{label}: {elapsed:.2f}s")
+  for kind in ("write", "read"):
+    ok = sum(summary[kind][0] for summary, _ in outcomes)
+    failed = sum(summary[kind][1] for summary, _ in outcomes)
+    errors = {}
+    for summary, _ in outcomes:
+      for reason, count in summary[kind][2].items():
+        errors[reason] = errors.get(reason, 0) + count
+    line = f"  {kind}s: {ok} ok, {failed} failed ({ok / elapsed:.1f}/s)"
+    latencies = sorted(latency for _, worker_latencies in outcomes for latency in worker_latencies)
+    if kind == "read" and latencies:
+      line += f", p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms"
+    print(line)
+    for reason, count in errors.items():
+      print(f"    {count:4d} x {reason}")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--workers", type=int, default=6, help="procesos escribiendo en paralelo")
+  parser.add_argument("--payments", type=int, default=20, help="pagos por proceso")
+  parser.add_argument("--reads", type=int, default=40, help="lecturas por proceso")
+  parser.add_argument("--concurrency", type=int, default=8, help="peticiones simultáneas por proceso")
+  args = parser.parse_args()
+
+  print(f"{args.workers} workers x ({args.payments} payments + {args.reads} reads), {args.concurrency} concurrent per worker")
+  run(False, args.workers, args.payments, args.reads, args.concurrency)
+  run(True, args.workers, args.payments, args.reads, args.concurrency)
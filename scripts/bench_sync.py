@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Benchmark de GET /sync/changes: bytes transferidos (con gzip) y tiempo de una
+sincronización completa contra una incremental después de unos pocos cambios,
+comparado con recargar los listados completos. Verifica que la copia que arma el
+cliente con las páginas coincide con la base.
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/bench_sync.py --neighbors 2000 --changes 20 --limit 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--neighbors", type=int, default=2000)
+parser.add_argument("--changes", type=int, default=20)
+parser.add_argument("--limit", type=int, default=500)
+args = parser.parse_args()
+
+_db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_sync.db')}"
+os.environ["ENVIRONMENT"] = "DEVELOPMENT"
+os.environ["DB_URL_SQLITE"] = _db_url
+os.environ.setdefault("DB_URL_SUPABASE", _db_url)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+os.environ["SQL_INSTRUMENTATION"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["DB_MIGRATE_ON_STARTUP"] = "true"
+os.environ["SYNC_SAFETY_LAG_SECONDS"] = "0"
+
+from datetime import date
+
+import bcrypt
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, select, update
+
+from app import models
+from app.db import migrate
+from app.db.database import SessionLocal, engine
+from app.enums import UserType
+from app.main import app
+from app.services import sync
+
+
+def seed(neighbors):
+  migrate.upgrade(engine)
+  with engine.begin() as conn:
+    conn.execute(insert(models.User), [{"username": "bench", "password_hash": bcrypt.hashpw(b"bench", bcrypt.gensalt(4)).decode(), "role": UserType.COLLECTOR}])
+    conn.execute(insert(models.DebtType), [{"name": "Consumo de Agua"}])
+    conn.execute(insert(models.Neighbor), [
+      {"first_name": f"Nombre{i}", "last_name": f"Apellido{i}", "ci": 1000 + i, "phone_number": 70000000 + i}
+      for i in range(neighbors)
+    ])
+    conn.execute(insert(models.NeighborMeter), [{"neighbor_id": n, "meter_code": f"M-{n:05d}"} for n in range(1, neighbors + 1)])
+    conn.execute(insert(models.Measure), [{"measure_date": date(2025, m, 1), "period": f"2025-{m:02d}"} for m in range(1, 13)])
+    conn.execute(insert(models.DebtItem), [
+      {"neighbor_id": n, "debt_type_id": 1, "amount": 20, "balance": 20, "reason": "Consumo", "period": f"2025-{m:02d}", "issue_date": date(2025, m, 1)}
+      for n in range(1, neighbors + 1) for m in range(1, 4)
+    ])
+
+
+def change(count):
+  """
+  Unas pocas escrituras como las de un día de trabajo: pagos, ediciones y bajas
+  """
+  db = SessionLocal()
+  try:
+    debt_ids = db.scalars(select(models.DebtItem.id).limit(count)).all()
+    for debt in db.scalars(select(models.DebtItem).where(models.DebtItem.id.in_(debt_ids))):
+      debt.status, debt.balance, debt.amount_paid = "paid", 0, debt.amount
+    db.execute(update(models.Neighbor).where(models.Neighbor.id <= count // 2).values(phone_number=71111111))
+    db.delete(db.get(models.Neighbor, args.neighbors))  # con sus medidores y deudas
+    db.execute(delete(models.DebtItem).where(models.DebtItem.neighbor_id == args.neighbors - 1))
+    db.commit()
+  finally:
+    db.close()
+
+
+def download(client, since):
+  """
+  Pide páginas hasta has_more = false; devuelve las páginas, el cursor y los bytes (gzip)
+  """
+  pages, transferred = [], 0
+  while True:
+    params = {"limit": args.limit, **({"since": since} if since else {})}
+    response = client.get("/sync/changes", params=params, headers={"Accept-Encoding": "gzip"})
+    response.raise_for_status()
+    transferred += int(response.headers.get("content-length") or len(response.content))
+    body = response.json()
+    pages.append(body)
+    since = body["cursor"]
+    if not body["has_more"]:
+      return pages, since, transferred
+
+
+def apply(replica, pages):
+  for page in pages:
+    for entity, ids in page["deleted"].items():
+      for row_id in ids:
+        replica[entity].pop(row_id, None)
+    for entity, block in page["changes"].items():
+      for row in block["rows"]:
+        replica[entity][row[0]] = dict(zip(block["fields"], row))
+
+
+def expected():
+  with engine.connect() as conn:
+    return {entity: {row.id: row.updated_at for row in conn.execute(select(model.id, model.updated_at))} for entity, model in sync.ENTITIES.items()}
+
+
+def listings(client):
+  transferred = 0
+  for path in ("/neighbors", "/measures"):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    if response.status_code == 200:
+      transferred += int(response.headers.get("content-length") or len(response.content))
+  return transferred
+
+
+def kb(size):
+  return f"{size / 1024:8.1f} KB"
+
+
+if __name__ == "__main__":
+  seed(args.neighbors)
+  print(f"{args.neighbors} neighbors, {args.changes} changes, pages of {args.limit} rows")
+  with TestClient(app) as client:
+    client.post("/auth/login", json={"username": "bench", "password": "bench"}).raise_for_status()
+    replica = {entity: {} for entity in sync.ENTITIES}
+
+    start = time.perf_counter()
+    pages, cursor, transferred = download(client, None)
+    print(f"  full sync      {kb(transferred)}  {len(pages):3d} pages  {(time.perf_counter() - start) * 1000:7.1f} ms")
+    apply(replica, pages)
+    print(f"  listings       {kb(listings(client))}  (GET /neighbors + /measures, without meters or debts)")
+
+    change(args.changes)
+    start = time.perf_counter()
+    pages, cursor, transferred = download(client, cursor)
+    print(f"  delta sync     {kb(transferred)}  {len(pages):3d} pages  {(time.perf_counter() - start) * 1000:7.1f} ms")
+    apply(replica, pages)
+
+    pages, cursor, transferred = download(client, cursor)
+    print(f"  already synced {kb(transferred)}  {len(pages):3d} pages")
+
+  served = {entity: {row_id: row["updated_at"] for row_id, row in rows.items()} for entity, rows in replica.items()}
+  actual = {entity: {row_id: value.isoformat() for row_id, value in rows.items()} for entity, rows in expected().items()}
+  print("replica matches database" if served == actual else "MISMATCH between replica and database")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Comprueba el ruteo lectura/escritura con dos bases locales.
+
+Por defecto crea dos archivos SQLite (primario y "réplica") con un vecino
+distinto en cada uno, así se ve de dónde lee cada petición:
+  1. GET /neighbors lee de la réplica
+  2. después de un POST /neighbors el mismo cliente lee del primario
+  3. también en otro worker (sin la cache del proceso, solo con la cookie)
+  4. pasada la ventana DB_READ_YOUR_WRITES_SECONDS vuelve a la réplica
+
+Para probar con dos PostgreSQL locales pasar --primary y --replica (las tablas
+deben existir; el script solo inserta los vecinos de prueba).
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/check_replica_routing.py
+  $ python scripts/check_replica_routing.py --primary postgresql://localhost/otb --replica postgresql://localhost:5433/otb
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--primary", default=None, help="URL del primario (sync)")
+parser.add_argument("--replica", default=None, help="URL de la réplica (sync)")
+parser.add_argument("--window", type=float, default=1.0, help="segundos de lectura desde el primario tras escribir")
+args = parser.parse_args()
+
+_tmp = tempfile.mkdtemp()
+primary_url = args.primary or f"sqlite:///{os.path.join(_tmp, 'primary.db')}"
+replica_url = args.replica or f"sqlite:///{os.path.join(_tmp, 'replica.db')}"
+os.environ["ENVIRONMENT"] = "DEVELOPMENT"
+os.environ["DB_URL_SQLITE"] = primary_url
+os.environ["DB_URL_REPLICA"] = replica_url
+os.environ["DB_READ_YOUR_WRITES_SECONDS"] = str(args.window)
+os.environ.setdefault("DB_URL_SUPABASE", primary_url)
+os.environ.setdefault("SECRET_KEY", "check")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PORT", "8000")
+os.environ.setdefault("CLIENT_URL_PROD", "http://localhost")
+os.environ.setdefault("CLIENT_URL_DEV", "http://localhost")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import migrate
+from app.db.database import engine, recent_writers, replica_engine
+from app.main import app
+
+
+def seed(bind, name):
+  migrate.upgrade(bind)
+  with Session(bind) as db:
+    db.add(models.Neighbor(first_name=name, last_name="Routing", ci=0, phone_number=0))
+    db.commit()
+
+
+def names(client):
+  response = client.get("/neighbors")
+  response.raise_for_status()
+  return sorted(neighbor["first_name"] for neighbor in response.json()["data"])
+
+
+def check(label, got, expected):
+  status = "ok" if expected in got else "FAIL"
+  print(f"[{status}] {label}: {got}")
+  return status == "ok"
+
+
+if __name__ == "__main__":
+  seed(engine, "primary")
+  seed(replica_engine, "replica")
+
+  with TestClient(app) as client:
+    results = [check("lectura inicial desde la réplica", names(client), "replica")]
+
+    client.post("/neighbors", json={"first_name": "nuevo", "last_name": "Routing", "ci": 1, "phone_number": 1})
+    results.append(check("tras escribir lee del primario", names(client), "nuevo"))
+
+    # Otro worker no tiene la cache de este proceso, solo la cookie read_primary_until
+    recent_writers.clear()
+    results.append(check("otro worker también lee del primario", names(client), "nuevo"))
+
+    # La cookie guarda el vencimiento en segundos enteros (redondeado hacia arriba)
+    time.sleep(args.window + 1.1)
+    results.append(check("vencida la ventana vuelve a la réplica", names(client), "replica"))
+
+  sys.exit(0 if all(results) else 1)
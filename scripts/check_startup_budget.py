@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Presupuesto de arranque en frío.
+
+Mide en procesos nuevos (mediana de --runs) el tiempo de `import app.main` y el
+del arranque (lifespan), y falla con código 1 si se supera el presupuesto, si el
+import abre alguna conexión a la base o si el arranque ejecuta más consultas que
+las permitidas (solo debería verificar la versión de las migraciones).
+
+Uso (desde la raíz del proyecto):
+  $ python scripts/check_startup_budget.py
+  $ python scripts/check_startup_budget.py --import-budget-ms 1500 --startup-budget-ms 100
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código que corre en cada proceso hijo: cuenta conexiones y consultas
+CHILD = """
+import asyncio, json, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+counts = {"connects": 0, "queries": 0}
+event.listen(Engine, "connect", lambda *args: counts.__setitem__("connects", counts["connects"] + 1))
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, *args):
+  # BEGIN IMMEDIATE del perfil SQLite no es una consulta
+  if not statement.startswith("BEGIN"):
+    counts["queries"] += 1
+
+start = time.perf_counter()
+from app.main import app
+import_ms = (time.perf_counter() - start) * 1000
+import_connects = counts["connects"]
+
+async def startup():
+  async with app.router.lifespan_context(app):
+    return (time.perf_counter() - start) * 1000
+
+start = time.perf_counter()
+startup_ms = asyncio.run(startup())
+print(json.dumps({
+  "import_ms": import_ms,
+  "import_connects": import_connects,
+  "startup_ms": startup_ms,
+  "startup_queries": counts["queries"],
+}))
+"""
+
+
+def child_env(db_file):
+  env = dict(os.environ)
+  env.update({
+    "ENVIRONMENT": "DEVELOPMENT",
+    "DB_URL_SQLITE": f"sqlite:///{db_file}",
+    "DB_URL_SUPABASE": f"sqlite:///{db_file}",
+    "DB_MIGRATE_ON_STARTUP": "false",
+    "PYTHONPATH": ROOT,
+  })
+  for name, value in {
+    "SECRET_KEY": "budget", "ALGORITHM": "HS256", "PORT": "8000",
+    "CLIENT_URL_PROD": "http://localhost", "CLIENT_URL_DEV": "http://localhost",
+  }.items():
+    env.setdefault(name, value)
+  return env
+
+
+def run_child(env):
+  result = subprocess.run(
+    [sys.executable, "-W", "ignore", "-c", CHILD], env=env, cwd=ROOT,
+    capture_output=True, text=True, check=True
+  )
+  return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--runs", type=int, default=5)
+  parser.add_argument("--import-budget-ms", type=float, default=2500)
+  parser.add_argument("--startup-budget-ms", type=float, default=250)
+  parser.add_argument("--startup-max-queries", type=int, default=1)
+  args = parser.parse_args()
+
+  env = child_env(os.path.join(tempfile.mkdtemp(), "budget.db"))
+  subprocess.run([sys.executable, "-W", "ignore", "-m", "app.db.migrate", "upgrade"], env=env, cwd=ROOT, check=True, capture_output=True)
+
+  runs = [run_child(env) for _ in range(args.runs)]
+  import_ms = statistics.median(run["import_ms"] for run in runs)
+  startup_ms = statistics.median(run["startup_ms"] for run in runs)
+  import_connects = max(run["import_connects"] for run in runs)
+  startup_queries = max(run["startup_queries"] for run in runs)
+
+  checks = [
+    ("import app.main", f"{import_ms:.0f} ms", import_ms <= args.import_budget_ms, f"<= {args.import_budget_ms:.0f} ms"),
+    ("startup (lifespan)", f"{startup_ms:.0f} ms", startup_ms <= args.startup_budget_ms, f"<= {args.startup_budget_ms:.0f} ms"),
+    ("connections during import", import_connects, import_connects == 0, "== 0"),
+    ("queries during startup", startup_queries, startup_queries <= args.startup_max_queries, f"<= {args.startup_max_queries}"),
+  ]
+  for name, value, ok, budget in checks:
+    print(f"[{'ok' if ok else 'FAIL'}] {name}: {value} (budget {budget})")
+
+  sys.exit(0 if all(ok for *_, ok, _ in checks) else 1)